@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import fetchers
+import result_cache
+
+# Read-only JSON API over the dashboard's fetchers (fetchers.py). It runs as
+# its own process, so it keeps its own copy of their caches rather than
+# sharing the app's: the API and the app each cost one Supabase query per
+# cache TTL, however many clients poll either. Run next to the app:
+# python api.py --port 8502
+#
+#   GET /signals/latest[?contracts=A,B][&since=ISO]
+#   GET /contracts/<contract>/history[?since=ISO]
+#   GET /market-structure
+#   GET /health
+#
+# Responses carry an ETag; a matching If-None-Match gets 304. `since` returns
+# only rows with snapshot_minute after it, and every signal response includes
+# the cursor to pass as `since` next time; a `since` that is not a timestamp
+# gets 400. Data responses carry `stale_as_of`: null when fresh, else when the
+# result being served (past its TTL, while the backend is failing) was
+# loaded. With nothing cached and the backend failing the answer is 503, so
+# "no rows" and "backend down" never look alike.
+
+# Cached frames are handed out as copy-on-write views (see result_cache._private)
+pd.set_option("mode.copy_on_write", True)
+
+BODY_TTL = 5  # Seconds an encoded response is reused before asking the fetchers again
+BODY_CACHE = "api.body"
+
+
+class BackendUnavailable(Exception):
+    pass
+
+
+def _fetch(fetcher, *args):
+    # (value, stale_as_of) from a cached fetcher; BackendUnavailable if it has nothing to serve
+    try:
+        return fetcher.fetch(*args)
+    except Exception as e:
+        raise BackendUnavailable(str(e)) from e
+
+
+def _stale_as_of(*loaded):
+    # Oldest load time among the stale parts of a response, as ISO; None if all fresh
+    stale = [t for t in loaded if t is not None]
+    return pd.Timestamp(min(stale), unit='s', tz='UTC').isoformat() if stale else None
+
+
+def _records(df):
+    if df.empty:
+        return []
+    return json.loads(df.to_json(orient='records', date_format='iso', date_unit='s', double_precision=6))
+
+
+def _cursor(df):
+    if df.empty or 'snapshot_minute' not in df.columns:
+        return None
+    # 'Z' rather than '+00:00', which would need escaping in a query string
+    return df['snapshot_minute'].max().tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_since(since):
+    # ISO timestamp -> UTC-aware Timestamp; ValueError if it is not one
+    ts = pd.Timestamp(since)
+    if ts is pd.NaT:
+        raise ValueError(f"not a timestamp: {since!r}")
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts
+
+
+def _since(df, since):
+    if not since or df.empty:
+        return df
+    return df[df['snapshot_minute'] > _parse_since(since)]
+
+
+def cached_body(key, build):
+    # Encoded body and ETag per (endpoint, params), kept BODY_TTL seconds in the
+    # shared result cache: hundreds of clients polling the same URL share one
+    # fetch + JSON encode, and concurrent misses wait for the first one's
+    def encode():
+        body = json.dumps(build(), separators=(",", ":")).encode()
+        return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    value, _ = result_cache.cache.get_or_load(BODY_CACHE, key, encode, BODY_TTL)
+    return value
+
+
+def etag_matches(header, etag):
+    # If-None-Match is "*" or a comma-separated list of tags, compared weakly (W/ ignored)
+    if not header or not etag:
+        return False
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def latest_signals(params):
+    contracts = params.get('contracts')
+    contracts_loaded = None
+    if contracts:
+        contracts = tuple(sorted(c for c in contracts.split(',') if c))
+    else:
+        active, contracts_loaded = _fetch(fetchers.fetch_active_contracts_from_redis)
+        contracts = tuple(sorted(active))
+    df, loaded = _fetch(fetchers.fetch_latest_signals, contracts)
+    df = _since(df, params.get('since'))
+    return {"cursor": _cursor(df) or params.get('since'), "stale_as_of": _stale_as_of(loaded, contracts_loaded), "data": _records(df)}
+
+
+def contract_history(contract, params):
+    df, loaded = _fetch(fetchers.fetch_contract_history, contract)
+    df = _since(df, params.get('since'))
+    return {"contract": contract, "cursor": _cursor(df) or params.get('since'), "stale_as_of": _stale_as_of(loaded), "data": _records(df)}
+
+
+def market_structure(params):
+    structure, loaded = _fetch(fetchers.fetch_market_structure)
+    return {"stale_as_of": _stale_as_of(loaded), "data": structure}
+
+
+def health(params):
+    counters = result_cache.cache.stats()["functions"].get(BODY_CACHE, {})
+    circuit = fetchers.supabase_circuit.stats()
+    return {
+        "status": "ok" if circuit["state"] == "closed" else "degraded",
+        "supabase_circuit": circuit,
+        "cache": {k: counters.get(k, 0) for k in ("hits", "misses", "coalesced")},
+    }
+
+
+def route(path):
+    parts = [p for p in path.split('/') if p]
+    if parts == ['signals', 'latest']:
+        return latest_signals
+    if len(parts) == 3 and parts[0] == 'contracts' and parts[2] == 'history':
+        return lambda params: contract_history(parts[1], params)
+    if parts == ['market-structure']:
+        return market_structure
+    if parts == ['health']:
+        return health
+    return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "SignalsAPI/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        handler = route(url.path)
+        if handler is None:
+            return self._send(404, json.dumps({"error": "not found"}).encode())
+
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if 'since' in params:
+            try:
+                _parse_since(params['since'])
+            except (ValueError, TypeError) as e:
+                return self._send(400, json.dumps({"error": f"invalid since: {e}"}).encode())
+        try:
+            if handler is health:
+                body, etag = json.dumps(health(params)).encode(), None
+            else:
+                key = (url.path, tuple(sorted(params.items())))
+                body, etag = cached_body(key, lambda: handler(params))
+        except BackendUnavailable as e:
+            print(f"Backend unavailable for {self.path}: {e}")
+            return self._send(503, json.dumps({"error": f"backend unavailable: {e}"}).encode())
+        except Exception as e:
+            print(f"Error serving {self.path}: {e}")
+            return self._send(500, json.dumps({"error": str(e)}).encode())
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            return self._send(304, b"", etag)
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", f"max-age={BODY_TTL}")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve cached latest signals, contract history and market structure as JSON.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Signals API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,47 @@
+import startup
+run_timer = startup.RunTimer()
+
 import streamlit as st
-import functions
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
 import pandas as pd
 from streamlit_autorefresh import st_autorefresh
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
-from streamlit_plotly_events import plotly_events
+import random
+import html
+import bars
+import contracts
+import data
+import frames
+import prewarm
+import profiler
+import resources
+
+# Cached frames are shared by every session. With copy-on-write, a session that
+# adds or overwrites a column gets its own copy of just that column, the
+# shared frame never changes, and result_cache can hand out views
+pd.set_option("mode.copy_on_write", True)
 
 # Set page config as the first Streamlit command
 st.set_page_config(layout="wide")
 
+# Opt-in sampling profile of this run (APP_PROFILE=1 or ?profile=1); nothing is started otherwise
+run_profile = profiler.RerunProfile(script=__file__).start() if profiler.requested(st.query_params) else None
+
+# Import render-only modules (plotly etc.) in the background while we connect
+startup.warmup_in_background()
+run_timer.mark("import")
+
 # Dynamic Auto-refresh logic
 # Data arrives at minutes ending in 2 or 6 (02, 06, 12, 16, 22, 26...)
-# We refresh 20 seconds after these minutes.
-def get_next_refresh_interval():
+# We refresh 20 seconds after these minutes, plus a per-session offset of up to
+# REFRESH_JITTER seconds so open sessions do not all rerun in the same second.
+REFRESH_JITTER = 15
+
+def get_next_refresh_interval(jitter_seconds=0):
     istanbul_tz = pytz.timezone('Europe/Istanbul')
     now = datetime.now(istanbul_tz)
     
-    target_minutes = [2, 6, 12, 16, 22, 26, 32, 36, 42, 46, 52, 56]
+    target_minutes = prewarm.ARRIVAL_MINUTES
     target_second = 20
     
     next_refresh = None
@@ -35,29 +57,23 @@ def get_next_refresh_interval():
             
     if next_refresh is None:
         # Move to next hour
-        next_hour = now + pd.Timedelta(hours=1)
+        next_hour = now + timedelta(hours=1)
         # Ensure we don't carry over minutes/seconds that might cause issues, though replace handles it
         next_refresh = next_hour.replace(minute=target_minutes[0], second=target_second, microsecond=0)
         
-    seconds_until = (next_refresh - now).total_seconds()
+    seconds_until = (next_refresh - now).total_seconds() + jitter_seconds
     return max(1000, int(seconds_until * 1000))
 
-# Load environment variables
-load_dotenv()
-
-# Initialize Supabase
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_API_KEY")
+# Initialize Supabase (one client per process)
+supabase = resources.get_supabase()
 
-if not url or not key:
+if not supabase:
     st.error("Supabase URL and API Key must be set in the .env file.")
     st.stop()
 
-supabase: Client = create_client(url, key)
-
-# Initialize Redis
+# Initialize Redis (one connection pool per process)
 try:
-    r = functions.connect_to_redis()
+    r = resources.get_redis()
 except Exception as e:
     st.error(f"Failed to connect to Redis: {e}")
     st.stop()
@@ -67,162 +83,63 @@ istanbul_tz = pytz.timezone('Europe/Istanbul')
 
 # Get active contracts from Redis
 try:
-    active_contracts = functions.get_active_contracts(r)
-except Exception as e:
-    st.error(f"Error fetching active contracts: {e}")
-    active_contracts = []
+    contract_index = data.get_contract_index(tuple(data.fetch_active_contracts()))
+    active_contracts = contract_index.all()
 except Exception as e:
     st.error(f"Error fetching active contracts: {e}")
+    contract_index = contracts.ContractIndex([])
     active_contracts = []
 
-@st.cache_data(ttl=60, show_spinner=False)
-def fetch_latest_signals(contracts):
-    latest_data_list = []
-    for contract in contracts:
-        try:
-            # Fetch ONLY the latest signal for each contract
-            response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=True).limit(1).execute()
-            if response.data:
-                latest_data_list.extend(response.data)
-        except Exception as e:
-            print(f"Error fetching latest data for {contract}: {e}")
-    
-    if not latest_data_list:
-        return pd.DataFrame()
-    
-    df = pd.DataFrame(latest_data_list)
-    
-    # Process snapshot_minute
-    if 'snapshot_minute' in df.columns:
-        df['snapshot_minute'] = pd.to_datetime(df['snapshot_minute'])
-        try:
-            df['snapshot_minute'] = df['snapshot_minute'].dt.tz_convert('Europe/Istanbul')
-        except TypeError:
-            df['snapshot_minute'] = df['snapshot_minute'].dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-        
-        df = df.sort_values(by='snapshot_minute', ascending=False)
-        
-    return df
+run_timer.mark("connect")
 
-@st.cache_data(ttl=60, show_spinner=False)
-def fetch_contract_history(contract):
-    try:
-        # Fetch recent history (e.g., 1000 rows) for a SPECIFIC contract
-        response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=True).limit(1000).execute()
-        if response.data:
-            df = pd.DataFrame(response.data)
-            # Process snapshot_minute
-            if 'snapshot_minute' in df.columns:
-                df['snapshot_minute'] = pd.to_datetime(df['snapshot_minute'])
-                try:
-                    df['snapshot_minute'] = df['snapshot_minute'].dt.tz_convert('Europe/Istanbul')
-                except TypeError:
-                    df['snapshot_minute'] = df['snapshot_minute'].dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-            return df
-    except Exception as e:
-        print(f"Error fetching history for {contract}: {e}")
-    
-    return pd.DataFrame()
+# Reloads the shared caches after each arrival boundary, ahead of the reruns
+try:
+    data.get_prewarmer()
+except Exception as e:
+    print(f"Error starting cache prewarmer: {e}")
 
-@st.cache_data(ttl=60, show_spinner=False)
-def fetch_recent_trade_signals(limit=1000):
-    try:
-        # Fetch recent OPEN_LONG and OPEN_SHORT signals
-        response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").in_("tradeSignal", ["OPEN_LONG", "OPEN_SHORT"]).order("snapshot_minute", desc=True).limit(limit).execute()
-        if response.data:
-            df = pd.DataFrame(response.data)
-            # Process snapshot_minute
-            if 'snapshot_minute' in df.columns:
-                df['snapshot_minute'] = pd.to_datetime(df['snapshot_minute'])
-                try:
-                    df['snapshot_minute'] = df['snapshot_minute'].dt.tz_convert('Europe/Istanbul')
-                except TypeError:
-                    df['snapshot_minute'] = df['snapshot_minute'].dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-            return df
-    except Exception as e:
-        print(f"Error fetching recent trade signals: {e}")
-    
-    return pd.DataFrame()
+# Status badges, from the background health monitor's last probes (no backend call here)
+STATUS_COLORS = {"Connected": "#28a745", "Degraded": "#fd7e14", "Disconnected": "#dc3545", "Checking": "#6c757d"}
 
-@st.cache_data(ttl=300, show_spinner=False)
-def fetch_market_structure():
-    try:
-        all_contracts = set()
-        batch_size = 1000
-        max_batches = 30  # Fetch up to 30,000 rows to ensure we cover 3 days
-        
-        # We need to fetch enough data to find the last 3 days.
-        # Since we order by time, we just keep fetching until we have 3 distinct dates.
-        
-        for i in range(max_batches):
-            start = i * batch_size
-            end = start + batch_size - 1
-            
-            response = supabase.table("signals") \
-                .select("contract, snapshot_minute") \
-                .order("snapshot_minute", desc=True) \
-                .range(start, end) \
-                .execute()
-            
-            if not response.data:
-                break
-            
-            df = pd.DataFrame(response.data)
-            unique_in_batch = df['contract'].unique()
-            all_contracts.update(unique_in_batch)
-            
-            # Check if we have enough dates
-            # Quick check: extract dates from what we have so far
-            temp_dates = set()
-            for c in all_contracts:
-                if c.startswith("PH") and len(c) >= 8:
-                    temp_dates.add(c[2:8])
-            
-            # If we have found contracts for more than 3 days, we can probably stop
-            if len(temp_dates) >= 4: 
-                break
-        
-        # Process all found contracts
-        contract_dates = {}
-        for contract in all_contracts:
-            try:
-                # Extract YYMMDD part (index 2 to 8)
-                if contract.startswith("PH") and len(contract) >= 8:
-                    date_part = contract[2:8]
-                    # Convert to readable date string (YYYY-MM-DD)
-                    full_date_str = f"20{date_part[:2]}-{date_part[2:4]}-{date_part[4:]}"
-                    
-                    if full_date_str not in contract_dates:
-                        contract_dates[full_date_str] = []
-                    contract_dates[full_date_str].append(contract)
-            except:
-                continue
-        
-        # Filter: Keep only the top 3 most recent dates
-        sorted_dates = sorted(contract_dates.keys(), reverse=True)
-        top_3_dates = sorted_dates[:3]
-        
-        final_structure = {d: contract_dates[d] for d in top_3_dates}
-        return final_structure
-        
-    except Exception as e:
-        print(f"Error fetching market structure: {e}")
-    return {}
+def latency_sparkline(values, width=60, height=16):
+    # Inline SVG of recent probe latencies; failed probes (None) leave a gap
+    points = [v for v in values if v is not None]
+    if len(points) < 2:
+        return ""
+    top = max(points) or 1
+    step = width / (len(values) - 1)
+    segments, current = [], []
+    for i, v in enumerate(values):
+        if v is None:
+            if current:
+                segments.append(current)
+            current = []
+        else:
+            current.append(f"{i * step:.1f},{height - 1 - (height - 2) * v / top:.1f}")
+    if current:
+        segments.append(current)
+    lines = "".join(f'<polyline points="{" ".join(seg)}" fill="none" stroke="white" stroke-width="1.2"/>' for seg in segments if len(seg) > 1)
+    return f'<svg width="{width}" height="{height}" style="vertical-align: middle; margin-left: 6px;">{lines}</svg>'
 
-# Status Checks
-redis_status = "Connected"
-redis_color = "#28a745" # Green
-try:
-    r.ping()
-except Exception:
-    redis_status = "Disconnected"
-    redis_color = "#dc3545" # Red
+def status_badge(name, summary):
+    status = summary["status"]
+    title = f"{summary['probes']} probes"
+    if summary.get("p50_ms") is not None:
+        title += f", p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms"
+    if summary.get("error_rate"):
+        title += f", {summary['error_rate']:.0%} failed"
+    if status != "Connected" and summary.get("last_error"):
+        title += f". Last error: {summary['last_error']}"
+    return (
+        f'<span title="{html.escape(title)}" style="background-color: {STATUS_COLORS.get(status, "#6c757d")}; color: white; padding: 4px 8px; border-radius: 4px; font-size: 0.8em; font-weight: bold;">'
+        f'{name}: {status}{latency_sparkline(summary.get("spark", []))}</span>'
+    )
 
-supabase_status = "Connected"
-supabase_color = "#28a745" # Green
-if not supabase:
-    supabase_status = "Disconnected"
-    supabase_color = "#dc3545" # Red
+try:
+    backend_health = data.get_health_monitor().status()
+except Exception as e:
+    print(f"Error reading backend health: {e}")
+    backend_health = {}
 
 # Top Layout: Title left, Status right
 top_col1, top_col2 = st.columns([3, 1])
@@ -233,20 +150,36 @@ with top_col1:
     auto_refresh = st.toggle("Auto Refresh", value=True)
 
 with top_col2:
+    badges = "".join(status_badge(name, backend_health.get(name, {"status": "Checking", "probes": 0})) for name in ("Redis", "Supabase"))
     st.markdown(
         f"""
         <div style="display: flex; justify-content: flex-end; gap: 10px; padding-top: 20px;">
-            <span style="background-color: {redis_color}; color: white; padding: 4px 8px; border-radius: 4px; font-size: 0.8em; font-weight: bold;">Redis: {redis_status}</span>
-            <span style="background-color: {supabase_color}; color: white; padding: 4px 8px; border-radius: 4px; font-size: 0.8em; font-weight: bold;">Supabase: {supabase_status}</span>
+            {badges}
         </div>
         """,
         unsafe_allow_html=True
     )
 
+# While the Supabase circuit is open, fetchers serve what they last loaded
+supabase_circuit = data.supabase_circuit.stats()
+if supabase_circuit["state"] != "closed":
+    since = datetime.fromtimestamp(supabase_circuit["opened_at"], istanbul_tz).strftime('%H:%M:%S') if supabase_circuit["opened_at"] else "?"
+    st.warning(f"Supabase is unavailable since {since}; showing the last data loaded. Next retry in {supabase_circuit['retry_in_sec'] or 0:.0f}s.")
+
+def stale_note(fetcher, *args):
+    # Caption under a view whose data was served past its TTL, while it reloads in the background
+    as_of = fetcher.stale_as_of(*args)
+    if as_of is not None:
+        st.caption(f"Data as of {datetime.fromtimestamp(as_of, istanbul_tz).strftime('%H:%M:%S')}, refreshing in the background")
+
 if auto_refresh:
-    refresh_interval = get_next_refresh_interval()
+    if 'refresh_jitter' not in st.session_state:
+        st.session_state.refresh_jitter = random.uniform(0, REFRESH_JITTER)
+    refresh_interval = get_next_refresh_interval(st.session_state.refresh_jitter)
     st_autorefresh(interval=refresh_interval, key="dynamic_refresh")
 
+run_timer.mark("first_paint")
+
 # Define styling function
 def color_trade_signal(val):
     color = ''
@@ -266,15 +199,139 @@ def format_time_signal(val):
     except ValueError:
         return val
 
+# Candlestick view of the Snapshots tab: OHLC bars with volume and VWAP, the MCP
+# line, and OPEN_* signals marked on the bar they fall in
+def candle_chart(df_bars, signal_df, bar_length, mcp):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # Trace 0: Volume, trace 1: Candles (the click handler relies on this order)
+    fig.add_trace(go.Bar(
+        x=df_bars['start'],
+        y=df_bars['volume'],
+        name='Volume',
+        marker_color='rgba(128, 128, 128, 0.5)',
+        opacity=0.6,
+        customdata=df_bars[['trades', 'snapshot']],
+        hovertemplate='<b>Volume</b>: %{y}<br>Trades: %{customdata[0]}<extra></extra>'
+    ), secondary_y=True)
+
+    fig.add_trace(go.Candlestick(
+        x=df_bars['start'],
+        open=df_bars['open'],
+        high=df_bars['high'],
+        low=df_bars['low'],
+        close=df_bars['close'],
+        name='OHLC',
+        increasing_line_color='#00CC96',
+        decreasing_line_color='#FF4B4B'
+    ), secondary_y=False)
+
+    fig.add_trace(go.Scatter(
+        x=df_bars['start'],
+        y=df_bars['vwap'],
+        mode='lines',
+        name='VWAP',
+        line=dict(color='#00BFFF', width=1.5),
+        hovertemplate='<b>VWAP</b>: %{y:.2f}<extra></extra>'
+    ), secondary_y=False)
+
+    if not df_bars.empty and not signal_df.empty:
+        sig_trades = signal_df[signal_df['tradeSignal'].isin(['OPEN_LONG', 'OPEN_SHORT'])].sort_values('snapshot_minute')
+        if not sig_trades.empty:
+            # Bar containing each signal minute
+            merged = pd.merge_asof(
+                sig_trades,
+                df_bars[['start', 'high', 'low']],
+                left_on='snapshot_minute',
+                right_on='start',
+                direction='backward',
+                tolerance=bar_length
+            ).dropna(subset=['start'])
+
+            longs = merged[merged['tradeSignal'] == 'OPEN_LONG']
+            shorts = merged[merged['tradeSignal'] == 'OPEN_SHORT']
+            if not longs.empty:
+                fig.add_trace(go.Scatter(
+                    x=longs['start'],
+                    y=longs['low'],
+                    mode='markers',
+                    name='OPEN_LONG',
+                    marker=dict(color='#FF4B4B', size=14, symbol='triangle-up', line=dict(width=2, color='white')),
+                    customdata=longs[['timeSignal']],
+                    hovertemplate='<b>OPEN_LONG</b><br>Signal: %{customdata[0]:.2f}<extra></extra>'
+                ), secondary_y=False)
+            if not shorts.empty:
+                fig.add_trace(go.Scatter(
+                    x=shorts['start'],
+                    y=shorts['high'],
+                    mode='markers',
+                    name='OPEN_SHORT',
+                    marker=dict(color='#00CC96', size=14, symbol='triangle-down', line=dict(width=2, color='white')),
+                    customdata=shorts[['timeSignal']],
+                    hovertemplate='<b>OPEN_SHORT</b><br>Signal: %{customdata[0]:.2f}<extra></extra>'
+                ), secondary_y=False)
+
+    if mcp:
+        fig.add_hline(y=mcp, line_dash="dash", line_color="white", annotation_text=f"MCP: {mcp:.2f}", annotation_position="right")
+
+    fig.update_layout(
+        template="plotly_dark",
+        xaxis=dict(title="Time", showgrid=False, rangeslider=dict(visible=False)),
+        yaxis=dict(title="Price", showgrid=True, gridcolor='rgba(255, 255, 255, 0.1)', zeroline=False),
+        yaxis2=dict(title="Volume", showgrid=False, zeroline=False, showticklabels=False, overlaying="y", side="right"),
+        height=700,
+        hovermode="x unified",
+        legend=dict(orientation="v", yanchor="top", y=1, xanchor="left", x=0.01, bgcolor="rgba(0,0,0,0.5)"),
+        margin=dict(l=20, r=20, t=60, b=20),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        hoverlabel=dict(bgcolor="#262730", font_color="white", font_size=14, bordercolor="rgba(255, 255, 255, 0.3)")
+    )
+    return fig
+
+# Alerts: published once per new OPEN_* transition by the background watcher.
+# Each session shows every alert once, checked every 15 seconds without a full rerun.
+@st.fragment(run_every=15)
+def render_alerts():
+    try:
+        data.get_signal_watcher()
+        feed = data.get_alert_feed()
+    except Exception as e:
+        print(f"Error starting signal alerts: {e}")
+        return
+
+    if 'seen_alerts' not in st.session_state:
+        # Only alerts from the last 10 minutes are shown to a new session
+        cutoff = pd.Timestamp.now(tz='UTC') - pd.Timedelta(minutes=10)
+        st.session_state.seen_alerts = {
+            a['id'] for a in feed.alerts() if frames.local_time(a['snapshot_minute']) < cutoff
+        }
+
+    new_alerts = [a for a in feed.alerts() if a['id'] not in st.session_state.seen_alerts]
+    if new_alerts:
+        for alert in new_alerts:
+            st.toast(f"⚠️ {alert['contract']}: {alert['tradeSignal']}!", icon="🚨")
+            st.session_state.seen_alerts.add(alert['id'])
+
+        # Play sound (beep)
+        html_string = """
+        <audio autoplay>
+        <source src="https://www.soundjay.com/buttons/sounds/beep-07.mp3" type="audio/mpeg">
+        </audio>
+        """
+        st.markdown(html_string, unsafe_allow_html=True)
+
+render_alerts()
+
 # Create Tabs
-# Create Tabs
-tab_dashboard, tab_timeline, tab_snapshots = st.tabs(["Dashboard", "Timeline", "Snapshots"])
+tab_dashboard, tab_timeline, tab_snapshots, tab_activity = st.tabs(["Dashboard", "Timeline", "Snapshots", "Activity"])
 
 with tab_dashboard:
     if active_contracts:
-        # Selection mechanism and buttons in one row
-        active_contracts.sort()
-    
+        # Selection mechanism and buttons in one row (contracts are in delivery order)
         # Create columns for layout: Selector (large), Refresh (wider)
         col_sel, col_refresh = st.columns([3, 1])
     
@@ -285,9 +342,13 @@ with tab_dashboard:
             st.write("") # Spacer
             st.write("")
             if st.button("Refresh Data", use_container_width=True):
-                fetch_latest_signals.clear()
-                fetch_contract_history.clear()
-                st.rerun()
+                if data.supabase_circuit.is_open():
+                    # Clearing would drop the only data there is to show
+                    st.toast("Supabase is unavailable; keeping the cached data.")
+                else:
+                    data.fetch_latest_signals.clear()
+                    data.fetch_contract_history.clear()
+                    st.rerun()
 
 
 
@@ -297,26 +358,13 @@ with tab_dashboard:
         with col1:
             # Fetch ONLY latest signals for the left column
             with st.spinner('Fetching summary...'):
-                latest_signals = fetch_latest_signals(active_contracts)
+                latest_signals = data.fetch_latest_signals(active_contracts)
+            stale_note(data.fetch_latest_signals, active_contracts)
 
             if not latest_signals.empty:
                 # Sort by contract ASCENDING (Old to New)
                 latest_signals = latest_signals.sort_values(by='contract', ascending=True)
 
-                # Check for alerts
-                alert_signals = latest_signals[latest_signals['tradeSignal'].isin(['OPEN_SHORT', 'OPEN_LONG'])]
-                if not alert_signals.empty:
-                    for index, row in alert_signals.iterrows():
-                        st.toast(f"⚠️ {row['contract']}: {row['tradeSignal']}!", icon="🚨")
-                
-                    # Play sound (beep)
-                    html_string = """
-                    <audio autoplay>
-                    <source src="https://www.soundjay.com/buttons/sounds/beep-07.mp3" type="audio/mpeg">
-                    </audio>
-                    """
-                    st.markdown(html_string, unsafe_allow_html=True)
-
                 # Get the latest snapshot minute
                 latest_snapshot_str = "Unknown"
                 if 'snapshot_minute' in latest_signals.columns:
@@ -326,23 +374,19 @@ with tab_dashboard:
                 st.markdown(f"<h3 style='text-align: center;'>Latest ({latest_snapshot_str})</h3>", unsafe_allow_html=True)
             
                 # View Mode Toggle
-                view_mode = st.radio("View Mode", ["List", "Heatmap"], horizontal=True, label_visibility="collapsed")
+                view_mode = st.radio("View Mode", ["List", "Heatmap", "Matrix"], horizontal=True, label_visibility="collapsed")
             
                 if view_mode == "Heatmap":
                     import plotly.express as px
                 
-                    # Create a dummy column for equal sizing
-                    latest_signals['size'] = 1
-                
-                    # Create Treemap
+                    # Create Treemap (no values column: one row per contract gives equal sizes)
                     fig_map = px.treemap(
-                        latest_signals,
+                        latest_signals.astype({'contract': object}),  # plotly groups on path columns; avoid categorical groupby
                         path=['contract'],
-                        values='size',
                         color='timeSignal',
                         color_continuous_scale=[(0, "green"), (0.5, "gray"), (1, "red")],
                         range_color=[-1, 1],
-                        hover_data={'contract': True, 'timeSignal': ':.2f', 'tradeSignal': True, 'size': False},
+                        hover_data={'contract': True, 'timeSignal': ':.2f', 'tradeSignal': True},
                         title=""
                     )
                 
@@ -357,7 +401,68 @@ with tab_dashboard:
                     fig_map.data[0].texttemplate = "%{label}<br>%{customdata[1]:.2f}"
                 
                     st.plotly_chart(fig_map, use_container_width=True)
-                
+
+                elif view_mode == "Matrix":
+                    import plotly.graph_objects as go
+
+                    date_keys = contract_index.date_keys()
+                    matrix_store = data.get_signal_matrix_store()
+
+                    if date_keys:
+                        matrix_date = st.selectbox(
+                            "Delivery Date",
+                            date_keys,
+                            format_func=contracts.date_label,
+                            key="matrix_date"
+                        )
+
+                        with st.spinner('Fetching signal matrix...'):
+                            try:
+                                matrix_df = matrix_store.frame(supabase, matrix_date)
+                            except Exception as e:
+                                print(f"Error fetching signal matrix for {matrix_date}: {e}")
+                                matrix_df = pd.DataFrame()
+
+                        if not matrix_df.empty:
+                            # Contract x Time Heatmap
+                            fig_matrix = go.Figure(go.Heatmap(
+                                z=matrix_df.to_numpy(),
+                                x=matrix_df.columns,
+                                y=matrix_df.index,
+                                colorscale=[(0, "green"), (0.5, "gray"), (1, "red")],
+                                zmin=-1,
+                                zmax=1,
+                                hoverongaps=False,
+                                hovertemplate='%{y}<br>%{x|%d.%m %H:%M}<br>Signal: %{z:.2f}<extra></extra>'
+                            ))
+
+                            fig_matrix.update_layout(
+                                margin=dict(t=0, l=0, r=0, b=0),
+                                height=600,
+                                template="plotly_dark"
+                            )
+
+                            st.plotly_chart(fig_matrix, use_container_width=True)
+
+                            # Cross-contract slice at a single minute
+                            slice_minute = st.select_slider(
+                                "Minute",
+                                options=list(matrix_df.columns),
+                                value=matrix_df.columns[-1],
+                                format_func=lambda t: t.strftime('%d.%m %H:%M'),
+                                key="matrix_minute"
+                            )
+                            slice_df = matrix_store.at(supabase, [matrix_date], slice_minute).reset_index()
+                            st.dataframe(
+                                slice_df.style.format({'timeSignal': format_time_signal}),
+                                use_container_width=True,
+                                height=400
+                            )
+                        else:
+                            st.info(f"No signals found for {matrix_date}.")
+                    else:
+                        st.info("No delivery dates found for active contracts.")
+
                 else:
                     # Select specific columns
                     cols_to_show_left = ['contract', 'timeSignal', 'tradeSignal']
@@ -401,7 +506,8 @@ with tab_dashboard:
             if selected_contract:
                 # Fetch history for the SELECTED contract on demand
                 with st.spinner(f'Fetching details for {selected_contract}...'):
-                    contract_data = fetch_contract_history(selected_contract)
+                    contract_data = data.fetch_contract_history(selected_contract)
+                stale_note(data.fetch_contract_history, selected_contract)
             
                 if not contract_data.empty:
                     # --- KPIs ---
@@ -428,9 +534,7 @@ with tab_dashboard:
                     if 'timeSignal' in contract_data.columns:
                         import plotly.graph_objects as go
                     
-                        # Ensure timeSignal is numeric for charting
-                        chart_data = contract_data[['snapshot_minute', 'timeSignal']].copy()
-                        chart_data['timeSignal'] = pd.to_numeric(chart_data['timeSignal'], errors='coerce')
+                        chart_data = contract_data[['snapshot_minute', 'timeSignal']]
                     
                         # Create Plotly Figure
                         fig = go.Figure()
@@ -496,8 +600,47 @@ with tab_dashboard:
 with tab_timeline:
     st.subheader("Signal Timeline (OPEN_LONG / OPEN_SHORT)")
     
+    # Window and contract filters (pushed down to the query)
+    today = datetime.now(istanbul_tz).date()
+    col_window, col_delivery, col_filter = st.columns([1, 1, 2])
+
+    with col_window:
+        window = st.date_input("Window", value=(today, today), key="timeline_window")
+
+    with col_delivery:
+        timeline_dates = contract_index.date_keys()
+        timeline_date = st.selectbox(
+            "Delivery Date",
+            [None] + timeline_dates,
+            format_func=lambda d: "All" if d is None else contracts.date_label(d),
+            key="timeline_delivery"
+        )
+
+    with col_filter:
+        contract_options = active_contracts if timeline_date is None else contract_index.for_date(timeline_date)
+        timeline_contracts = st.multiselect("Contracts", contract_options, key="timeline_contracts")
+
+    if isinstance(window, (tuple, list)):
+        window_start = window[0]
+        window_end = window[1] if len(window) > 1 else window[0]
+    else:
+        window_start = window_end = window
+
+    window_start = istanbul_tz.localize(datetime.combine(window_start, datetime.min.time()))
+    window_end = istanbul_tz.localize(datetime.combine(window_end, datetime.min.time())) + pd.Timedelta(days=1)
+
     with st.spinner("Fetching timeline data..."):
-        timeline_df = fetch_recent_trade_signals(limit=2000)
+        try:
+            timeline_df = data.get_timeline_store().get(
+                supabase,
+                pd.Timestamp(window_start),
+                pd.Timestamp(window_end),
+                date_key=timeline_date,
+                contracts=timeline_contracts
+            )
+        except Exception as e:
+            print(f"Error fetching timeline signals: {e}")
+            timeline_df = pd.DataFrame()
         
     if not timeline_df.empty:
         import plotly.express as px
@@ -507,22 +650,8 @@ with tab_timeline:
             "OPEN_LONG": "#dc3545",  # Red
             "OPEN_SHORT": "#28a745"  # Green
         }
-        
-        # Ensure timeSignal is numeric
-        timeline_df['timeSignal'] = pd.to_numeric(timeline_df['timeSignal'], errors='coerce')
-
-        # Calculate Excess Strength
-        def calculate_excess(val):
-            if pd.isna(val):
-                return 0
-            if val > 0:
-                return val - 0.3
-            elif val < 0:
-                return val + 0.3
-            return 0
-
-        timeline_df['excess_strength'] = timeline_df['timeSignal'].apply(calculate_excess)
 
+        # excess_strength is computed once by the timeline store
         fig_timeline = px.scatter(
             timeline_df,
             x="snapshot_minute",
@@ -561,7 +690,7 @@ with tab_timeline:
             height=400
         )
     else:
-        st.info("No recent trade signals found.")
+        st.info("No trade signals found in the selected window.")
 
 
 
@@ -570,7 +699,8 @@ with tab_snapshots:
     def render_snapshots_tab():
         # st.subheader("Market Snapshots") removed
         
-        market_structure = fetch_market_structure()
+        market_structure = data.fetch_market_structure()
+        stale_note(data.fetch_market_structure)
         
         selected_snap_contract = None
         selected_snap_minute = None
@@ -592,33 +722,13 @@ with tab_snapshots:
             
             if selected_snap_contract:
                 # Fetch available minutes for this contract
-                @st.cache_data(ttl=60, show_spinner=False)
-                def fetch_snapshot_minutes(contract):
-                    try:
-                        response = supabase.table("snapshots").select("snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=True).execute()
-                        if response.data:
-                            minutes = [row['snapshot_minute'] for row in response.data]
-                            return minutes
-                    except Exception as e:
-                        print(f"Error fetching snapshot minutes: {e}")
-                    return []
-
-                available_minutes = fetch_snapshot_minutes(selected_snap_contract)
+                available_minutes = data.fetch_snapshot_minutes(selected_snap_contract)
 
                 # Create mapping from HH:MM to full timestamp
                 minute_map = {}
-                for m in available_minutes:
-                    try:
-                        dt = pd.to_datetime(m)
-                        try:
-                            dt = dt.tz_convert('Europe/Istanbul')
-                        except TypeError:
-                            dt = dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-                        
-                        fmt = dt.strftime('%d %H:%M')
-                        minute_map[fmt] = m
-                    except:
-                        continue
+                if available_minutes:
+                    local_minutes = frames.local_time(pd.Series(available_minutes))
+                    minute_map = dict(zip(local_minutes.dt.strftime('%d %H:%M'), available_minutes))
 
                 # Initialize or Update Session State for Minute
                 # If contract changed, reset minute to latest
@@ -635,33 +745,42 @@ with tab_snapshots:
         if selected_snap_contract and selected_snap_minute:
             
 
+            prefetcher = data.get_snapshot_prefetcher()
+
             with st.spinner("Fetching snapshot data..."):
                 # Fetch Data
                 try:
-                    # Fetch Specific Snapshot Data (Board, Depth, Remaining Time)
-                    response = supabase.table("snapshots").select("board, depth, remaining_time_sec").eq("contract", selected_snap_contract).eq("snapshot_minute", selected_snap_minute).single().execute()
+                    # Specific Snapshot Data (Board, Depth, Remaining Time); usually already prefetched
+                    snapshot_data = prefetcher.get(supabase, selected_snap_contract, selected_snap_minute)
                     
-                    # Fetch Latest Snapshot Data (Trades) - Get up to 10 snapshots to find one with trades
-                    latest_response = supabase.table("snapshots").select("trades").eq("contract", selected_snap_contract).order("snapshot_minute", desc=True).limit(10).execute()
+                    # Trades from the latest snapshot (out of the last 10) that has non-empty trades
+                    trades = prefetcher.latest_trades(supabase, selected_snap_contract)
                     
-                    if response.data:
-                        data = response.data
-                        board = data.get('board', {})
-                        depth = data.get('depth', {})
-                        remaining_time_sec = data.get('remaining_time_sec', 0)
-                        
-                        # Use trades from the latest snapshot that has non-empty trades
-                        trades = []
-                        if latest_response.data and len(latest_response.data) > 0:
-                            # Loop through snapshots to find the first one with trades
-                            for snapshot in latest_response.data:
-                                trades_data = snapshot.get('trades')
-                                if trades_data is not None and isinstance(trades_data, list) and len(trades_data) > 0:
-                                    trades = trades_data
-                                    break
+                    # Warm the neighbouring minutes for step-through
+                    minute_pos = available_minutes.index(selected_snap_minute) if selected_snap_minute in available_minutes else None
+                    if minute_pos is not None:
+                        prefetcher.prefetch(supabase, selected_snap_contract, available_minutes[max(minute_pos - 5, 0):minute_pos + 6])
+                    
+                    if snapshot_data:
+                        board = snapshot_data.get('board', {})
+                        depth = snapshot_data.get('depth', {})
+                        remaining_time_sec = snapshot_data.get('remaining_time_sec', 0)
                         
                         # --- Statistics Section ---
-                        st.markdown(f"<h3 style='text-align: center;'>{selected_snap_contract}</h3>", unsafe_allow_html=True)
+                        # available_minutes is newest first
+                        prev_minute = available_minutes[minute_pos + 1] if minute_pos is not None and minute_pos + 1 < len(available_minutes) else None
+                        next_minute = available_minutes[minute_pos - 1] if minute_pos else None
+
+                        def step_to(minute):
+                            st.session_state.snap_query_minute = minute
+
+                        col_prev, col_title, col_next = st.columns([1, 4, 1])
+                        with col_prev:
+                            st.button("◀ Prev", key="snap_prev", disabled=prev_minute is None, on_click=step_to, args=(prev_minute,), use_container_width=True)
+                        with col_next:
+                            st.button("Next ▶", key="snap_next", disabled=next_minute is None, on_click=step_to, args=(next_minute,), use_container_width=True)
+                        with col_title:
+                            st.markdown(f"<h3 style='text-align: center;'>{selected_snap_contract}</h3>", unsafe_allow_html=True)
                         st.markdown("---")
                         
                         # 1. Calculate Metrics
@@ -669,12 +788,7 @@ with tab_snapshots:
                         # Snapshot Time
                         snapshot_time_str = "N/A"
                         try:
-                            st_dt = pd.to_datetime(selected_snap_minute)
-                            try:
-                                st_dt = st_dt.tz_convert('Europe/Istanbul')
-                            except TypeError:
-                                st_dt = st_dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-                            snapshot_time_str = st_dt.strftime('%d %H:%M')
+                            snapshot_time_str = frames.local_time(selected_snap_minute).strftime('%d %H:%M')
                         except:
                             pass
                             
@@ -727,25 +841,11 @@ with tab_snapshots:
                         # Price Change (Weighted Avg of last 50MWh - PTF)
                         price_change_str = "N/A"
                         if trades and ptf:
-                            df_trades_calc = pd.DataFrame(trades)
-                            df_trades_calc = df_trades_calc.rename(columns={'p': 'price', 'q': 'volume', 't': 'timestamp'})
-                            df_trades_calc['price'] = pd.to_numeric(df_trades_calc['price'], errors='coerce')
-                            df_trades_calc['volume'] = pd.to_numeric(df_trades_calc['volume'], errors='coerce')
-                            df_trades_calc['timestamp'] = pd.to_numeric(df_trades_calc['timestamp'], errors='coerce')
+                            df_trades_calc = frames.trades_frame(trades)
                             
                             # Filter trades to include only those before or at the snapshot time
                             try:
-                                snap_dt = pd.to_datetime(selected_snap_minute)
-                                if snap_dt.tzinfo is None:
-                                    snap_dt = snap_dt.tz_localize('UTC')
-                                else:
-                                    snap_dt = snap_dt.tz_convert('UTC')
-                                
-                                # Create temp datetime column for filtering (UTC)
-                                df_trades_calc['dt_utc'] = pd.to_datetime(df_trades_calc['timestamp'], unit='s', utc=True)
-                                
-                                # Filter
-                                df_trades_calc = df_trades_calc[df_trades_calc['dt_utc'] <= snap_dt]
+                                df_trades_calc = df_trades_calc[df_trades_calc['timestamp'] <= frames.local_time(selected_snap_minute)]
                             except Exception as e:
                                 print(f"Error filtering trades for price change: {e}")
                             
@@ -787,224 +887,215 @@ with tab_snapshots:
                         st.markdown("---")
                         
                         # --- Layout ---
-                        col_left, col_right = st.columns([2, 1])
+                        col_left, col_right, col_profile = st.columns([2, 1, 0.6])
                         
                         # --- Left Column: Trades ---
                         with col_left:
                             st.markdown(f"### Trades ({selected_snap_contract})")
                             
                             if trades:
-                                df_trades = pd.DataFrame(trades)
-                                # Rename columns: p->price, q->volume, t->timestamp
-                                df_trades = df_trades.rename(columns={'p': 'price', 'q': 'volume', 't': 'timestamp'})
-                                
-                                # Process timestamp
-                                df_trades['timestamp'] = pd.to_numeric(df_trades['timestamp'], errors='coerce')
-                                df_trades['price'] = pd.to_numeric(df_trades['price'], errors='coerce')
-                                df_trades['volume'] = pd.to_numeric(df_trades['volume'], errors='coerce')
-                                
-                                df_trades['timestamp'] = pd.to_datetime(df_trades['timestamp'], unit='s')
-                                try:
-                                    df_trades['timestamp'] = df_trades['timestamp'].dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-                                except TypeError:
-                                    df_trades['timestamp'] = df_trades['timestamp'].dt.tz_convert('Europe/Istanbul')
-                                
-                                # Sort Ascending (Oldest to Newest) for Graph
-                                df_trades = df_trades.sort_values('timestamp', ascending=True)
-                                df_trades['formatted_time'] = df_trades['timestamp'].dt.strftime('%d:%m %H:%M')
-                                
                                 # Fetch Signals for Overlay
-                                @st.cache_data(ttl=60, show_spinner=False)
-                                def fetch_snap_signals(contract):
-                                    try:
-                                        response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=False).execute()
-                                        if response.data:
-                                            df = pd.DataFrame(response.data)
-                                            if 'snapshot_minute' in df.columns:
-                                                df['snapshot_minute'] = pd.to_datetime(df['snapshot_minute'])
-                                                try:
-                                                    df['snapshot_minute'] = df['snapshot_minute'].dt.tz_convert('Europe/Istanbul')
-                                                except TypeError:
-                                                    df['snapshot_minute'] = df['snapshot_minute'].dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
-                                            return df
-                                    except Exception as e:
-                                        print(f"Error fetching signal history for {contract}: {e}")
-                                    return pd.DataFrame()
+                                signal_df = data.fetch_snap_signals(selected_snap_contract)
+
+                                chart_col, interval_col = st.columns([1, 3])
+                                with chart_col:
+                                    chart_mode = st.radio("Chart", ["Candles", "Trades"], horizontal=True, key="snap_chart", label_visibility="collapsed")
+                                with interval_col:
+                                    bar_interval = st.radio("Bar Interval", list(bars.INTERVALS), index=1, horizontal=True, key="snap_bar_interval", label_visibility="collapsed", disabled=chart_mode != "Candles")
 
-                                signal_df = fetch_snap_signals(selected_snap_contract)
+                                if chart_mode == "Candles":
+                                    # OHLCV bars over the contract's trade history, extended with new trades only; everything below works per bar
+                                    bar_store = data.get_bar_store()
+                                    bar_store.update(supabase, selected_snap_contract)
+                                    bar_length = pd.Timedelta(bars.INTERVALS[bar_interval])
+                                    df_chart = bar_store.bars(selected_snap_contract, bar_interval)
+                                    df_chart['end'] = df_chart['start'] + bar_length
+                                    df_chart['formatted_time'] = df_chart['start'].dt.strftime('%d:%m %H:%M')
+                                    time_column = 'end'
+                                else:
+                                    # p->price, q->volume, t->timestamp (Istanbul time)
+                                    # Sort Ascending (Oldest to Newest) for Graph
+                                    df_chart = frames.trades_frame(trades).sort_values('timestamp', ascending=True)
+                                    df_chart['formatted_time'] = df_chart['timestamp'].dt.strftime('%d:%m %H:%M')
+                                    time_column = 'timestamp'
 
-                                # Add 'snapshot' column (Next Snapshot Minute) BEFORE Charting
-                                if available_minutes:
+                                # Add 'snapshot' column (next snapshot minute after the trade / bar end) BEFORE Charting
+                                if available_minutes and not df_chart.empty:
                                     try:
-                                        df_snaps = pd.DataFrame({'snap_min': available_minutes})
-                                        df_snaps['snap_min'] = pd.to_datetime(df_snaps['snap_min'])
-                                        try:
-                                            df_snaps['snap_min'] = df_snaps['snap_min'].dt.tz_convert('Europe/Istanbul')
-                                        except TypeError:
-                                            df_snaps['snap_min'] = df_snaps['snap_min'].dt.tz_localize('UTC').dt.tz_convert('Europe/Istanbul')
+                                        df_snaps = pd.DataFrame({'snap_min': frames.local_time(pd.Series(available_minutes))})
                                         
                                         df_snaps = df_snaps.sort_values('snap_min')
                                         
                                         # Merge to find next snapshot (direction='forward')
-                                        df_trades = pd.merge_asof(
-                                            df_trades,
+                                        df_chart = pd.merge_asof(
+                                            df_chart,
                                             df_snaps,
-                                            left_on='timestamp',
+                                            left_on=time_column,
                                             right_on='snap_min',
                                             direction='forward'
                                         )
                                         
-                                        if 'snap_min' in df_trades.columns:
-                                            df_trades['snapshot'] = df_trades['snap_min'].dt.strftime('%d %H:%M')
+                                        if 'snap_min' in df_chart.columns:
+                                            df_chart['snapshot'] = df_chart['snap_min'].dt.strftime('%d %H:%M')
+                                            # Click targets: warm the minutes with the most recent trades
+                                            active_minutes = [minute_map[s] for s in df_chart['snapshot'].dropna()[::-1].unique()[:20] if s in minute_map]
+                                            prefetcher.prefetch(supabase, selected_snap_contract, active_minutes)
                                         else:
-                                            df_trades['snapshot'] = "-"
+                                            df_chart['snapshot'] = "-"
                                     except Exception as e:
                                         print(f"Error adding snapshot column: {e}")
-                                        df_trades['snapshot'] = "-"
+                                        df_chart['snapshot'] = "-"
                                 else:
-                                    df_trades['snapshot'] = "-"
+                                    df_chart['snapshot'] = "-"
 
                                 # Plotly Combo Chart
                                 import plotly.graph_objects as go
                                 from plotly.subplots import make_subplots
+
+                                if chart_mode == "Candles":
+                                    fig_trades = candle_chart(df_chart, signal_df, bar_length, ptf)
+                                else:
+                                    df_trades = df_chart
+
+                                    fig_trades = make_subplots(specs=[[{"secondary_y": True}]])
                                 
-                                fig_trades = make_subplots(specs=[[{"secondary_y": True}]])
-                                
-                                # Volume Bar
-                                fig_trades.add_trace(go.Bar(
-                                    x=df_trades['formatted_time'],
-                                    y=df_trades['volume'],
-                                    name='Volume',
-                                    marker_color='rgba(128, 128, 128, 0.5)',
-                                    opacity=0.6
-                                ), secondary_y=True)
+                                    # Volume Bar
+                                    fig_trades.add_trace(go.Bar(
+                                        x=df_trades['formatted_time'],
+                                        y=df_trades['volume'],
+                                        name='Volume',
+                                        marker_color='rgba(128, 128, 128, 0.5)',
+                                        opacity=0.6
+                                    ), secondary_y=True)
                                 
-                                # Price Line
-                                fig_trades.add_trace(go.Scatter(
-                                    x=df_trades['formatted_time'],
-                                    y=df_trades['price'],
-                                    mode='lines',
-                                    name='Price',
-                                    line=dict(color='#00BFFF', width=2),
-                                    fill='tozeroy',
-                                    fillcolor='rgba(0, 191, 255, 0.1)',
-                                    customdata=df_trades['snapshot'],
-                                    hovertemplate='<b>Price</b><br>Time: %{x}<br>Price: %{y}<br>Snapshot: %{customdata}<extra></extra>'
-                                ), secondary_y=False)
-
-                                # Add Signal Overlay
-                                if not signal_df.empty:
-                                    # Filter for actual trades
-                                    sig_trades = signal_df[signal_df['tradeSignal'].isin(['OPEN_LONG', 'OPEN_SHORT'])]
+                                    # Price Line
+                                    fig_trades.add_trace(go.Scatter(
+                                        x=df_trades['formatted_time'],
+                                        y=df_trades['price'],
+                                        mode='lines',
+                                        name='Price',
+                                        line=dict(color='#00BFFF', width=2),
+                                        fill='tozeroy',
+                                        fillcolor='rgba(0, 191, 255, 0.1)',
+                                        customdata=df_trades['snapshot'],
+                                        hovertemplate='<b>Price</b><br>Time: %{x}<br>Price: %{y}<br>Snapshot: %{customdata}<extra></extra>'
+                                    ), secondary_y=False)
+
+                                    # Add Signal Overlay
+                                    if not signal_df.empty:
+                                        # Filter for actual trades
+                                        sig_trades = signal_df[signal_df['tradeSignal'].isin(['OPEN_LONG', 'OPEN_SHORT'])]
                                     
-                                    if not sig_trades.empty:
-                                        sig_trades = sig_trades.sort_values('snapshot_minute')
+                                        if not sig_trades.empty:
+                                            sig_trades = sig_trades.sort_values('snapshot_minute')
                                         
-                                        # Use merge_asof to find the nearest price for each trade
-                                        merged_trades = pd.merge_asof(
-                                            sig_trades, 
-                                            df_trades, 
-                                            left_on='snapshot_minute',
-                                            right_on='timestamp',
-                                            direction='nearest',
-                                            tolerance=pd.Timedelta('5min')
-                                        )
+                                            # Use merge_asof to find the nearest price for each trade
+                                            merged_trades = pd.merge_asof(
+                                                sig_trades, 
+                                                df_trades, 
+                                                left_on='snapshot_minute',
+                                                right_on='timestamp',
+                                                direction='nearest',
+                                                tolerance=pd.Timedelta('5min')
+                                            )
                                         
-                                        # Format timestamp for matched trades
-                                        merged_trades['formatted_time'] = merged_trades['timestamp'].dt.strftime('%d:%m %H:%M')
+                                            # Format timestamp for matched trades
+                                            merged_trades['formatted_time'] = merged_trades['timestamp'].dt.strftime('%d:%m %H:%M')
                                         
-                                        # Separate Long and Short
-                                        longs = merged_trades[merged_trades['tradeSignal'] == 'OPEN_LONG']
-                                        shorts = merged_trades[merged_trades['tradeSignal'] == 'OPEN_SHORT']
+                                            # Separate Long and Short
+                                            longs = merged_trades[merged_trades['tradeSignal'] == 'OPEN_LONG']
+                                            shorts = merged_trades[merged_trades['tradeSignal'] == 'OPEN_SHORT']
                                         
-                                        if not longs.empty:
-                                            fig_trades.add_trace(go.Scatter(
-                                                x=longs['formatted_time'],
-                                                y=longs['price'],
-                                                mode='markers',
-                                                name='OPEN_LONG',
-                                                marker=dict(
-                                                    color='#FF4B4B',
-                                                    size=18, 
-                                                    symbol='triangle-up',
-                                                    line=dict(width=2, color='white')
-                                                ),
-                                                hovertemplate='<b>OPEN_LONG</b><br>Time: %{x}<br>Price: %{y}<br>Signal: %{customdata[0]:.2f}<extra></extra>',
-                                                customdata=longs[['timeSignal', 'snapshot']]
-                                            ), secondary_y=False)
+                                            if not longs.empty:
+                                                fig_trades.add_trace(go.Scatter(
+                                                    x=longs['formatted_time'],
+                                                    y=longs['price'],
+                                                    mode='markers',
+                                                    name='OPEN_LONG',
+                                                    marker=dict(
+                                                        color='#FF4B4B',
+                                                        size=18, 
+                                                        symbol='triangle-up',
+                                                        line=dict(width=2, color='white')
+                                                    ),
+                                                    hovertemplate='<b>OPEN_LONG</b><br>Time: %{x}<br>Price: %{y}<br>Signal: %{customdata[0]:.2f}<extra></extra>',
+                                                    customdata=longs[['timeSignal', 'snapshot']]
+                                                ), secondary_y=False)
                                             
-                                        if not shorts.empty:
-                                            fig_trades.add_trace(go.Scatter(
-                                                x=shorts['formatted_time'],
-                                                y=shorts['price'],
-                                                mode='markers',
-                                                name='OPEN_SHORT',
-                                                marker=dict(
-                                                    color='#00CC96',
-                                                    size=18, 
-                                                    symbol='triangle-down',
-                                                    line=dict(width=2, color='white')
-                                                ),
-                                                hovertemplate='<b>OPEN_SHORT</b><br>Time: %{x}<br>Price: %{y}<br>Signal: %{customdata[0]:.2f}<extra></extra>',
-                                                customdata=shorts[['timeSignal', 'snapshot']]
-                                            ), secondary_y=False)
+                                            if not shorts.empty:
+                                                fig_trades.add_trace(go.Scatter(
+                                                    x=shorts['formatted_time'],
+                                                    y=shorts['price'],
+                                                    mode='markers',
+                                                    name='OPEN_SHORT',
+                                                    marker=dict(
+                                                        color='#00CC96',
+                                                        size=18, 
+                                                        symbol='triangle-down',
+                                                        line=dict(width=2, color='white')
+                                                    ),
+                                                    hovertemplate='<b>OPEN_SHORT</b><br>Time: %{x}<br>Price: %{y}<br>Signal: %{customdata[0]:.2f}<extra></extra>',
+                                                    customdata=shorts[['timeSignal', 'snapshot']]
+                                                ), secondary_y=False)
                                 
-                                # Calculate dynamic Y-axis range
-                                y_min = df_trades['price'].min()
-                                y_max = df_trades['price'].max()
-                                y_padding = (y_max - y_min) * 0.1 if y_max != y_min else y_max * 0.01
+                                    # Calculate dynamic Y-axis range
+                                    y_min = df_trades['price'].min()
+                                    y_max = df_trades['price'].max()
+                                    y_padding = (y_max - y_min) * 0.1 if y_max != y_min else y_max * 0.01
                                 
-                                # Add PTF horizontal line
-                                if ptf:
-                                    fig_trades.add_hline(y=ptf, line_dash="dash", line_color="white", annotation_text=f"MCP: {ptf:.2f}", annotation_position="right")
+                                    # Add PTF horizontal line
+                                    if ptf:
+                                        fig_trades.add_hline(y=ptf, line_dash="dash", line_color="white", annotation_text=f"MCP: {ptf:.2f}", annotation_position="right")
                                 
-                                fig_trades.update_layout(
-                                    # title removed
-                                    template="plotly_dark",
-                                    xaxis=dict(
-                                        title="Time",
-                                        showgrid=False,
-                                        rangeslider=dict(visible=False),
-                                        type="category",
-                                        tickangle=45,
-                                        nticks=20
-                                    ),
-                                    yaxis=dict(
-                                        title="Price",
-                                        showgrid=True,
-                                        gridcolor='rgba(255, 255, 255, 0.1)',
-                                        zeroline=False,
-                                        range=[y_min - y_padding, y_max + y_padding]
-                                    ),
-                                    yaxis2=dict(
-                                        title="Volume",
-                                        showgrid=False,
-                                        zeroline=False,
-                                        showticklabels=False,
-                                        overlaying="y",
-                                        side="right"
-                                    ),
-                                    height=700,
-                                    hovermode="x unified",
-                                    legend=dict(
-                                        orientation="v",
-                                        yanchor="top",
-                                        y=1,
-                                        xanchor="left",
-                                        x=0.01,
-                                        bgcolor="rgba(0,0,0,0.5)"
-                                    ),
-                                    margin=dict(l=20, r=20, t=60, b=20),
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    hoverlabel=dict(
-                                        bgcolor="#262730",
-                                        font_color="white",
-                                        font_size=14,
-                                        bordercolor="rgba(255, 255, 255, 0.3)"
+                                    fig_trades.update_layout(
+                                        # title removed
+                                        template="plotly_dark",
+                                        xaxis=dict(
+                                            title="Time",
+                                            showgrid=False,
+                                            rangeslider=dict(visible=False),
+                                            type="category",
+                                            tickangle=45,
+                                            nticks=20
+                                        ),
+                                        yaxis=dict(
+                                            title="Price",
+                                            showgrid=True,
+                                            gridcolor='rgba(255, 255, 255, 0.1)',
+                                            zeroline=False,
+                                            range=[y_min - y_padding, y_max + y_padding]
+                                        ),
+                                        yaxis2=dict(
+                                            title="Volume",
+                                            showgrid=False,
+                                            zeroline=False,
+                                            showticklabels=False,
+                                            overlaying="y",
+                                            side="right"
+                                        ),
+                                        height=700,
+                                        hovermode="x unified",
+                                        legend=dict(
+                                            orientation="v",
+                                            yanchor="top",
+                                            y=1,
+                                            xanchor="left",
+                                            x=0.01,
+                                            bgcolor="rgba(0,0,0,0.5)"
+                                        ),
+                                        margin=dict(l=20, r=20, t=60, b=20),
+                                        plot_bgcolor='rgba(0,0,0,0)',
+                                        paper_bgcolor='rgba(0,0,0,0)',
+                                        hoverlabel=dict(
+                                            bgcolor="#262730",
+                                            font_color="white",
+                                            font_size=14,
+                                            bordercolor="rgba(255, 255, 255, 0.3)"
+                                        )
                                     )
-                                )
-                                
+
+                                from streamlit_plotly_events import plotly_events
+
                                 selected_points = plotly_events(
                                     fig_trades,
                                     click_event=True,
@@ -1021,10 +1112,10 @@ with tab_snapshots:
                                         
                                         snapshot_val = None
                                         
-                                        # Trace 0 (Volume) and Trace 1 (Price) use df_trades
+                                        # Trace 0 (Volume) and Trace 1 (Price / Candles) use df_chart
                                         if curve_num in [0, 1]:
-                                            if point_idx < len(df_trades):
-                                                snapshot_val = df_trades.iloc[point_idx]['snapshot']
+                                            if point_idx < len(df_chart):
+                                                snapshot_val = df_chart.iloc[point_idx]['snapshot']
                                         
                                         if snapshot_val:
                                             # snapshot_val is dd HH:MM, we need full timestamp
@@ -1034,8 +1125,11 @@ with tab_snapshots:
                                                 st.session_state.snap_query_minute = full_snapshot
                                                 st.rerun()
                                 
-                                # Trades Table (Show Newest First)
-                                st.dataframe(df_trades.sort_values('timestamp', ascending=False)[['formatted_time', 'price', 'volume', 'snapshot']], use_container_width=True, height=300)
+                                # Bars / Trades Table (Show Newest First)
+                                if chart_mode == "Candles":
+                                    st.dataframe(df_chart.sort_values('start', ascending=False)[['formatted_time', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'trades', 'snapshot']], use_container_width=True, height=300)
+                                else:
+                                    st.dataframe(df_chart.sort_values('timestamp', ascending=False)[['formatted_time', 'price', 'volume', 'snapshot']], use_container_width=True, height=300)
                             else:
                                 st.info("No trades found for this snapshot.")
 
@@ -1166,9 +1260,158 @@ with tab_snapshots:
                             else:
                                 st.info("No depth data found.")
 
+                        # --- Sidebar Column: Volume Profile ---
+                        with col_profile:
+                            st.markdown("### Volume Profile")
+
+                            profile = None
+                            if trades:
+                                profile_store = data.get_volume_profile_store()
+                                profile_store.update(supabase, selected_snap_contract)
+                                profile = profile_store.profile(selected_snap_contract)
+
+                            if profile:
+                                import plotly.graph_objects as go
+
+                                df_profile, levels = profile
+                                fig_profile = go.Figure(go.Bar(
+                                    x=df_profile['volume'],
+                                    y=df_profile['price'],
+                                    orientation='h',
+                                    marker_color=df_profile['in_value_area'].map({True: 'rgba(0, 191, 255, 0.7)', False: 'rgba(128, 128, 128, 0.5)'}),
+                                    customdata=df_profile['trades'],
+                                    hovertemplate='Price: %{y}<br>Volume: %{x}<br>Trades: %{customdata}<extra></extra>'
+                                ))
+                                fig_profile.add_hline(y=levels['poc'], line_color="#FFD700", annotation_text="POC", annotation_position="right")
+                                fig_profile.add_hline(y=levels['vah'], line_dash="dot", line_color="#00BFFF", annotation_text="VAH", annotation_position="right")
+                                fig_profile.add_hline(y=levels['val'], line_dash="dot", line_color="#00BFFF", annotation_text="VAL", annotation_position="right")
+                                if mcp:
+                                    fig_profile.add_hline(y=mcp, line_dash="dash", line_color="white", annotation_text="MCP", annotation_position="left")
+                                fig_profile.update_layout(
+                                    template="plotly_dark",
+                                    height=700,
+                                    margin=dict(l=10, r=10, t=30, b=10),
+                                    xaxis_title="Volume",
+                                    yaxis_title="Price",
+                                    bargap=0.05,
+                                    showlegend=False
+                                )
+                                st.plotly_chart(fig_profile, use_container_width=True)
+
+                                st.metric("POC", f"{levels['poc']:.2f}", help="En çok hacim gören fiyat seviyesi")
+                                st.metric("Value Area", f"{levels['val']:.2f} - {levels['vah']:.2f}", help="POC etrafında hacmin %70'inin gerçekleştiği fiyat aralığı")
+                                if mcp:
+                                    st.metric("POC - MCP", f"{levels['poc'] - mcp:.2f}")
+                            else:
+                                st.info("No trades found for this snapshot.")
+
                     else:
                         st.warning("No data found for the selected snapshot.")
                 except Exception as e:
                     st.error(f"Error fetching snapshot: {e}")
 
     render_snapshots_tab()
+
+with tab_activity:
+    @st.fragment
+    def render_activity_tab():
+        # Served from incremental rollups; a refresh only reads signals newer than the last one
+        group_by = st.radio(
+            "Group by",
+            ["delivery_date", "delivery_hour", "contract"],
+            format_func={"delivery_date": "Delivery Day", "delivery_hour": "Delivery Hour", "contract": "Contract"}.get,
+            horizontal=True,
+            key="activity_group"
+        )
+
+        try:
+            activity_df = data.get_signal_rollups().summary(supabase, group_by)
+        except Exception as e:
+            print(f"Error fetching signal activity: {e}")
+            activity_df = pd.DataFrame()
+
+        if activity_df.empty:
+            if data.get_signal_rollups().seeding():
+                st.info("Signal activity is being built from the history in the background; check back in a few minutes.")
+            else:
+                st.info("No signal activity recorded yet.")
+            return
+
+        import plotly.graph_objects as go
+
+        x = activity_df[group_by].astype(str)
+        fig_activity = go.Figure()
+        fig_activity.add_trace(go.Bar(x=x, y=activity_df['open_long'], name='OPEN_LONG', marker_color='#dc3545'))
+        fig_activity.add_trace(go.Bar(x=x, y=activity_df['open_short'], name='OPEN_SHORT', marker_color='#28a745'))
+        fig_activity.update_layout(
+            barmode='group',
+            template="plotly_dark",
+            height=400,
+            xaxis_title={"delivery_date": "Delivery Day", "delivery_hour": "Delivery Hour", "contract": "Contract"}[group_by],
+            yaxis_title="Signals",
+            margin=dict(l=20, r=20, t=30, b=20)
+        )
+        st.plotly_chart(fig_activity, use_container_width=True)
+
+        display_cols = [group_by, 'rows', 'open_long', 'open_short', 'ts_mean', 'ts_max', 'ts_min', 'minutes_beyond', 'beyond_share']
+        st.dataframe(
+            activity_df[display_cols].style.format({
+                'ts_mean': '{:.3f}',
+                'ts_max': '{:.2f}',
+                'ts_min': '{:.2f}',
+                'beyond_share': '{:.1%}'
+            }, na_rep='-'),
+            use_container_width=True,
+            height=400
+        )
+
+    render_activity_tab()
+
+run_timer.mark("total")
+startup.record(run_timer)
+
+if run_profile is not None:
+    run_profile.stop()
+    profile_path = run_profile.save()
+    profile_report = run_profile.report()
+    with st.expander("Rerun profile", expanded=True):
+        st.write(f"{profile_report['seconds']:.2f}s, {profile_report['samples']} samples every {profile_report['interval_ms']:.0f} ms. Saved to {profile_path}.collapsed (speedscope / flamegraph.pl) and .json")
+        st.write({"time_by_category_pct": profile_report['categories']})
+        col_functions, col_attribution = st.columns(2)
+        with col_functions:
+            st.markdown("**Hot functions**")
+            st.dataframe(pd.DataFrame(profile_report['functions']), use_container_width=True, height=400)
+        with col_attribution:
+            st.markdown("**Our code -> where the time went**")
+            st.dataframe(pd.DataFrame(profile_report['attribution']), use_container_width=True, height=400)
+        st.markdown("**Hottest call paths**")
+        st.code("\n".join(f"{p['pct']:5.1f}%  {p['path']}" for p in profile_report['paths']), language=None)
+
+with st.expander("Startup timing"):
+    timing = startup.report()
+    st.write({
+        "this_run_ms": {k: round(v * 1000) for k, v in run_timer.marks.items()},
+        "cold_start_ms": {k: round(v * 1000) for k, v in timing["cold"].items()},
+        "rerun_ms": {k: {stat: round(v * 1000) for stat, v in stats.items()} for k, stats in timing["rerun"].items()},
+        "reruns_recorded": timing["reruns_recorded"],
+        "warmup": timing["warmup"],
+    })
+
+with st.expander("Backend health"):
+    st.write(backend_health)
+
+with st.expander("Redis pool"):
+    import functions
+    st.write(functions.get_pool_stats())
+    st.write(data.get_board_consumer().stats())
+
+with st.expander("Result cache"):
+    import result_cache
+    cache_stats = result_cache.cache.stats()
+    st.write(f"{cache_stats['resident_bytes'] / 1024 / 1024:.1f} MB of {cache_stats['budget_bytes'] / 1024 / 1024:.0f} MB in {cache_stats['entries']} entries")
+    st.dataframe(pd.DataFrame.from_dict(cache_stats['functions'], orient='index'), use_container_width=True)
+    st.write({"prewarm": data.get_prewarmer().stats(), "supabase_circuit": data.supabase_circuit.stats()})
+
+with st.expander("Database paths"):
+    import queries
+    st.write(queries.available())
@@ -0,0 +1,264 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+import paging
+
+PAGE_SIZE = paging.PAGE_SIZE
+FLUSH_MB = 32  # Estimated size of the rows a worker buffers before they are written out
+
+DEFAULT_COLUMNS = {
+    "signals": "contract, tradeSignal, timeSignal, snapshot_minute",
+    "snapshots": "*",
+}
+
+
+def get_client():
+    load_dotenv()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_API_KEY")
+    if not url or not key:
+        raise ValueError("Supabase URL and API Key must be set in the .env file.")
+    return create_client(url, key)
+
+
+def split_range(start, end, parts):
+    step = (end - start) / parts
+    bounds = [start + step * i for i in range(parts)] + [end]
+    return [(bounds[i].isoformat(), bounds[i + 1].isoformat()) for i in range(parts)]
+
+
+def _row_bytes(row):
+    # Rough in-memory size of a row: its JSON length. Snapshot rows carry
+    # board/depth/trades and run to kilobytes, signal rows to tens of bytes.
+    return len(json.dumps(row, default=str))
+
+
+def _flatten(row):
+    # JSON columns (board, depth, trades) are stored as JSON text
+    return {k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()}
+
+
+class Checkpoint:
+    # Progress of every slice, rewritten atomically after each flush
+
+    def __init__(self, path, state):
+        self.path = path
+        self.state = state
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load_or_create(cls, path, params, slices, restart=False):
+        if os.path.exists(path) and not restart:
+            with open(path) as f:
+                state = json.load(f)
+            if state["params"] != params:
+                raise ValueError(f"{path} belongs to a different export; use --restart to start over")
+            return cls(path, state)
+
+        state = {
+            "params": params,
+            "slices": [
+                {"start": s, "end": e, "cursor": None, "rows": 0, "parts": 0, "bytes": 0, "fields": None, "done": False}
+                for s, e in slices
+            ],
+        }
+        checkpoint = cls(path, state)
+        checkpoint.save()
+        return checkpoint
+
+    def slice(self, index):
+        # Copy of one slice's progress
+        with self._lock:
+            return dict(self.state["slices"][index])
+
+    def update(self, index, **changes):
+        # Applies all changes of one flush (rows, cursor and the sink's position)
+        # together and saves, so the file never pairs a new part with an old cursor
+        with self._lock:
+            self.state["slices"][index].update(changes)
+            self._write()
+
+    def save(self):
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class CsvSink:
+    # One CSV per slice. On resume the file is truncated to the last checkpointed
+    # size, dropping rows written after the last checkpoint. write() returns the
+    # new position for the checkpoint instead of changing it.
+
+    def __init__(self, path, progress):
+        self.path = path
+        self.fields = progress["fields"]
+        mode = "r+" if os.path.exists(path) else "w"
+        self.file = open(path, mode, newline="")
+        self.file.truncate(progress["bytes"])
+        self.file.seek(progress["bytes"])
+        self.writer = None
+
+    def write(self, rows):
+        if self.writer is None:
+            self.fields = self.fields or list(rows[0].keys())
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fields, extrasaction="ignore")
+            if self.file.tell() == 0:
+                self.writer.writeheader()
+        self.writer.writerows(_flatten(row) for row in rows)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"bytes": self.file.tell(), "fields": self.fields}
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    # One Parquet part file per flush; parts beyond the checkpoint are removed on resume
+
+    def __init__(self, path, progress):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow (pip install pyarrow), or use --format csv")
+        self.base = path
+        self.parts = progress["parts"]
+        directory = os.path.dirname(path) or "."
+        prefix = os.path.basename(path) + "-"
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(".parquet"):
+                number = int(name[len(prefix):-len(".parquet")])
+                if number >= self.parts:
+                    os.remove(os.path.join(directory, name))
+
+    def write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part_path = f"{self.base}-{self.parts:05d}.parquet"
+        pq.write_table(pa.Table.from_pylist([_flatten(row) for row in rows]), part_path, compression="zstd")
+        self.parts += 1
+        return {"parts": self.parts}
+
+    def close(self):
+        pass
+
+
+def export_slice(index, args, checkpoint, columns, counter):
+    progress = checkpoint.slice(index)
+    if progress["done"]:
+        return progress["rows"]
+
+    base = os.path.join(args.out, f"{args.table}-{index:03d}")
+    sink = CsvSink(base + ".csv", progress) if args.format == "csv" else ParquetSink(base, progress)
+    client = get_client()
+
+    rows_done = progress["rows"]
+    buffer = []
+    buffered_bytes = 0
+    flush_bytes = args.flush_mb * 1024 * 1024
+
+    def flush():
+        nonlocal rows_done, buffer, buffered_bytes
+        position = sink.write(buffer)
+        rows_done += len(buffer)
+        checkpoint.update(index, rows=rows_done, cursor=[buffer[-1]["snapshot_minute"], buffer[-1]["contract"]], **position)
+        counter(len(buffer))
+        buffer = []
+        buffered_bytes = 0
+
+    cursor = tuple(progress["cursor"]) if progress["cursor"] else None
+    try:
+        for rows in paging.keyset_pages(client, args.table, columns, progress["start"], progress["end"], cursor, args.page_size):
+            buffer.extend(rows)
+            buffered_bytes += sum(_row_bytes(row) for row in rows)
+            if buffered_bytes >= flush_bytes:
+                flush()
+        if buffer:
+            flush()
+        checkpoint.update(index, done=True)
+    finally:
+        sink.close()
+
+    return rows_done
+
+
+def parse_time(value):
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export signals/snapshots with keyset pagination, in parallel and resumable.")
+    parser.add_argument("--table", choices=sorted(DEFAULT_COLUMNS), required=True)
+    parser.add_argument("--start", required=True, help="Start of snapshot_minute range (ISO, UTC if no offset)")
+    parser.add_argument("--end", required=True, help="End of snapshot_minute range, exclusive")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel workers, each walks one time slice")
+    parser.add_argument("--columns", help="Columns to select (must include contract and snapshot_minute)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--flush-mb", type=int, default=FLUSH_MB, help="Buffered MB per worker before a flush")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    columns = args.columns or DEFAULT_COLUMNS[args.table]
+    start, end = parse_time(args.start), parse_time(args.end)
+
+    params = {
+        "table": args.table,
+        "columns": columns,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "workers": args.workers,
+        "format": args.format,
+    }
+    checkpoint = Checkpoint.load_or_create(
+        os.path.join(args.out, f"{args.table}.checkpoint.json"),
+        params,
+        split_range(start, end, args.workers),
+        restart=args.restart,
+    )
+
+    already = sum(s["rows"] for s in checkpoint.state["slices"])
+    if already:
+        print(f"Resuming: {already} rows already exported.")
+
+    started = time.perf_counter()
+    exported = [0]
+    lock = threading.Lock()
+
+    def counter(n):
+        with lock:
+            exported[0] += n
+            rate = exported[0] / max(time.perf_counter() - started, 1e-9)
+            print(f"{exported[0]} rows exported ({rate:.0f} rows/s)")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        totals = list(pool.map(
+            lambda i: export_slice(i, args, checkpoint, columns, counter),
+            range(len(checkpoint.state["slices"]))
+        ))
+
+    print(f"Done: {sum(totals)} rows in {args.out} ({time.perf_counter() - started:.1f}s this run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from supabase import create_client
+
+import contracts
+import frames
+import paging
+
+OPEN_SIGNALS = ["OPEN_LONG", "OPEN_SHORT"]
+HORIZONS = ["15min", "30min", "60min"]
+THRESHOLDS = [0.30, 0.40, 0.50]
+
+_client = None
+
+
+def get_client():
+    # One client per worker process
+    global _client
+    if _client is None:
+        load_dotenv()
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_API_KEY")
+        if not url or not key:
+            raise ValueError("Supabase URL and API Key must be set in the .env file.")
+        _client = create_client(url, key)
+    return _client
+
+
+def _rows(client, table, columns, where):
+    # Every row of a keyset-paged query
+    rows = []
+    for page in paging.keyset_pages(client, table, columns, where=where):
+        rows.extend(page)
+    return rows
+
+
+def load_signals(client, date_key):
+    # Only OPEN_* signals are evaluated, so only those are downloaded
+    def where(query):
+        return query.like("contract", f"PH{date_key}%").in_("tradeSignal", OPEN_SIGNALS)
+
+    rows = _rows(client, "signals", frames.SIGNAL_COLUMNS, where)
+    df = pd.DataFrame(rows, columns=["contract", "tradeSignal", "timeSignal", "snapshot_minute"])
+    df['snapshot_minute'] = pd.to_datetime(df['snapshot_minute'], utc=True)
+    df['timeSignal'] = pd.to_numeric(df['timeSignal'], errors='coerce')
+    return df
+
+
+def load_snapshots(client, date_key):
+    # MCP per snapshot and the trade tape, only the JSON fields we need
+    def where(query):
+        return query.like("contract", f"PH{date_key}%")
+
+    rows = _rows(client, "snapshots", "contract, snapshot_minute, mcp:board->mcp, trades", where)
+
+    snaps = pd.DataFrame(rows, columns=["contract", "snapshot_minute", "mcp", "trades"])
+    snaps['snapshot_minute'] = pd.to_datetime(snaps['snapshot_minute'], utc=True)
+    snaps['mcp'] = pd.to_numeric(snaps['mcp'], errors='coerce')
+
+    # Consecutive snapshots repeat most of the tape, so explode and de-duplicate
+    tape = snaps[['contract', 'trades']].explode('trades').dropna(subset=['trades'])
+    if tape.empty:
+        trades = pd.DataFrame(columns=["contract", "timestamp", "price", "volume"])
+    else:
+        trades = pd.DataFrame(tape['trades'].tolist(), index=tape.index)
+        trades['contract'] = tape['contract']
+        trades = trades.rename(columns={'p': 'price', 'q': 'volume', 't': 'timestamp'})
+        trades = trades.drop_duplicates(subset=['contract', 'timestamp', 'price', 'volume'])
+        trades['price'] = pd.to_numeric(trades['price'], errors='coerce')
+        trades['volume'] = pd.to_numeric(trades['volume'], errors='coerce')
+        trades['timestamp'] = pd.to_datetime(pd.to_numeric(trades['timestamp'], errors='coerce'), unit='s', utc=True)
+        trades = trades.dropna(subset=['timestamp', 'price'])[["contract", "timestamp", "price", "volume"]]
+
+    return snaps[['contract', 'snapshot_minute', 'mcp']], trades.sort_values('timestamp', ignore_index=True)
+
+
+def evaluate(signals, snaps, trades, horizons=HORIZONS):
+    # One row per signal: entry price, price after each horizon, P&L in signal direction
+    if signals.empty or trades.empty:
+        return pd.DataFrame()
+
+    df = signals.sort_values('snapshot_minute', ignore_index=True)
+    df['direction'] = np.where(df['tradeSignal'] == 'OPEN_LONG', 1, -1)
+    df['delivery_hour'] = pd.to_numeric(df['contract'].map(contracts.delivery_hour), errors='coerce')
+
+    tape = trades.rename(columns={'timestamp': 'trade_time'})[['contract', 'trade_time', 'price']]
+
+    # Entry: last trade at or before the signal
+    df = pd.merge_asof(df, tape.rename(columns={'price': 'entry_price'}),
+                       left_on='snapshot_minute', right_on='trade_time', by='contract', direction='backward') \
+        .drop(columns='trade_time')
+
+    # MCP on the board at the signal's snapshot
+    mcp = snaps.dropna(subset=['mcp']).sort_values('snapshot_minute')
+    df = pd.merge_asof(df, mcp, on='snapshot_minute', by='contract', direction='backward')
+
+    for horizon in horizons:
+        df['exit_time'] = df['snapshot_minute'] + pd.Timedelta(horizon)
+        df = df.sort_values('exit_time', ignore_index=True)
+        df = pd.merge_asof(df, tape.rename(columns={'price': f'price_{horizon}'}),
+                           left_on='exit_time', right_on='trade_time', by='contract', direction='backward') \
+            .drop(columns=['trade_time', 'exit_time'])
+        df[f'pnl_{horizon}'] = df['direction'] * (df[f'price_{horizon}'] - df['entry_price'])
+
+    # Close: last trade of the contract
+    close = tape.groupby('contract')['price'].last().rename('close_price')
+    df = df.join(close, on='contract')
+    df['pnl_close'] = df['direction'] * (df['close_price'] - df['entry_price'])
+    df['pnl_mcp'] = df['direction'] * (df['mcp'] - df['entry_price'])
+
+    return df.dropna(subset=['entry_price']).sort_values('snapshot_minute', ignore_index=True)
+
+
+def run_day(date_key, horizons=HORIZONS):
+    client = get_client()
+    signals = load_signals(client, date_key)
+    snaps, trades = load_snapshots(client, date_key)
+    result = evaluate(signals, snaps, trades, horizons)
+    if not result.empty:
+        result['delivery_date'] = date_key
+    return result
+
+
+def summarize(results, thresholds=THRESHOLDS):
+    # Hit rate and P&L distribution per threshold, delivery hour and horizon
+    if results.empty:
+        return pd.DataFrame()
+
+    pnl_cols = [c for c in results.columns if c.startswith('pnl_')]
+    long_form = results.melt(
+        id_vars=['delivery_hour', 'timeSignal'],
+        value_vars=pnl_cols,
+        var_name='horizon',
+        value_name='pnl'
+    ).dropna(subset=['pnl'])
+    long_form['horizon'] = long_form['horizon'].str[4:]
+    strength = long_form['timeSignal'].abs()
+
+    parts = []
+    for threshold in thresholds:
+        subset = long_form[strength >= threshold]
+        if subset.empty:
+            continue
+        grouped = subset.groupby(['horizon', 'delivery_hour'])['pnl']
+        summary = grouped.agg(
+            signals='size',
+            hit_rate=lambda s: (s > 0).mean(),
+            mean='mean',
+            p10=lambda s: s.quantile(0.10),
+            median='median',
+            p90=lambda s: s.quantile(0.90),
+            total='sum',
+        ).reset_index()
+        summary.insert(0, 'threshold', threshold)
+        parts.append(summary)
+
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def delivery_date_keys(start, end):
+    days = (end - start).days
+    return [(start + timedelta(days=i)).strftime('%y%m%d') for i in range(days + 1)]
+
+
+def backtest(start, end, workers=None, horizons=HORIZONS):
+    date_keys = delivery_date_keys(start, end)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = [df for df in pool.map(run_day, date_keys, [horizons] * len(date_keys)) if not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest OPEN_LONG/OPEN_SHORT signals against subsequent trades.")
+    parser.add_argument("--start", required=True, help="First delivery date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last delivery date (YYYY-MM-DD), defaults to --start")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--horizons", default=",".join(HORIZONS), help="Comma-separated horizons, e.g. 15min,1h")
+    parser.add_argument("--thresholds", default=",".join(str(t) for t in THRESHOLDS), help="Comma-separated |timeSignal| thresholds")
+    parser.add_argument("--signals-out", help="Write per-signal results to this CSV")
+    parser.add_argument("--out", help="Write the summary to this CSV")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else start
+    horizons = [h.strip() for h in args.horizons.split(",") if h.strip()]
+    thresholds = [float(t) for t in args.thresholds.split(",") if t.strip()]
+
+    started = time.perf_counter()
+    results = backtest(start, end, workers=args.workers, horizons=horizons)
+    summary = summarize(results, thresholds)
+    elapsed = time.perf_counter() - started
+
+    print(f"Evaluated {len(results)} signals over {(end - start).days + 1} delivery dates in {elapsed:.1f}s")
+    if summary.empty:
+        print("No signals with trades found.")
+        return
+
+    with pd.option_context('display.max_rows', 200, 'display.width', 160):
+        print(summary.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    if args.signals_out:
+        results.to_csv(args.signals_out, index=False)
+    if args.out:
+        summary.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
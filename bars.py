@@ -0,0 +1,223 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import frames
+import paging
+
+# Trade tape (p, q, t) -> OHLCV/VWAP bars. Trades are binned with integer
+# arithmetic on epoch nanoseconds and reduced with numpy reduceat, so there is
+# no Python-level loop per trade. Istanbul is a whole-hour offset from UTC, so
+# UTC-aligned bins are also aligned in local time.
+
+INTERVALS = {"1m": "1min", "5m": "5min", "15m": "15min", "1h": "1h"}
+BASE_INTERVAL = "1m"
+MAX_BARS = 10080  # One week of base bars per contract
+BAR_COLUMNS = ["start", "open", "high", "low", "close", "volume", "notional", "vwap", "trades"]
+SNAPSHOT_TRADE_COLUMNS = "contract, snapshot_minute, trades"
+REFRESH_INTERVAL = 30  # Seconds between reads of a contract's new snapshots
+
+
+def _empty():
+    df = pd.DataFrame({c: pd.Series(dtype="float64") for c in BAR_COLUMNS})
+    df['start'] = pd.DatetimeIndex([], tz=frames.TZ)
+    df['trades'] = df['trades'].astype("int64")
+    return df
+
+
+def _reduce(bins, open_, high, low, close, volume, notional, trades):
+    # Rows sorted by bin -> one row per distinct bin
+    n = len(bins)
+    first = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    last = np.r_[first[1:], n] - 1
+    volume = np.add.reduceat(volume, first)
+    notional = np.add.reduceat(notional, first)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.where(volume > 0, notional / volume, np.nan)
+    return pd.DataFrame({
+        "start": pd.to_datetime(bins[first], utc=True).tz_convert(frames.TZ),
+        "open": open_[first],
+        "high": np.maximum.reduceat(high, first),
+        "low": np.minimum.reduceat(low, first),
+        "close": close[last],
+        "volume": volume,
+        "notional": notional,
+        "vwap": vwap,
+        "trades": np.add.reduceat(trades, first),
+    })
+
+
+def _chronological(trades_df):
+    # Oldest first; a newest-first tape is reversed so same-second trades keep their order
+    df = trades_df.dropna(subset=['timestamp', 'price'])
+    if len(df) > 1 and df['timestamp'].iat[0] > df['timestamp'].iat[-1]:
+        df = df.iloc[::-1]
+    return df.sort_values('timestamp', kind='stable')
+
+
+def aggregate(trades_df, interval=BASE_INTERVAL):
+    # frames.trades_frame output -> bars of `interval` (a key of INTERVALS)
+    df = _chronological(trades_df)
+    if df.empty:
+        return _empty()
+    step = pd.Timedelta(INTERVALS[interval]).value
+    bins = df['timestamp'].array.asi8 // step * step
+    price = df['price'].to_numpy(dtype="float64")
+    volume = df['volume'].fillna(0).to_numpy(dtype="float64")
+    return _reduce(bins, price, price, price, price, volume, price * volume, np.ones(len(df), dtype="int64"))
+
+
+def rollup(bars_df, interval):
+    # Bars -> coarser bars; also merges rows that share a bin
+    if bars_df.empty:
+        return _empty()
+    step = pd.Timedelta(INTERVALS[interval]).value
+    bins = bars_df['start'].array.asi8 // step * step
+    return _reduce(
+        bins,
+        bars_df['open'].to_numpy(),
+        bars_df['high'].to_numpy(),
+        bars_df['low'].to_numpy(),
+        bars_df['close'].to_numpy(),
+        bars_df['volume'].to_numpy(),
+        bars_df['notional'].to_numpy(),
+        bars_df['trades'].to_numpy(),
+    )
+
+
+class TapeCursor:
+    # Tracks which trades of a rolling tape (each snapshot carries the latest
+    # trades, so consecutive tapes overlap) have already been consumed
+
+    def __init__(self):
+        self.last = None        # Timestamp of the newest trade consumed
+        self.edge = Counter()   # (price, volume) of the trades consumed at exactly `last`
+
+    def new_trades(self, trades):
+        # Trades not consumed before as a trades frame (oldest first), None if there are none
+        df = _chronological(frames.trades_frame(trades))
+        if self.last is not None:
+            # Trades at the newest consumed timestamp may be partly new; the
+            # ones already counted are matched by price and volume
+            keep = (df['timestamp'] > self.last).to_numpy()
+            remaining = Counter(self.edge)
+            for i in np.flatnonzero((df['timestamp'] == self.last).to_numpy()):
+                trade = (df['price'].iat[i], df['volume'].iat[i])
+                if remaining[trade] > 0:
+                    remaining[trade] -= 1
+                else:
+                    keep[i] = True
+            df = df[keep]
+        if df.empty:
+            return None
+
+        newest = df['timestamp'].iloc[-1]
+        if newest != self.last:
+            self.edge = Counter()
+        at_newest = df[df['timestamp'] == newest]
+        self.edge.update(zip(at_newest['price'], at_newest['volume']))
+        self.last = newest
+        return df
+
+
+class TradeFeed:
+    # A contract's trades read from its stored snapshots rather than from the
+    # tape a session happens to be looking at, so nothing is missed while no
+    # one views the contract. The first read walks every snapshot of the
+    # contract; later ones only the snapshots after the last one read.
+    # Used by one updater at a time (see claim).
+
+    def __init__(self, contract, refresh_interval=REFRESH_INTERVAL):
+        self.contract = contract
+        self.refresh_interval = refresh_interval
+        self.tape = TapeCursor()
+        self.cursor = None          # (snapshot_minute, contract) of the last snapshot read
+        self.refreshed_at = None
+        self.busy = False
+
+    def claim(self):
+        # True if the caller should read now; the store calls this under its lock
+        if self.busy or (self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.refresh_interval):
+            return False
+        self.busy = True
+        return True
+
+    def done(self):
+        self.refreshed_at = time.monotonic()
+        self.busy = False
+
+    def pages(self, client):
+        # Frames of unseen trades, one per page of snapshots, oldest first
+        def where(query):
+            return query.eq("contract", self.contract)
+
+        for rows in paging.keyset_pages(client, "snapshots", SNAPSHOT_TRADE_COLUMNS, cursor=self.cursor, where=where):
+            df = self.tape.new_trades(frames.snapshot_trades(rows))
+            if df is not None:
+                yield df
+            self.cursor = (rows[-1]['snapshot_minute'], rows[-1]['contract'])
+
+
+class _Series:
+    def __init__(self, contract):
+        self.bars = _empty()
+        self.feed = TradeFeed(contract)
+        self.rolled = {}        # interval -> bars, until the next update
+
+
+class BarStore:
+    # Base-interval bars per contract, built from the contract's whole
+    # snapshot trade history and extended with only the trades newer than the
+    # last one folded in; coarser intervals are rolled up from the base bars.
+    # Supabase is read outside the store lock. Shared across sessions,
+    # bounded to max_contracts.
+
+    def __init__(self, max_contracts=32):
+        self.max_contracts = max_contracts
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, client, contract):
+        # Folds in trades from snapshots not read yet; returns the number of new trades.
+        # Returns 0 at once while another session is updating the contract or
+        # it was read less than REFRESH_INTERVAL ago.
+        with self._lock:
+            series = self._series.get(contract)
+            if series is None:
+                series = self._series[contract] = _Series(contract)
+            self._series.move_to_end(contract)
+            while len(self._series) > self.max_contracts:
+                self._series.popitem(last=False)
+            if not series.feed.claim():
+                return 0
+
+        added = 0
+        try:
+            for df in series.feed.pages(client):
+                with self._lock:
+                    merged = pd.concat([series.bars, aggregate(df)], ignore_index=True) if len(series.bars) else aggregate(df)
+                    series.bars = rollup(merged, BASE_INTERVAL).tail(MAX_BARS).reset_index(drop=True)
+                    series.rolled = {}
+                added += len(df)
+        finally:
+            with self._lock:
+                series.feed.done()
+        return added
+
+    def bars(self, contract, interval=BASE_INTERVAL):
+        with self._lock:
+            series = self._series.get(contract)
+            if series is None:
+                return _empty()
+            if interval == BASE_INTERVAL:
+                return frames.view(series.bars)
+            if interval not in series.rolled:
+                series.rolled[interval] = rollup(series.bars, interval)
+            return frames.view(series.rolled[interval])
+
+    def stats(self):
+        with self._lock:
+            return {contract: len(series.bars) for contract, series in self._series.items()}
@@ -0,0 +1,120 @@
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+import contracts
+import queries
+
+OPEN_SIGNALS = ["OPEN_LONG", "OPEN_SHORT"]
+
+
+def get_client():
+    load_dotenv()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_API_KEY")
+    if not url or not key:
+        print("Supabase URL and API Key must be set in the .env file.")
+        exit()
+    return create_client(url, key)
+
+
+def timed(fn, repeat):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000, result
+
+
+# --- the app's table-scan queries, as in data.py/timeline.py ---
+
+def scan_latest_signals(client, codes):
+    rows = []
+    for contract in codes:
+        response = client.table("signals").select(queries.SIGNAL_COLUMNS).eq("contract", contract) \
+            .order("snapshot_minute", desc=True).limit(1).execute()
+        rows.extend(response.data)
+    return rows
+
+
+def scan_contracts(client, max_batches=30):
+    codes = set()
+    for i in range(max_batches):
+        response = client.table("signals").select("contract, snapshot_minute") \
+            .order("snapshot_minute", desc=True).range(i * 1000, i * 1000 + 999).execute()
+        if not response.data:
+            break
+        codes.update(row['contract'] for row in response.data)
+        if len({contracts.date_key(c) for c in codes} - {None}) >= 4:
+            break
+    return codes
+
+
+def scan_minutes(client, contract):
+    response = client.table("snapshots").select("snapshot_minute").eq("contract", contract) \
+        .order("snapshot_minute", desc=True).execute()
+    return [row['snapshot_minute'] for row in response.data]
+
+
+def scan_open_signals(client, hours):
+    end = datetime.now(timezone.utc)
+    response = client.table("signals").select(queries.SIGNAL_COLUMNS) \
+        .in_("tradeSignal", OPEN_SIGNALS) \
+        .gte("snapshot_minute", (end - timedelta(hours=hours)).isoformat()) \
+        .lt("snapshot_minute", end.isoformat()) \
+        .order("snapshot_minute", desc=False).order("contract", desc=False) \
+        .range(0, 999).execute()
+    return response.data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the app's queries: table scans vs the view/RPC path.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query, the median is reported")
+    parser.add_argument("--window-hours", type=int, default=6, help="Window of the OPEN_* signals query")
+    args = parser.parse_args()
+
+    client = get_client()
+    structure = queries.recent_delivery_contracts(client)
+    if structure is None:
+        structure = contracts.ContractIndex(scan_contracts(client)).by_date()
+    if not structure:
+        print("No contracts found.")
+        return
+    codes = sorted(structure[max(structure)])
+    print(f"{len(codes)} contracts on the latest delivery date, median of {args.repeat} runs")
+
+    cases = [
+        ("latest signal per contract",
+         lambda: scan_latest_signals(client, codes),
+         lambda: queries.latest_signals(client, codes)),
+        ("contracts of recent dates",
+         lambda: scan_contracts(client),
+         lambda: queries.recent_delivery_contracts(client)),
+        ("minutes of one contract",
+         lambda: scan_minutes(client, codes[0]),
+         lambda: queries.snapshot_minutes(client, codes[0])),
+        (f"OPEN_* signals, last {args.window_hours}h",
+         lambda: scan_open_signals(client, args.window_hours),
+         None),
+    ]
+
+    print()
+    print(f"{'Query':<32}{'table scan ms':>16}{'view/RPC ms':>16}")
+    for name, scan, server in cases:
+        scan_ms, _ = timed(scan, args.repeat)
+        server_ms = "n/a"
+        if server is not None:
+            ms, result = timed(server, args.repeat)
+            server_ms = "not deployed" if result is None else f"{ms:.1f}"
+        print(f"{name:<32}{scan_ms:>16.1f}{server_ms:>16}")
+
+
+if __name__ == "__main__":
+    main()
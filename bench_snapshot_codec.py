@@ -0,0 +1,129 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+import pandas as pd
+from dotenv import load_dotenv
+from supabase import create_client
+
+import snapshot_codec
+
+PAGE_SIZE = 1000
+JSON_COLUMNS = ["board", "depth", "trades"]
+ROW_COLUMNS = ["contract", "snapshot_minute", "board", "depth", "trades", "remaining_time_sec"]
+
+
+def fetch_rows(contract):
+    load_dotenv()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_API_KEY")
+    if not url or not key:
+        print("Supabase URL and API Key must be set in the .env file.")
+        exit()
+    supabase = create_client(url, key)
+
+    rows = []
+    start = 0
+    while True:
+        response = supabase.table("snapshots") \
+            .select("contract, snapshot_minute, board, depth, trades, remaining_time_sec") \
+            .eq("contract", contract) \
+            .order("snapshot_minute", desc=False) \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute()
+        if not response.data:
+            break
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+def read_csv_rows(path, contract):
+    # CSV written by backfill.py (JSON columns stored as text)
+    csv.field_size_limit(sys.maxsize)
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if contract and row["contract"] != contract:
+                continue
+            for column in JSON_COLUMNS:
+                row[column] = json.loads(row[column]) if row.get(column) else None
+            row["remaining_time_sec"] = float(row["remaining_time_sec"]) if row.get("remaining_time_sec") else None
+            rows.append(row)
+    return rows
+
+
+def check_round_trip(rows, series):
+    # The format must be lossless: every minute decodes to exactly the row it was
+    # encoded from (types, nulls and repeated levels included)
+    same = lambda a, b: json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+    expected = [{k: row.get(k) for k in ROW_COLUMNS} for row in sorted(rows, key=lambda r: pd.Timestamp(r['snapshot_minute']))]
+    for i, (decoded, row) in enumerate(zip(series.iter_decode(), expected)):
+        assert same(decoded, row), f"Row {i} ({row['snapshot_minute']}) does not round-trip:\n{decoded}\n!=\n{row}"
+        assert same(series.decode(i), row), f"Row {i} ({row['snapshot_minute']}) does not round-trip with random access"
+    assert len(series) == len(expected)
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the delta snapshot format with raw JSON: size and decode speed.")
+    parser.add_argument("--contract", required=True)
+    parser.add_argument("--csv", help="Read snapshots from a backfill.py CSV export instead of Supabase")
+    parser.add_argument("--samples", type=int, default=200, help="Random minutes decoded in the random-access test")
+    parser.add_argument("--keyframe-interval", type=int, default=snapshot_codec.KEYFRAME_INTERVAL)
+    args = parser.parse_args()
+
+    rows = read_csv_rows(args.csv, args.contract) if args.csv else fetch_rows(args.contract)
+    if not rows:
+        print(f"No snapshots found for {args.contract}.")
+        return
+    print(f"{len(rows)} snapshots for {args.contract}")
+
+    raw_blobs = [json.dumps({k: row.get(k) for k in JSON_COLUMNS + ["snapshot_minute", "remaining_time_sec"]}).encode() for row in rows]
+    raw_bytes = sum(len(b) for b in raw_blobs)
+    raw_zlib = len(zlib.compress(b"\n".join(raw_blobs), 6))
+
+    encode_sec, series = timed(lambda: snapshot_codec.SnapshotSeries.encode(args.contract, rows, args.keyframe_interval))
+    blob = series.to_bytes()
+    load_sec, series = timed(lambda: snapshot_codec.SnapshotSeries.from_bytes(blob), repeat=5)
+    check_round_trip(rows, series)
+    print("Round trip: every snapshot decodes to the row it was encoded from")
+
+    sample = [random.randrange(len(rows)) for _ in range(args.samples)]
+    raw_random_sec, _ = timed(lambda: [json.loads(raw_blobs[i]) for i in sample])
+    codec_random_sec, _ = timed(lambda: [series.decode(i) for i in sample])
+    raw_full_sec, _ = timed(lambda: [json.loads(b) for b in raw_blobs])
+    codec_full_sec, _ = timed(lambda: list(series.iter_decode()))
+    board_sec, _ = timed(lambda: series.board_frame(), repeat=5)
+
+    print()
+    print(f"{'Size':<28}{'bytes':>14}{'vs raw':>10}")
+    print(f"{'raw JSON':<28}{raw_bytes:>14,}{1:>10.2f}")
+    print(f"{'raw JSON + zlib':<28}{raw_zlib:>14,}{raw_zlib / raw_bytes:>10.3f}")
+    print(f"{'delta format':<28}{len(blob):>14,}{len(blob) / raw_bytes:>10.3f}")
+    print()
+    print(f"{'Timing':<28}{'ms':>14}")
+    print(f"{'encode':<28}{encode_sec * 1000:>14.1f}")
+    print(f"{'load from bytes':<28}{load_sec * 1000:>14.1f}")
+    print(f"{'random decode, raw JSON':<28}{raw_random_sec / len(sample) * 1000:>14.3f}  per minute")
+    print(f"{'random decode, delta':<28}{codec_random_sec / len(sample) * 1000:>14.3f}  per minute")
+    print(f"{'full decode, raw JSON':<28}{raw_full_sec * 1000:>14.1f}")
+    print(f"{'full decode, delta':<28}{codec_full_sec * 1000:>14.1f}")
+    print(f"{'board columns only':<28}{board_sec * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
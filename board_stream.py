@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+
+import functions
+
+STREAM_KEY = os.getenv("BOARD_STREAM_KEY", "board:stream")
+
+# Must stay below the pool's socket_timeout (5 s), the blocking read holds the socket
+BLOCK_MS = 2000
+BATCH_SIZE = 500
+
+# With no stream traffic for this long, the state is re-seeded from the JSON board
+RESYNC_INTERVAL = 60
+
+
+def _decode(value):
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+class BoardStreamConsumer:
+    # Tails board updates from a Redis stream and keeps the latest board per
+    # contract in memory, so reruns read the board without touching Redis.
+    #
+    # Entries are either {"contract": ..., <fields or "data": json>} for one
+    # contract, or {"board": json} / {"data": json} holding the whole board
+    # as {contract: board}, which replaces the state.
+    #
+    # Every process needs every entry, so this is a plain XREAD (a consumer
+    # group would split the entries between processes). The position is kept
+    # in memory: on (re)start the state is seeded from the JSON board and the
+    # stream is read from the entry that was newest just before the seed.
+
+    def __init__(self, r, stream_key=STREAM_KEY):
+        self.r = r
+        self.stream_key = stream_key
+
+        self._state = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.last_id = None
+        self.last_message_at = None
+        self.last_sync_at = None
+        self.messages = 0
+        self.errors = 0
+
+    # --- state ---
+
+    def board(self):
+        with self._lock:
+            return dict(self._state)
+
+    def active_contracts(self):
+        with self._lock:
+            return list(self._state.keys())
+
+    def age(self):
+        latest = max(filter(None, [self.last_message_at, self.last_sync_at]), default=None)
+        return None if latest is None else time.time() - latest
+
+    def is_live(self, max_age=RESYNC_INTERVAL * 2):
+        age = self.age()
+        return age is not None and age <= max_age and self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        return {
+            "stream": self.stream_key,
+            "last_id": self.last_id,
+            "contracts": len(self._state),
+            "messages": self.messages,
+            "errors": self.errors,
+            "age_sec": self.age(),
+            "live": self.is_live(),
+        }
+
+    def _apply(self, fields):
+        with self._lock:
+            if "contract" in fields:
+                contract = fields["contract"]
+                if "data" in fields:
+                    payload = _decode(fields["data"])
+                else:
+                    payload = {k: _decode(v) for k, v in fields.items() if k != "contract"}
+                self._state[contract] = payload
+            else:
+                payload = _decode(fields.get("board", fields.get("data")))
+                if isinstance(payload, dict):
+                    # A full board: contracts missing from it have left
+                    self._state = dict(payload)
+
+    def resync(self):
+        # Full snapshot from the JSON board key
+        board = functions.get_board_data(self.r)
+        with self._lock:
+            self._state = dict(board)
+        self.last_sync_at = time.time()
+
+    # --- stream position ---
+
+    def _initial_id(self):
+        # Newest entry before the seed; re-applying later ones is harmless (latest wins)
+        newest = self.r.xrevrange(self.stream_key, count=1)
+        return newest[0][0] if newest else "0-0"
+
+    def _read(self, last_id):
+        return self.r.xread({self.stream_key: last_id}, count=BATCH_SIZE, block=BLOCK_MS)
+
+    # --- loop ---
+
+    def _run(self):
+        last_id = None
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                if last_id is None:
+                    last_id = self._initial_id()
+                    self.resync()
+
+                response = self._read(last_id)
+                entries = response[0][1] if response else []
+
+                if entries:
+                    for entry_id, fields in entries:
+                        self._apply(fields)
+                    last_id = self.last_id = entries[-1][0]
+                    self.messages += len(entries)
+                    self.last_message_at = time.time()
+                elif self.age() is None or self.age() > RESYNC_INTERVAL:
+                    self.resync()
+                failures = 0
+            except Exception as e:
+                self.errors += 1
+                failures += 1
+                print(f"Error reading board stream {self.stream_key}: {e}")
+                last_id = None
+                self._stop.wait(min(30, 2 ** failures))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="board-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,75 @@
+import threading
+import time
+
+# Circuit breaker for one backend. After FAILURE_THRESHOLD failures in a row
+# it opens and calls are refused without touching the backend; after
+# RESET_SECONDS one trial call is let through (half-open), and its outcome
+# closes the breaker again or restarts the wait.
+
+FAILURE_THRESHOLD = 5
+RESET_SECONDS = 30
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0          # In a row
+        self.opened_at = None      # Wall time the breaker last opened
+        self.last_error = None
+        self.rejected = 0
+        self._retry_at = 0.0
+        self._trial = False        # A half-open trial call is running
+        self._lock = threading.Lock()
+
+    def allow(self):
+        # True if a call may go to the backend; the caller must then report its outcome
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() >= self._retry_at:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.opened_at = self.opened_at or time.time()  # Start of the incident, kept across trials
+                self.state = "open"
+                self._retry_at = time.monotonic() + self.reset_seconds
+            self._trial = False
+
+    def is_open(self):
+        with self._lock:
+            return self.state != "closed"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "opened_at": self.opened_at,
+                "retry_in_sec": round(max(0.0, self._retry_at - time.monotonic()), 1) if self.state != "closed" else None,
+                "last_error": self.last_error,
+            }
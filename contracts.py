@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# PH contract codes: PH + YYMMDD + HH, e.g. PH25111914 delivers 2025-11-19 14:00
+# Istanbul time. As an integer YYMMDDHH the code sorts in delivery order, so
+# the index keeps that key in a sorted array and answers lookups by bisection.
+
+TZ = 'Europe/Istanbul'
+
+
+@lru_cache(maxsize=4096)
+def parse(code):
+    # "PH25111914" -> ("251119", 14); None for anything that is not an hourly PH code.
+    # recent_delivery_contracts in supabase/migrations uses the same rule.
+    if not code or not code.startswith("PH") or len(code) < 10:
+        return None
+    date_key, hour = code[2:8], code[8:10]
+    if not (date_key.isdigit() and hour.isdigit()) or int(hour) > 23:
+        return None
+    return date_key, int(hour)
+
+
+def date_key(code):
+    parsed = parse(code)
+    return parsed[0] if parsed else None
+
+
+def delivery_hour(code):
+    parsed = parse(code)
+    return parsed[1] if parsed else None
+
+
+def date_label(key):
+    # "251119" -> "2025-11-19"
+    return f"20{key[:2]}-{key[2:4]}-{key[4:]}"
+
+
+def delivery_start(code):
+    parsed = parse(code)
+    if parsed is None:
+        return None
+    return pd.Timestamp(f"{date_label(parsed[0])} {parsed[1]:02d}:00").tz_localize(TZ)
+
+
+def _time_key(ts):
+    # Timestamp -> YYMMDDHH of the Istanbul hour it falls in
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize(TZ) if ts.tzinfo is None else ts.tz_convert(TZ)
+    return int(ts.strftime('%y%m%d%H'))
+
+
+class ContractIndex:
+    # Contracts parsed once and sorted by delivery time. Codes that do not
+    # parse are kept apart in `others` and listed after the PH contracts.
+
+    def __init__(self, codes):
+        parsed = []
+        others = set()
+        for code in set(codes):
+            p = parse(code)
+            if p is None:
+                others.add(code)
+            else:
+                parsed.append((int(p[0]) * 100 + p[1], code))
+        parsed.sort()
+        self.keys = np.array([k for k, _ in parsed], dtype=np.int64)
+        self.codes = np.array([c for _, c in parsed], dtype=object)
+        self.others = sorted(others)
+        self._position = {c: i for i, c in enumerate(self.codes)}
+
+    def __len__(self):
+        return len(self.codes) + len(self.others)
+
+    def __contains__(self, code):
+        return code in self._position or code in self.others
+
+    def all(self):
+        return list(self.codes) + self.others
+
+    def date_keys(self, descending=True):
+        keys = [f"{d:06d}" for d in np.unique(self.keys // 100)]
+        return keys[::-1] if descending else keys
+
+    def _between_keys(self, lo, hi):
+        i, j = np.searchsorted(self.keys, [lo, hi], side='left')
+        return list(self.codes[i:j])
+
+    def for_date(self, date_key):
+        # All contracts of one delivery date, in hour order
+        day = int(date_key) * 100
+        return self._between_keys(day, day + 100)
+
+    def delivering_between(self, start, end):
+        # Contracts whose delivery starts in [start, end); None leaves a side open
+        lo = _time_key(pd.Timestamp(start).ceil('h')) if start is not None else 0
+        hi = _time_key(pd.Timestamp(end).ceil('h')) if end is not None else np.iinfo(np.int64).max
+        return self._between_keys(lo, hi)
+
+    def delivering_within(self, hours, now=None):
+        # The contract of the current hour and those of the next `hours - 1` hours
+        now = pd.Timestamp.now(tz=TZ) if now is None else pd.Timestamp(now)
+        start = now.floor('h')
+        return self.delivering_between(start, start + pd.Timedelta(hours=hours))
+
+    def neighbors(self, code, n=1):
+        # Up to n contracts delivering before and after `code`
+        i = self._position.get(code)
+        if i is None:
+            return [], []
+        return list(self.codes[max(i - n, 0):i]), list(self.codes[i + 1:i + 1 + n])
+
+    def by_date(self, max_dates=None):
+        # {"YYYY-MM-DD": [contracts]} for the most recent delivery dates
+        keys = self.date_keys()[:max_dates] if max_dates else self.date_keys()
+        return {date_label(k): self.for_date(k) for k in keys}
@@ -0,0 +1,135 @@
+
+import pandas as pd
+import streamlit as st
+
+import bars
+import board_stream
+import contracts
+import fetchers
+import health
+import prewarm
+import resources
+import rollups
+import signal_matrix
+import signal_watcher
+import snapshot_cache
+import timeline
+import volume_profile
+
+# Process-wide stores and the cached fetchers (fetchers.py), in one place for
+# app.py. Defined here instead of in app.py so they are built once per process
+# rather than on every script rerun.
+
+MAX_STALE = fetchers.MAX_STALE
+supabase_circuit = fetchers.supabase_circuit
+fetch_active_contracts_from_redis = fetchers.fetch_active_contracts_from_redis
+fetch_latest_signals = fetchers.fetch_latest_signals
+fetch_contract_history = fetchers.fetch_contract_history
+fetch_market_structure = fetchers.fetch_market_structure
+fetch_snapshot_minutes = fetchers.fetch_snapshot_minutes
+fetch_snap_signals = fetchers.fetch_snap_signals
+
+
+@st.cache_resource(show_spinner=False)
+def get_board_consumer():
+    # One stream reader per process; keeps the latest board per contract in memory
+    return board_stream.BoardStreamConsumer(resources.get_redis()).start()
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_contract_index(codes):
+    # codes: tuple of contract codes; shared by every session seeing the same set
+    return contracts.ContractIndex(codes)
+
+
+def fetch_active_contracts():
+    # Served from the in-memory board; falls back to Redis while the consumer is not live
+    consumer = get_board_consumer()
+    if consumer.is_live():
+        return consumer.active_contracts()
+    return fetch_active_contracts_from_redis()
+
+
+@st.cache_resource(show_spinner=False)
+def get_health_monitor():
+    # One per process; probes Redis and Supabase in the background for the status badges
+    return health.HealthMonitor({
+        "Redis": lambda: health.ping_redis(resources.get_redis()),
+        "Supabase": lambda: health.ping_supabase(resources.get_supabase()),
+    }).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_signal_watcher():
+    # Every process starts one; a Redis lease keeps a single one active
+    return signal_watcher.SignalWatcher(resources.get_supabase(), resources.get_redis()).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_alert_feed():
+    return signal_watcher.AlertFeed(resources.get_redis()).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_signal_matrix_store():
+    # Shared across sessions; memory bounded by the number of delivery dates held
+    return signal_matrix.SignalMatrixStore(max_dates=3, refresh_interval=30)
+
+
+@st.cache_resource(show_spinner=False)
+def get_signal_rollups():
+    # Rollups live in Redis; this only holds the last read and the refresh clock
+    return rollups.SignalRollups(resources.get_redis(), refresh_interval=60)
+
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_prefetcher():
+    # Shared across sessions; bounded to max_entries snapshots
+    return snapshot_cache.SnapshotPrefetcher(max_entries=512)
+
+
+@st.cache_resource(show_spinner=False)
+def get_bar_store():
+    # Shared across sessions; OHLCV bars for the last max_contracts contracts viewed
+    return bars.BarStore(max_contracts=32)
+
+
+@st.cache_resource(show_spinner=False)
+def get_volume_profile_store():
+    # Shared across sessions; volume-at-price for the last max_contracts contracts viewed
+    return volume_profile.VolumeProfileStore(max_contracts=32)
+
+
+@st.cache_resource(show_spinner=False)
+def get_timeline_store():
+    # Shared across sessions; only ranges not yet downloaded hit Supabase
+    return timeline.TimelineStore(max_slices=8)
+
+
+def _probe_contract():
+    # The active contract furthest from delivery: it keeps getting signals
+    # longest, where the nearest one stops when it closes
+    contract_index = get_contract_index(tuple(fetch_active_contracts()))
+    if len(contract_index.codes):
+        return contract_index.codes[-1]
+    return next(iter(contract_index.all()), None)
+
+
+def warm_caches():
+    # What the first rerun after a boundary asks for: latest signals, market
+    # structure, today's contract histories and today's Timeline window
+    contract_index = get_contract_index(tuple(fetch_active_contracts()))
+    fetch_latest_signals.refresh(contract_index.all())
+    fetch_market_structure.refresh()
+    today = pd.Timestamp.now(tz=contracts.TZ).normalize()
+    for contract in contract_index.for_date(today.strftime('%y%m%d')):
+        fetch_contract_history.refresh(contract)
+    get_timeline_store().get(resources.get_supabase(), today, today + pd.Timedelta(days=1), refresh_tail=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_prewarmer():
+    # One per process, started by the first session
+    return prewarm.CachePrewarmer(resources.get_supabase(), _probe_contract, warm_caches).start()
+
+
@@ -0,0 +1,136 @@
+import pandas as pd
+
+import breaker
+import contracts
+import frames
+import functions
+import queries
+import resources
+import result_cache
+
+# Cached fetchers shared by the app (through data.py) and api.py. Nothing here
+# needs Streamlit, so the API process can import it on its own.
+
+# Serving policy for the Supabase fetchers: results stay servable for
+# MAX_STALE seconds past their TTL and reload in the background meanwhile;
+# fetchers raise on errors (nothing failed is cached), and after repeated
+# failures the circuit opens and loads stop until a trial call succeeds.
+MAX_STALE = 3600
+supabase_circuit = breaker.CircuitBreaker("Supabase")
+
+
+@result_cache.cached(ttl=30, max_stale=MAX_STALE)
+def fetch_active_contracts_from_redis():
+    return functions.get_active_contracts(resources.get_redis())
+
+
+@result_cache.cached(ttl=60, max_stale=MAX_STALE, circuit=supabase_circuit, default=pd.DataFrame)
+def fetch_latest_signals(contracts):
+    supabase = resources.get_supabase()
+    # One request through the latest_signals_for function; one request per contract without it
+    latest_data_list = queries.latest_signals(supabase, contracts)
+    if latest_data_list is None:
+        latest_data_list = []
+        for contract in contracts:
+            try:
+                # Fetch ONLY the latest signal for each contract
+                response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=True).limit(1).execute()
+                if response.data:
+                    latest_data_list.extend(response.data)
+            except Exception as e:
+                print(f"Error fetching latest data for {contract}: {e}")
+                raise
+    
+    if not latest_data_list:
+        return pd.DataFrame()
+    
+    df = frames.signals_frame(latest_data_list)
+    return df.sort_values(by='snapshot_minute', ascending=False)
+
+
+@result_cache.cached(ttl=60, max_stale=MAX_STALE, circuit=supabase_circuit, default=pd.DataFrame)
+def fetch_contract_history(contract):
+    supabase = resources.get_supabase()
+    try:
+        # Fetch recent history (e.g., 1000 rows) for a SPECIFIC contract
+        response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=True).limit(1000).execute()
+        if response.data:
+            return frames.signals_frame(response.data)
+    except Exception as e:
+        print(f"Error fetching history for {contract}: {e}")
+        raise
+    
+    return pd.DataFrame()
+
+
+@result_cache.cached(ttl=300, max_stale=MAX_STALE, circuit=supabase_circuit, default=dict)
+def fetch_market_structure():
+    supabase = resources.get_supabase()
+    structure = queries.recent_delivery_contracts(supabase, max_dates=3)
+    if structure is not None:
+        return structure
+
+    try:
+        all_contracts = set()
+        batch_size = 1000
+        max_batches = 30  # Fetch up to 30,000 rows to ensure we cover 3 days
+        
+        # We need to fetch enough data to find the last 3 days.
+        # Since we order by time, we just keep fetching until we have 3 distinct dates.
+        
+        for i in range(max_batches):
+            start = i * batch_size
+            end = start + batch_size - 1
+            
+            response = supabase.table("signals") \
+                .select("contract, snapshot_minute") \
+                .order("snapshot_minute", desc=True) \
+                .range(start, end) \
+                .execute()
+            
+            if not response.data:
+                break
+            
+            all_contracts.update(row['contract'] for row in response.data)
+            
+            # If we have found contracts for more than 3 days, we can probably stop
+            if len({contracts.date_key(c) for c in all_contracts} - {None}) >= 4:
+                break
+        
+        # Keep only the top 3 most recent dates
+        return contracts.ContractIndex(all_contracts).by_date(max_dates=3)
+        
+    except Exception as e:
+        print(f"Error fetching market structure: {e}")
+        raise
+
+
+@result_cache.cached(ttl=60, max_stale=MAX_STALE, circuit=supabase_circuit, default=list)
+def fetch_snapshot_minutes(contract):
+    supabase = resources.get_supabase()
+    minutes = queries.snapshot_minutes(supabase, contract)
+    if minutes is not None:
+        return minutes
+
+    try:
+        response = supabase.table("snapshots").select("snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=True).execute()
+        if response.data:
+            minutes = [row['snapshot_minute'] for row in response.data]
+            return minutes
+    except Exception as e:
+        print(f"Error fetching snapshot minutes: {e}")
+        raise
+    return []
+
+
+@result_cache.cached(ttl=60, max_stale=MAX_STALE, circuit=supabase_circuit, default=pd.DataFrame)
+def fetch_snap_signals(contract):
+    supabase = resources.get_supabase()
+    try:
+        response = supabase.table("signals").select("contract, tradeSignal, timeSignal, snapshot_minute").eq("contract", contract).order("snapshot_minute", desc=False).execute()
+        if response.data:
+            return frames.signals_frame(response.data)
+    except Exception as e:
+        print(f"Error fetching signal history for {contract}: {e}")
+        raise
+    return pd.DataFrame()
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Raw Supabase rows -> typed DataFrames in one pass. Every fetcher goes through
+# here so cached frames hold categoricals/float32 instead of object columns,
+# and timestamps are always tz-aware Europe/Istanbul.
+
+TZ = 'Europe/Istanbul'
+
+# Signal rows as the views read them, shared by the Timeline, the activity
+# rollups and the signal matrix
+SIGNAL_COLUMNS = "contract, tradeSignal, timeSignal, snapshot_minute"
+THRESHOLD = 0.30  # |timeSignal| beyond this is a strong signal
+# Rows can land a few minutes after their snapshot_minute, so the newest
+# SETTLE_LAG of any range is re-read rather than trusted
+SETTLE_LAG = pd.Timedelta(minutes=10)
+
+# Column kinds: "category", "time" (ISO string), "epoch" (unix seconds) or a numpy dtype
+SIGNAL_SCHEMA = {
+    "contract": "category",
+    "tradeSignal": "category",
+    "timeSignal": "float32",
+    "snapshot_minute": "time",
+}
+
+TRADE_SCHEMA = {
+    "timestamp": "epoch",
+    "price": "float64",
+    "volume": "float64",
+}
+TRADE_FIELDS = {"t": "timestamp", "p": "price", "q": "volume"}
+
+
+def local_time(values):
+    # Scalar or array of timestamps -> Istanbul time; naive values are taken as UTC
+    converted = pd.to_datetime(values, utc=True)
+    if isinstance(converted, pd.Series):
+        return converted.dt.tz_convert(TZ)
+    return converted.tz_convert(TZ)
+
+
+def _column(values, kind):
+    if kind == "category":
+        return pd.Categorical(values)
+    if kind == "time":
+        return pd.DatetimeIndex(pd.to_datetime(values, utc=True, format='ISO8601')).tz_convert(TZ)
+    if kind == "epoch":
+        seconds = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+        return pd.DatetimeIndex(pd.to_datetime(seconds, unit='s', utc=True)).tz_convert(TZ)
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=kind)
+
+
+def typed_frame(rows, schema, rename=None):
+    # Builds each column straight from the row dicts; missing fields become NaN/NaT
+    rename = rename or {}
+    source = {target: raw for raw, target in rename.items()}
+    columns = {}
+    for name, kind in schema.items():
+        key = source.get(name, name)
+        columns[name] = _column([row.get(key) for row in rows], kind)
+    return pd.DataFrame(columns)
+
+
+def signals_frame(rows):
+    return typed_frame(rows, SIGNAL_SCHEMA)
+
+
+def trades_frame(trades):
+    return typed_frame(trades, TRADE_SCHEMA, rename=TRADE_FIELDS)
+
+
+def snapshot_trades(rows):
+    # Snapshot rows (oldest first), each with its rolling tape of the latest
+    # trades, newest first -> the distinct trades as raw {p, q, t}, oldest
+    # first. Consecutive tapes repeat most trades, so they are de-duplicated
+    # on (t, p, q) as in backtest.load_snapshots.
+    seen = set()
+    trades = []
+    for row in rows:
+        tape = row.get('trades')
+        if not isinstance(tape, list):
+            continue
+        for trade in reversed(tape):
+            key = (trade.get('t'), trade.get('p'), trade.get('q'))
+            if key not in seen:
+                seen.add(key)
+                trades.append(trade)
+    return trades
+
+
+def view(df):
+    # Copy of a shared DataFrame/Series that a caller may change freely. With
+    # copy-on-write on (app.py and api.py turn it on) a shallow copy is enough
+    # and copies no data; without it a shallow copy would share the data, so
+    # the copy is deep.
+    return df.copy(deep=not pd.options.mode.copy_on_write)
+
+
+def concat(frames):
+    # pd.concat falls back to object when categories differ; union them first
+    frames = [df for df in frames if df is not None]
+    if not frames:
+        return pd.DataFrame()
+    for name in frames[0].columns:
+        if isinstance(frames[0][name].dtype, pd.CategoricalDtype):
+            categories = pd.Index(np.unique(np.concatenate([df[name].cat.categories.to_numpy(dtype=object) for df in frames])))
+            frames = [df.assign(**{name: df[name].cat.set_categories(categories)}) for df in frames]
+    return pd.concat(frames, ignore_index=True)
@@ -1,91 +1,164 @@
 import redis
 import os
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.retry import Retry
 
 load_dotenv()
 
-def connect_to_redis():
-    redis_host = os.getenv("REDIS_HOST")
-    redis_port = os.getenv("REDIS_PORT")
-    redis_password = os.getenv("REDIS_PASSWORD")
-    
-    if not redis_host or not redis_port or not redis_password:
-        raise ValueError("Redis credentials must be set in .env file")
-
-    # Bağlantı havuzu oluştur
-    pool = redis.ConnectionPool(
-        host=redis_host, 
-        port=int(redis_port), 
-        password=redis_password, 
-        decode_responses=True,
-        max_connections=10  # Maksimum 10 bağlantı
-    )
-
-    # Redis nesnesini havuz ile başlat
-    r = redis.Redis(connection_pool=pool)
-    return r
+# Tüm oturumlar tarafından paylaşılan tek Redis istemcisi
+_redis = None
+_redis_lock = threading.Lock()
 
 
-def get_board_data(r):
-    board_data = {}
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    # Bağlantı beklerken bloklayan havuz; kullanım ve bekleme süresi metriklerini tutar
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checked_out = set()  # Verdiğimiz bağlantılar; yalnızca bunların iadesi sayılır
+        self._peak_in_use = 0
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._connect_errors = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except redis.ConnectionError as e:
+            # Havuzun bekleme süresi dolduysa "No connection available."; diğerleri bağlantı hatası
+            with self._stats_lock:
+                if str(e).startswith("No connection available"):
+                    self._timeouts += 1
+                else:
+                    self._connect_errors += 1
+            raise
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._checked_out.add(id(connection))
+            self._peak_in_use = max(self._peak_in_use, len(self._checked_out))
+            self._acquisitions += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._recent_waits.append(waited)
+        return connection
+
+    def release(self, connection):
+        # Üst sınıf, kuramadığı bağlantıyı da buradan iade eder; o hiç sayılmamıştır
+        with self._stats_lock:
+            self._checked_out.discard(id(connection))
+        super().release(connection)
+
+    def stats(self):
+        with self._stats_lock:
+            waits = sorted(self._recent_waits)
+            created = len([c for c in self._connections if c is not None])
+            in_use = len(self._checked_out)
+            return {
+                "max_connections": self.max_connections,
+                "created": created,
+                "in_use": in_use,
+                "idle": max(0, created - in_use),
+                "peak_in_use": self._peak_in_use,
+                "utilization": in_use / self.max_connections if self.max_connections else 0.0,
+                "acquisitions": self._acquisitions,
+                "timeouts": self._timeouts,
+                "connect_errors": self._connect_errors,
+                "wait_avg_ms": (self._wait_total / self._acquisitions * 1000) if self._acquisitions else 0.0,
+                "wait_p95_ms": waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+                "wait_max_ms": self._wait_max * 1000,
+            }
 
-    # Performans için SCAN kullan
-    cursor = '0'
-    while cursor != 0:
-        cursor, keys = r.scan(cursor=cursor, match='board', count=100)  # 100 anahtar al
-    
-        for key in keys:
-            key_type = r.type(key)  # decode() kaldırıldı
-    
-            if key_type == 'ReJSON-RL':  # ReJSON veri tipi
-                value = r.json().get(key, '.')
-                board_data[key] = value
-            elif key_type == 'stream':  # Stream veri tipi
-                value = r.xrange(key, count=10)  # Son 10 kaydı al
-import redis
 
 def connect_to_redis():
-    redis_host = "34.89.222.23"
-    redis_port = 6379
-    redis_password = "RKr3d1s!"
+    global _redis
+
+    # Havuz süreç başına bir kez oluşturulur; sonraki çağrılar aynı istemciyi döndürür
+    with _redis_lock:
+        if _redis is not None:
+            return _redis
+
+        redis_host = os.getenv("REDIS_HOST")
+        redis_port = os.getenv("REDIS_PORT")
+        redis_password = os.getenv("REDIS_PASSWORD")
+
+        if not redis_host or not redis_port or not redis_password:
+            raise ValueError("Redis credentials must be set in .env file")
+
+        # Bağlantı havuzu oluştur
+        pool = InstrumentedConnectionPool(
+            host=redis_host,
+            port=int(redis_port),
+            password=redis_password,
+            decode_responses=True,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "20")),
+            timeout=float(os.getenv("REDIS_POOL_TIMEOUT", "5")),  # Boş bağlantı için en fazla bekleme (sn)
+            health_check_interval=30,  # 30 sn boşta kalan bağlantı kullanılmadan önce PING ile doğrulanır
+            socket_keepalive=True,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            # Kopan bağlantıda en fazla 3 deneme, artan bekleme ile
+            retry=Retry(ExponentialWithJitterBackoff(cap=1.0, base=0.05), 3),
+        )
 
-    # Bağlantı havuzu oluştur
-    pool = redis.ConnectionPool(
-        host=redis_host, 
-        port=redis_port, 
-        password=redis_password, 
-        decode_responses=True,
-        max_connections=10  # Maksimum 10 bağlantı
-    )
+        # Redis nesnesini havuz ile başlat
+        _redis = redis.Redis(connection_pool=pool)
+        return _redis
 
-    # Redis nesnesini havuz ile başlat
-    r = redis.Redis(connection_pool=pool)
-    return r
+
+def get_pool_stats():
+    if _redis is None:
+        return {}
+    pool = _redis.connection_pool
+    if isinstance(pool, InstrumentedConnectionPool):
+        return pool.stats()
+    return {}
 
 
 def get_board_data(r):
     board_data = {}
 
     # Performans için SCAN kullan
+    keys = []
     cursor = '0'
     while cursor != 0:
-        cursor, keys = r.scan(cursor=cursor, match='board', count=100)  # 100 anahtar al
-    
-        for key in keys:
-            key_type = r.type(key)  # decode() kaldırıldı
-    
-            if key_type == 'ReJSON-RL':  # ReJSON veri tipi
-                value = r.json().get(key, '.')
-                board_data[key] = value
-            elif key_type == 'stream':  # Stream veri tipi
-                value = r.xrange(key, count=10)  # Son 10 kaydı al
-                board_data[key] = value
-            else:
-                board_data[key] = f"Unsupported type: {key_type}"
+        cursor, batch = r.scan(cursor=cursor, match='board', count=100)  # 100 anahtar al
+        keys.extend(batch)
+
+    # Tipleri tek bir pipeline ile al
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+    key_types = pipe.execute() if keys else []
+
+    # Değerleri tek bir pipeline ile al (JSON ve normal komutlar birlikte)
+    pipe = r.json().pipeline(transaction=False)
+    readable = []
+    for key, key_type in zip(keys, key_types):
+        if key_type == 'ReJSON-RL':  # ReJSON veri tipi
+            pipe.get(key, '.')
+            readable.append(key)
+        elif key_type == 'stream':  # Stream veri tipi
+            pipe.xrange(key, count=10)  # Son 10 kaydı al
+            readable.append(key)
+        else:
+            board_data[key] = f"Unsupported type: {key_type}"
+
+    if readable:
+        for key, value in zip(readable, pipe.execute()):
+            board_data[key] = value
 
     return board_data["board"]
 
 def get_active_contracts(r):
     board = get_board_data(r)
     active_contracts = list(board.keys())
-    return active_contracts
\ No newline at end of file
+    return active_contracts
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Backend health from background probes instead of a check on every rerun.
+# Each backend gets its own thread (a hung Supabase request must not hold up
+# the Redis probe) that runs a cheap query every PROBE_SECONDS and keeps the
+# last WINDOW results. The summary the badges render from is rebuilt after
+# each probe, so reading it costs a rerun nothing.
+
+PROBE_SECONDS = 10
+WINDOW = 360  # One hour of probes
+SPARK_POINTS = 60
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]  # Upper bounds; the last bucket is open
+SLOW_MS = 1000
+DEGRADED_ERROR_RATE = 0.2
+STALE_SECONDS = 3 * PROBE_SECONDS  # A probe stuck this long counts as a failure
+
+
+def ping_redis(client):
+    client.ping()
+
+
+def ping_supabase(client):
+    # One row, no ordering: an index-only read on the server
+    if client is None:
+        raise RuntimeError("Supabase is not configured")
+    client.table("signals").select("snapshot_minute").limit(1).execute()
+
+
+def histogram(latencies_ms):
+    # Latencies -> {"<=5ms": n, ..., ">2500ms": n}
+    counts = np.bincount(np.searchsorted(BUCKETS_MS, latencies_ms, side="left"), minlength=len(BUCKETS_MS) + 1)
+    labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    return dict(zip(labels, counts.tolist()))
+
+
+class _Backend:
+    def __init__(self, name, probe):
+        self.name = name
+        self.probe = probe
+        self.results = deque(maxlen=WINDOW)  # (wall time, latency ms, ok)
+        self.last_error = None
+        self.probing_since = None
+        self.summary = {"status": "Checking", "probes": 0}
+
+    def summarize(self):
+        latencies = np.array([ms for _, ms, ok in self.results if ok])
+        failures = sum(1 for _, _, ok in self.results if not ok)
+        last_ok = self.results[-1][2]
+        error_rate = failures / len(self.results)
+        p50, p95 = np.percentile(latencies, [50, 95]) if len(latencies) else (None, None)
+
+        if not last_ok:
+            status = "Disconnected"
+        elif error_rate >= DEGRADED_ERROR_RATE or (p95 is not None and p95 > SLOW_MS):
+            status = "Degraded"
+        else:
+            status = "Connected"
+
+        recent = list(self.results)[-SPARK_POINTS:]
+        return {
+            "status": status,
+            "probes": len(self.results),
+            "error_rate": round(error_rate, 3),
+            "p50_ms": round(float(p50), 1) if p50 is not None else None,
+            "p95_ms": round(float(p95), 1) if p95 is not None else None,
+            "last_ms": round(self.results[-1][1], 1),
+            "last_error": self.last_error,
+            "histogram": histogram(latencies),
+            # Failed probes are None so the sparkline shows a gap
+            "spark": [round(ms, 1) if ok else None for _, ms, ok in recent],
+        }
+
+
+class HealthMonitor:
+    # One per process. status() returns the summary built after the last
+    # probe of each backend; start() launches the probe threads.
+
+    def __init__(self, probes, interval=PROBE_SECONDS):
+        # probes: {name: callable that raises on failure}
+        self.interval = interval
+        self._backends = {name: _Backend(name, probe) for name, probe in probes.items()}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def probe_once(self, name):
+        backend = self._backends[name]
+        with self._lock:
+            backend.probing_since = time.monotonic()
+        started = time.perf_counter()
+        try:
+            backend.probe()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            backend.probing_since = None
+            backend.results.append((time.time(), latency_ms, ok))
+            if error is not None:
+                backend.last_error = error
+            backend.summary = backend.summarize()
+        return ok
+
+    def _run(self, name):
+        while not self._stop.is_set():
+            try:
+                self.probe_once(name)
+            except Exception as e:
+                print(f"Error probing {name}: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if not any(t.is_alive() for t in self._threads):
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, args=(name,), name=f"health-{name}", daemon=True)
+                for name in self._backends
+            ]
+            for thread in self._threads:
+                thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        # {name: summary}; a probe that has been hanging for STALE_SECONDS marks its backend down
+        now = time.monotonic()
+        with self._lock:
+            statuses = {}
+            for name, backend in self._backends.items():
+                summary = dict(backend.summary)
+                if backend.probing_since is not None and now - backend.probing_since > STALE_SECONDS:
+                    summary["status"] = "Disconnected"
+                    summary["last_error"] = f"No answer for {now - backend.probing_since:.0f}s"
+                statuses[name] = summary
+            return statuses
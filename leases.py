@@ -0,0 +1,36 @@
+# Redis leases (a key holding its owner's id, with a TTL). Taking one is a
+# single SET NX PX; renewing and releasing check the owner and act in one
+# server-side script, so a lease that expired and was taken by another owner
+# is never extended or deleted by the previous one.
+
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def acquire(r, key, owner, ttl):
+    # ttl in seconds; True if the lease was free and is now ours
+    return bool(r.set(key, owner, nx=True, px=int(ttl * 1000)))
+
+
+def renew(r, key, owner, ttl):
+    # True if we still hold the lease, now with a fresh ttl
+    return bool(r.eval(RENEW_SCRIPT, 1, key, owner, int(ttl * 1000)))
+
+
+def acquire_or_renew(r, key, owner, ttl):
+    return acquire(r, key, owner, ttl) or renew(r, key, owner, ttl)
+
+
+def release(r, key, owner):
+    return bool(r.eval(RELEASE_SCRIPT, 1, key, owner))
@@ -0,0 +1,718 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import random
+import re
+import resource
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+import resources
+
+# Concurrent-session load test for app.py. N simulated sessions (Streamlit
+# AppTest, all in this one process like a real server) run against in-memory
+# Supabase and Redis stubs, each parked on a view drawn from a tab mix, and
+# then all auto-refresh at the same arrival boundary, wave after wave.
+#
+#   python loadtest.py --sessions 1,5,10,25 --waves 5
+#   python loadtest.py --replay exports/ --expire    # backfill.py export, cold caches each wave
+#
+# Per N: rerun latency percentiles, process CPU (minus the stubs' own CPU),
+# RSS, and backend round trips per wave. With --expire the result cache is
+# cleared before each wave, as when the boundary coincides with the fetcher
+# TTLs running out.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+SIGNAL_STEP_MINUTES = 4
+DEFAULT_MIX = "list=3,heatmap=1,matrix=1,timeline=2,snapshots=2,activity=1"
+
+
+class StubAPIError(Exception):
+    # Shaped like postgrest.APIError, as far as queries._call looks at it
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class BackendStats:
+    # Round trips per backend and target, plus CPU the stubs spent answering
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.stub_cpu = 0.0
+
+    def add(self, backend, target, cpu=0.0):
+        with self._lock:
+            key = f"{backend}:{target}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.stub_cpu += cpu
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.requests), self.stub_cpu
+
+
+# --- Supabase stub ---
+
+class StubResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class StubQuery:
+    KEYSET = re.compile(r'snapshot_minute\.gt\."([^"]+)",and\(snapshot_minute\.eq\."([^"]+)",contract\.gt\."([^"]+)"\)')
+
+    def __init__(self, backend, target, rows):
+        self.backend = backend
+        self.target = target
+        self.rows = rows
+        self.columns = None
+        self.filters = []
+        self.orders = []
+        self.offset = 0
+        self.count = None
+        self.one = False
+
+    def select(self, columns, **kwargs):
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def _where(self, predicate):
+        self.filters.append(predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._where(lambda row: str(row.get(column)) == str(value))
+
+    def neq(self, column, value):
+        return self._where(lambda row: str(row.get(column)) != str(value))
+
+    def gt(self, column, value):
+        return self._where(lambda row: row.get(column) is not None and row[column] > value)
+
+    def gte(self, column, value):
+        return self._where(lambda row: row.get(column) is not None and row[column] >= value)
+
+    def lt(self, column, value):
+        return self._where(lambda row: row.get(column) is not None and row[column] < value)
+
+    def lte(self, column, value):
+        return self._where(lambda row: row.get(column) is not None and row[column] <= value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._where(lambda row: row.get(column) in values)
+
+    def like(self, column, pattern):
+        regex = re.compile("^" + re.escape(pattern).replace("%", ".*") + "$")
+        return self._where(lambda row: row.get(column) is not None and regex.match(row[column]) is not None)
+
+    def or_(self, expression):
+        # Only the keyset condition of paging.keyset_pages
+        match = self.KEYSET.fullmatch(expression)
+        if not match:
+            raise ValueError(f"Stub cannot evaluate or_({expression})")
+        after, minute, contract = match.groups()
+        return self._where(lambda row: row['snapshot_minute'] > after or (row['snapshot_minute'] == minute and row['contract'] > contract))
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.count = end - start + 1
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def single(self):
+        self.one = True
+        return self
+
+    def execute(self):
+        started = time.thread_time()
+        rows = [row for row in self.rows() if all(f(row) for f in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        rows = rows[self.offset:None if self.count is None else self.offset + self.count]
+        if self.columns:
+            rows = [{c: row.get(c) for c in self.columns} for row in rows]
+        self.backend.stats.add("supabase", self.target, time.thread_time() - started)
+        time.sleep(self.backend.latency)
+        if self.one:
+            return StubResponse(rows[0] if rows else None)
+        return StubResponse(rows)
+
+
+class StubRpc:
+    def __init__(self, backend, name, fn):
+        self.backend = backend
+        self.name = name
+        self.fn = fn
+
+    def execute(self):
+        started = time.thread_time()
+        rows = self.fn()
+        self.backend.stats.add("supabase", f"rpc/{self.name}", time.thread_time() - started)
+        time.sleep(self.backend.latency)
+        return StubResponse(rows)
+
+
+class StubSupabase:
+    # Enough of the PostgREST client for the app's queries, over rows in memory.
+    # With server_paths the RPCs of
+    # supabase/migrations are served too, otherwise they answer "not deployed".
+
+    def __init__(self, signals, snapshots, stats, latency, server_paths=True):
+        self.tables = {"signals": signals, "snapshots": snapshots}
+        self.stats = stats
+        self.latency = latency
+        self.server_paths = server_paths
+
+    def _latest_signals(self, contracts):
+        latest = {}
+        for row in self.tables["signals"]:
+            if row['contract'] not in contracts:
+                continue
+            if row['contract'] not in latest or row['snapshot_minute'] > latest[row['contract']]['snapshot_minute']:
+                latest[row['contract']] = row
+        return list(latest.values())
+
+    def table(self, name):
+        if name not in self.tables:
+            raise StubAPIError("PGRST205", f"Could not find the table 'public.{name}'")
+        return StubQuery(self, name, lambda: self.tables[name])
+
+    def rpc(self, name, params=None):
+        params = params or {}
+        if not self.server_paths:
+            raise StubAPIError("PGRST202", f"Could not find the function public.{name}")
+        if name == "latest_signals_for":
+            return StubRpc(self, name, lambda: self._latest_signals(set(params.get("p_contracts", []))))
+        if name == "recent_delivery_contracts":
+            return StubRpc(self, name, lambda: self._recent_delivery_contracts(params.get("max_dates", 3)))
+        if name == "snapshot_minutes":
+            return StubRpc(self, name, lambda: sorted(
+                ({"snapshot_minute": row['snapshot_minute']} for row in self.tables["snapshots"] if row['contract'] == params.get("p_contract")),
+                key=lambda row: row['snapshot_minute'], reverse=True))
+        raise StubAPIError("PGRST202", f"Could not find the function public.{name}")
+
+    def _recent_delivery_contracts(self, max_dates):
+        import contracts
+        by_date = contracts.ContractIndex({row['contract'] for row in self.tables["signals"]}).by_date(max_dates)
+        return [{"delivery_date": d, "contract": c} for d, codes in by_date.items() for c in codes]
+
+
+# --- Redis stub ---
+
+class StubPipeline:
+    def __init__(self, r):
+        self.r = r
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue_command
+
+    def execute(self):
+        self.r.stats.add("redis", "pipeline")
+        time.sleep(self.r.latency)
+        return [getattr(self.r, name)(*args, _counted=True, **kwargs) for name, args, kwargs in self.commands]
+
+
+class StubJson:
+    def __init__(self, r):
+        self.r = r
+
+    def get(self, key, path=".", _counted=False):
+        self.r._count("json.get", _counted)
+        return self.r.documents.get(key)
+
+    def pipeline(self, transaction=True):
+        return StubPipeline(self)
+
+    @property
+    def stats(self):
+        return self.r.stats
+
+    @property
+    def latency(self):
+        return self.r.latency
+
+
+class StubPubSub:
+    def __init__(self, r):
+        self.r = r
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        self.r._count("subscribe")
+        with self.r.lock:
+            for channel in channels:
+                self.r.subscribers.setdefault(channel, []).append(self.messages)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self.r.lock:
+            for subscribers in self.r.subscribers.values():
+                if self.messages in subscribers:
+                    subscribers.remove(self.messages)
+
+
+class StubRedis:
+    # The commands used by board_stream, functions.get_board_data,
+    # signal_watcher, rollups and leases. Strings are returned decoded, as with
+    # decode_responses=True. The board stream never has entries, so the
+    # consumer serves the JSON board and re-reads it on its resync interval.
+
+    def __init__(self, board, stats, latency):
+        self.stats = stats
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.strings = {}
+        self.hashes = {}
+        self.lists = {}
+        self.documents = {"board": board}
+        self.subscribers = {}
+
+    def _count(self, command, counted=False):
+        if not counted:
+            self.stats.add("redis", command)
+            time.sleep(self.latency)
+
+    def ping(self, _counted=False):
+        self._count("ping", _counted)
+        return True
+
+    def get(self, key, _counted=False):
+        self._count("get", _counted)
+        return self.strings.get(key)
+
+    def set(self, key, value, nx=False, ex=None, px=None, _counted=False):
+        self._count("set", _counted)
+        with self.lock:
+            if nx and key in self.strings:
+                return None
+            self.strings[key] = str(value)
+            return True
+
+    def delete(self, *keys, _counted=False):
+        self._count("delete", _counted)
+        with self.lock:
+            return sum(1 for key in keys if self.strings.pop(key, None) is not None or self.hashes.pop(key, None) is not None)
+
+    def expire(self, key, seconds, _counted=False):
+        self._count("expire", _counted)
+        return key in self.strings
+
+    def eval(self, script, numkeys, key, owner, *args, _counted=False):
+        # Only the owner-checked scripts of leases.py; TTLs are not modelled
+        self._count("eval", _counted)
+        with self.lock:
+            if self.strings.get(key) != owner:
+                return 0
+            if "'del'" in script:
+                del self.strings[key]
+            return 1
+
+    def hset(self, key, field=None, value=None, mapping=None, _counted=False):
+        self._count("hset", _counted)
+        with self.lock:
+            fields = self.hashes.setdefault(key, {})
+            if field is not None:
+                fields[field] = value
+            fields.update(mapping or {})
+
+    def hgetall(self, key, _counted=False):
+        self._count("hgetall", _counted)
+        with self.lock:
+            return dict(self.hashes.get(key, {}))
+
+    def lpush(self, key, *values, _counted=False):
+        self._count("lpush", _counted)
+        with self.lock:
+            items = self.lists.setdefault(key, [])
+            items[:0] = reversed(values)
+            return len(items)
+
+    def ltrim(self, key, start, end, _counted=False):
+        self._count("ltrim", _counted)
+        with self.lock:
+            self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    def lrange(self, key, start, end, _counted=False):
+        self._count("lrange", _counted)
+        with self.lock:
+            return list(self.lists.get(key, [])[start:end + 1 if end >= 0 else None])
+
+    def publish(self, channel, message, _counted=False):
+        self._count("publish", _counted)
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, []))
+        for messages in subscribers:
+            messages.put({"type": "message", "channel": channel, "data": message})
+        return len(subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return StubPubSub(self)
+
+    def scan(self, cursor=0, match=None, count=None, _counted=False):
+        self._count("scan", _counted)
+        pattern = re.compile("^" + re.escape(match or "*").replace("\\*", ".*") + "$")
+        return 0, [key for key in self.documents if pattern.match(key)]
+
+    def type(self, key, _counted=False):
+        self._count("type", _counted)
+        return "ReJSON-RL" if key in self.documents else "none"
+
+    def json(self):
+        return StubJson(self)
+
+    def pipeline(self, transaction=True):
+        return StubPipeline(self)
+
+    def xrevrange(self, key, max="+", min="-", count=None, _counted=False):
+        self._count("xrevrange", _counted)
+        return []
+
+    def xread(self, streams, count=None, block=None, _counted=False):
+        self._count("xread", _counted)
+        time.sleep((block or 0) / 1000)
+        return []
+
+
+# --- backend data ---
+
+def synthetic_rows(dates, history_hours, seed=1):
+    # Hourly contracts for `dates` delivery days starting today, one signal and
+    # one snapshot every SIGNAL_STEP_MINUTES over the last history_hours
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    today = now.date()
+    codes = [f"PH{(today + timedelta(days=d)).strftime('%y%m%d')}{h:02d}" for d in range(dates) for h in range(24)]
+    minutes = [now - timedelta(minutes=m) for m in range(0, history_hours * 60, SIGNAL_STEP_MINUTES)][::-1]
+
+    signals, snapshots = [], []
+    for code in codes:
+        price = rng.uniform(2000, 3000)
+        tape = []
+        for minute in minutes:
+            value = round(rng.uniform(-0.6, 0.6), 3)
+            stamp = minute.isoformat()
+            signals.append({
+                "contract": code,
+                "snapshot_minute": stamp,
+                "timeSignal": value,
+                "tradeSignal": "OPEN_LONG" if value > 0.3 else "OPEN_SHORT" if value < -0.3 else "HOLD",
+            })
+            price += rng.uniform(-5, 5)
+            if rng.random() < 0.5:
+                tape.insert(0, {"p": round(price, 2), "q": rng.randint(1, 20), "t": int(minute.timestamp())})
+                del tape[50:]
+            snapshots.append({
+                "contract": code,
+                "snapshot_minute": stamp,
+                "board": {"mcp": round(price, 2), "averagePrice": round(price + 3, 2), "lastPrice": round(price + 1, 2)},
+                "depth": {
+                    "bid": [[round(price - 2 * i, 1), rng.randint(1, 50)] for i in range(1, 21)],
+                    "ask": [[round(price + 2 * i, 1), rng.randint(1, 50)] for i in range(1, 21)],
+                },
+                "trades": list(tape),
+                "remaining_time_sec": 3600,
+            })
+    return signals, snapshots
+
+
+def _read_export(directory, table):
+    paths = sorted(glob.glob(os.path.join(directory, f"{table}-*.csv")))
+    parts = [pd.read_csv(path) for path in paths]
+    parquet = sorted(glob.glob(os.path.join(directory, f"{table}-*.parquet")))
+    if parquet:
+        parts.extend(pd.read_parquet(path) for path in parquet)
+    if not parts:
+        return []
+    df = pd.concat(parts, ignore_index=True).astype(object)
+    df = df.where(df.notna(), None)
+    rows = df.to_dict("records")
+    for row in rows:
+        for column in ("board", "depth", "trades"):
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+    return rows
+
+
+def replayed_rows(directory):
+    # backfill.py export (CSV or Parquet), shifted so the newest minute is now
+    signals = _read_export(directory, "signals")
+    snapshots = _read_export(directory, "snapshots")
+    stamps = [row['snapshot_minute'] for row in signals + snapshots]
+    if not stamps:
+        raise SystemExit(f"No signals-*/snapshots-* export files in {directory}")
+    shift = pd.Timestamp.now(tz='UTC').floor('min') - pd.to_datetime(max(stamps, key=pd.Timestamp), utc=True)
+    shifted = {}
+    for row in signals + snapshots:
+        stamp = row['snapshot_minute']
+        if stamp not in shifted:
+            shifted[stamp] = (pd.to_datetime(stamp, utc=True) + shift).isoformat()
+        row['snapshot_minute'] = shifted[stamp]
+    return signals, snapshots
+
+
+def board_for(signals, window_minutes=60):
+    # Contracts with a signal in the last window_minutes are on the board
+    if not signals:
+        return {}
+    newest = max(pd.Timestamp(row['snapshot_minute']) for row in signals)
+    since = newest - pd.Timedelta(minutes=window_minutes)
+    return {row['contract']: {"status": "OPEN"} for row in signals if pd.Timestamp(row['snapshot_minute']) >= since}
+
+
+# --- sessions ---
+
+def _widget(elements, label=None, key=None):
+    for element in elements:
+        if (key is not None and element.key == key) or (label is not None and element.label == label):
+            return element
+    return None
+
+
+def _set_radio(at, value, label=None, key=None):
+    radio = _widget(at.radio, label=label, key=key)
+    if radio is not None:
+        radio.set_value(value)
+
+
+def _pick_timeline_contracts(at):
+    multiselect = _widget(at.multiselect, key="timeline_contracts")
+    if multiselect is not None and multiselect.options:
+        multiselect.set_value(multiselect.options[:2])
+
+
+def _step_snapshots(at):
+    button = _widget(at.button, key="snap_next")
+    if button is None or button.disabled:
+        button = _widget(at.button, key="snap_prev")
+    if button is not None and not button.disabled:
+        button.click()
+
+
+# View a session parks on after its first run. Tabs all render on every
+# rerun; the view decides which branches of them do work.
+VIEWS = {
+    "list": lambda at: None,
+    "heatmap": lambda at: _set_radio(at, "Heatmap", label="View Mode"),
+    "matrix": lambda at: _set_radio(at, "Matrix", label="View Mode"),
+    "timeline": _pick_timeline_contracts,
+    "snapshots": _step_snapshots,
+    "activity": lambda at: _set_radio(at, "delivery_hour", key="activity_group"),
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in VIEWS:
+            raise argparse.ArgumentTypeError(f"Unknown view {name!r}, expected one of {', '.join(VIEWS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Session:
+    def __init__(self, view, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.view = view
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.latencies = []
+        self.errors = 0
+
+    def rerun(self, record=True):
+        started = time.perf_counter()
+        try:
+            self.at.run()
+            failed = len(self.at.exception) > 0
+        except Exception as e:
+            print(f"Error in {self.view} session: {e}")
+            failed = True
+        if record:
+            self.latencies.append(time.perf_counter() - started)
+            self.errors += failed
+
+    def open(self):
+        # First visit, then park on the view; neither is measured
+        self.rerun(record=False)
+        VIEWS[self.view](self.at)
+        self.rerun(record=False)
+
+
+def share_runtime():
+    # AppTest installs a mock Runtime for the length of each run and removes it
+    # when the run ends, which breaks the runs still going in other sessions.
+    # Keep one mock for whenever no run has installed its own.
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or shared)
+    Runtime.exists = classmethod(lambda cls: True)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _in_parallel(sessions, fn):
+    threads = [threading.Thread(target=fn, args=(s,)) for s in sessions]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_level(n, args, mix, stats):
+    import result_cache
+
+    rng = random.Random(n)
+    views = rng.choices(list(mix), weights=list(mix.values()), k=n)
+    result_cache.cache.clear()
+    sessions = [Session(view, args.timeout) for view in views]
+    _in_parallel(sessions, Session.open)
+
+    # Every session waits at the boundary, then all rerun at once
+    boundary = threading.Barrier(n + 1)
+    done = threading.Barrier(n + 1)
+
+    def refresh(session):
+        for _ in range(args.waves):
+            boundary.wait()
+            session.rerun()
+            done.wait()
+
+    threads = [threading.Thread(target=refresh, args=(s,)) for s in sessions]
+    for t in threads:
+        t.start()
+
+    wall = cpu = stub_cpu = 0.0
+    requests = {}
+    peak_rss = _rss_mb()
+    for _ in range(args.waves):
+        if args.expire:
+            result_cache.cache.clear()
+        before, before_stub = stats.snapshot()
+        started, started_cpu = time.perf_counter(), time.process_time()
+        boundary.wait()
+        done.wait()
+        wall += time.perf_counter() - started
+        cpu += time.process_time() - started_cpu
+        after, after_stub = stats.snapshot()
+        stub_cpu += after_stub - before_stub
+        for key, count in after.items():
+            requests[key] = requests.get(key, 0) + count - before.get(key, 0)
+        peak_rss = max(peak_rss, _rss_mb())
+        if args.pause:
+            time.sleep(args.pause)
+    for t in threads:
+        t.join()
+
+    latencies = np.array([l for s in sessions for l in s.latencies]) * 1000
+    per_wave = {key: count / args.waves for key, count in sorted(requests.items()) if count}
+    return {
+        "sessions": n,
+        "views": {view: views.count(view) for view in mix},
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "wave_s": wall / args.waves,
+        "app_cpu_s": (cpu - stub_cpu) / args.waves,
+        "cpu_util": (cpu - stub_cpu) / wall if wall else 0.0,
+        "rss_mb": peak_rss,
+        "supabase_per_wave": sum(v for k, v in per_wave.items() if k.startswith("supabase:")),
+        "redis_per_wave": sum(v for k, v in per_wave.items() if k.startswith("redis:")),
+        "requests_per_wave": per_wave,
+        "errors": sum(s.errors for s in sessions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate N concurrent sessions refreshing together against stubbed or replayed backends.")
+    parser.add_argument("--sessions", default="1,5,10,25", help="Comma-separated session counts to step through")
+    parser.add_argument("--waves", type=int, default=5, help="Synchronized auto-refresh waves per session count")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Weighted views (default {DEFAULT_MIX})")
+    parser.add_argument("--expire", action="store_true", help="Clear the result cache before each wave (TTL expiry at the boundary)")
+    parser.add_argument("--replay", help="Directory with a backfill.py export (signals-*, snapshots-*) to serve instead of synthetic rows")
+    parser.add_argument("--dates", type=int, default=2, help="Synthetic delivery days, 24 hourly contracts each")
+    parser.add_argument("--history-hours", type=int, default=6, help="Synthetic hours of signals and snapshots")
+    parser.add_argument("--table-scans", action="store_true", help="Serve the app without the latest_signals view and RPCs")
+    parser.add_argument("--supabase-ms", type=float, default=25, help="Latency added to each Supabase request")
+    parser.add_argument("--redis-ms", type=float, default=1, help="Latency added to each Redis round trip")
+    parser.add_argument("--pause", type=float, default=0, help="Seconds between waves")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds one rerun may take before it counts as failed")
+    parser.add_argument("--slo-ms", type=float, default=2000, help="p95 rerun latency the scaling limit is measured against")
+    parser.add_argument("--json", help="Also write the results (with per-target request counts) to this file")
+    args = parser.parse_args()
+
+    if args.replay:
+        signals, snapshots = replayed_rows(args.replay)
+    else:
+        signals, snapshots = synthetic_rows(args.dates, args.history_hours)
+    print(f"Backend: {len(signals)} signals, {len(snapshots)} snapshots, {len(board_for(signals))} contracts on the board")
+
+    stats = BackendStats()
+    client = StubSupabase(signals, snapshots, stats, args.supabase_ms / 1000, server_paths=not args.table_scans)
+    r = StubRedis(board_for(signals), stats, args.redis_ms / 1000)
+    resources.get_supabase = lambda: client
+    resources.get_redis = lambda: r
+    share_runtime()
+
+    results = []
+    print(f"{'sessions':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'cpu s':>7} {'cpu %':>6} {'rss MB':>7} {'sb req':>7} {'redis':>7} {'errors':>6}")
+    for n in [int(s) for s in args.sessions.split(",") if s]:
+        result = run_level(n, args, args.mix, stats)
+        results.append(result)
+        print(f"{n:>8} {result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} {result['p99_ms']:>8.0f} {result['max_ms']:>8.0f} "
+              f"{result['app_cpu_s']:>7.2f} {result['cpu_util'] * 100:>6.0f} {result['rss_mb']:>7.0f} "
+              f"{result['supabase_per_wave']:>7.1f} {result['redis_per_wave']:>7.1f} {result['errors']:>6}")
+
+    within = [r['sessions'] for r in results if r['p95_ms'] <= args.slo_ms and not r['errors']]
+    print(f"Largest session count with p95 <= {args.slo_ms:.0f} ms: {max(within) if within else 'none'}")
+    print("cpu s: app CPU per wave, stub CPU excluded; sb req / redis: round trips per wave, background threads included")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k != "mix"}, "mix": args.mix, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
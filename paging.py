@@ -0,0 +1,38 @@
+# Keyset pagination over tables ordered by (snapshot_minute, contract). No
+# dependencies, so the app can import it without pulling in the CLI tools.
+
+PAGE_SIZE = 1000
+
+
+def keyset_pages(client, table, columns, start=None, end=None, cursor=None, page_size=PAGE_SIZE, where=None):
+    # Walks [start, end) ordered by (snapshot_minute, contract). Each page starts
+    # strictly after the last row of the previous one, so cost does not grow with
+    # depth and concurrent inserts cannot shift rows between pages.
+    # where: optional function adding filters to the query (e.g. a contract match)
+    while True:
+        query = client.table(table).select(columns)
+        if start is not None:
+            query = query.gte("snapshot_minute", start)
+        if end is not None:
+            query = query.lt("snapshot_minute", end)
+        if where is not None:
+            query = where(query)
+        if cursor:
+            minute, contract = cursor
+            query = query.or_(
+                f'snapshot_minute.gt."{minute}",'
+                f'and(snapshot_minute.eq."{minute}",contract.gt."{contract}")'
+            )
+        response = query \
+            .order("snapshot_minute", desc=False) \
+            .order("contract", desc=False) \
+            .limit(page_size) \
+            .execute()
+
+        rows = response.data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1]['snapshot_minute'], rows[-1]['contract'])
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pandas as pd
+
+# Signals land at minutes ending in 2 or 6 and sessions rerun 20 seconds (plus
+# their jitter) later; see get_next_refresh_interval in app.py.
+ARRIVAL_MINUTES = [2, 6, 12, 16, 22, 26, 32, 36, 42, 46, 52, 56]
+POLL_SECONDS = 3
+POLL_LIMIT = 90  # Give up on a boundary whose data has not shown up by then
+INGEST_LAG = 5  # Seconds the rest of the batch may trail the polled contract
+BASELINE_LEAD = 10  # Seconds before a boundary the pre-boundary minute is read
+
+
+def next_arrival(now):
+    # First arrival minute strictly after `now` (tz-aware), at :00 seconds
+    base = now.floor('min')
+    for minute in ARRIVAL_MINUTES:
+        candidate = base.replace(minute=minute)
+        if candidate > now:
+            return candidate
+    return (base + pd.Timedelta(hours=1)).replace(minute=ARRIVAL_MINUTES[0])
+
+
+def latest_minute(client, contract):
+    # Newest signal minute of one contract; every contract arrives in the same batch
+    response = client.table("signals").select("snapshot_minute").eq("contract", contract) \
+        .order("snapshot_minute", desc=True).limit(1).execute()
+    return pd.Timestamp(response.data[0]['snapshot_minute']) if response.data else None
+
+
+class CachePrewarmer:
+    # Refills the shared caches right after each arrival boundary so sessions
+    # rerunning at :20 find them warm. Shortly before every boundary it reads
+    # the probe contract's newest signal minute; after the boundary it polls
+    # until that contract has a newer one, waits INGEST_LAG for the rest of
+    # the batch, then calls warm(), which reloads the caches. The probe is
+    # asked for its contract each time, so a contract that stops trading is
+    # replaced. One per process.
+
+    def __init__(self, client, probe, warm):
+        self.client = client
+        self.probe = probe  # () -> contract to poll, or None
+        self.warm = warm
+        self._stop = threading.Event()
+        self._thread = None
+        self.probed = None  # Contract `seen` belongs to
+        self.seen = None
+        self.warmed = 0
+        self.errors = 0
+        self.last = {}
+
+    def wait_for_data(self, boundary):
+        # Seconds after the boundary the new minute became visible, None on timeout
+        contract = self.probe()
+        if contract is None:
+            return None
+        if contract != self.probed:
+            # A minute of another contract says nothing about this one
+            self.probed, self.seen = contract, None
+        deadline = time.monotonic() + POLL_LIMIT
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            minute = latest_minute(self.client, contract)
+            if minute is not None and self.seen is None:
+                # No minute from before the boundary to compare with: this one
+                # may be the old batch, so it only becomes the baseline
+                self.seen = minute
+            elif minute is not None and minute > self.seen:
+                self.seen = minute
+                return (pd.Timestamp.now(tz='UTC') - boundary).total_seconds()
+            self._stop.wait(POLL_SECONDS)
+        return None
+
+    def take_baseline(self):
+        # Newest minute before the boundary, so the boundary's data is recognised as new
+        contract = self.probe()
+        self.probed = contract
+        self.seen = latest_minute(self.client, contract) if contract is not None else None
+
+    def run_once(self, boundary):
+        visible_after = self.wait_for_data(boundary)
+        if visible_after is None:
+            self.last = {"boundary": boundary.isoformat(), "visible_after_sec": None}
+            return False
+        if self._stop.wait(INGEST_LAG):
+            return False
+        started = time.perf_counter()
+        self.warm()
+        self.warmed += 1
+        self.last = {
+            "boundary": boundary.isoformat(),
+            "visible_after_sec": round(visible_after, 1),
+            "warm_sec": round(time.perf_counter() - started, 2),
+        }
+        return True
+
+    def _until(self, moment):
+        # Sleeps until `moment`; True if stopped meanwhile
+        return self._stop.wait(max(0.0, (moment - pd.Timestamp.now(tz='UTC')).total_seconds()))
+
+    def _run(self):
+        while not self._stop.is_set():
+            boundary = next_arrival(pd.Timestamp.now(tz='UTC'))
+            if self._until(boundary - pd.Timedelta(seconds=BASELINE_LEAD)):
+                break
+            try:
+                self.take_baseline()
+            except Exception as e:
+                print(f"Error reading the prewarm baseline: {e}")
+            if self._until(boundary):
+                break
+            try:
+                self.run_once(boundary)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error prewarming caches: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cache-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "warmed": self.warmed,
+            "errors": self.errors,
+            "probe": self.probed,
+            "seen": self.seen.isoformat() if self.seen is not None else None,
+            "last": self.last,
+        }
@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Opt-in sampling profiler for one script run of app.py. Enabled with
+# APP_PROFILE=1 (every rerun) or ?profile=1 in the URL (that session's
+# reruns). A thread samples the script thread's stack every few
+# milliseconds; when the mode is off nothing is started, so the only cost
+# is the check in requested().
+#
+# Each profile is saved to PROFILE_DIR as collapsed stacks (<name>.collapsed,
+# one "frame;frame;frame count" line per stack, readable by speedscope or
+# flamegraph.pl) plus <name>.json with the report shown in the debug panel.
+# A run that ends early (st.rerun, st.stop, an exception) never reaches the
+# stop()/save() at the bottom of app.py; the sampler notices that the
+# script's module frame has left the stack and saves the profile itself.
+
+PROFILE_DIR = os.getenv("APP_PROFILE_DIR", "profiles")
+INTERVAL = float(os.getenv("APP_PROFILE_INTERVAL_MS", "5")) / 1000
+MAX_SECONDS = 120  # Cap on the sampling of one run, in case its end is never seen
+TOP_N = 25
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Library a sample's innermost frame is in -> what the time is spent on
+CATEGORIES = [
+    ("pandas", ("/pandas/", "/numpy/", "/pyarrow/")),
+    ("plotly", ("/plotly/", "/_plotly_utils/", "streamlit_plotly_events")),
+    ("backend", ("/supabase/", "/postgrest/", "/httpx/", "/httpcore/", "/redis/", "/ssl.py", "/socket.py")),
+    ("streamlit", ("/streamlit/", "/google/protobuf/")),
+    ("imports", ("<frozen importlib",)),
+]
+
+
+def requested(query_params=None):
+    if os.getenv("APP_PROFILE", "") not in ("", "0"):
+        return True
+    return query_params is not None and query_params.get("profile") not in (None, "", "0")
+
+
+def _label(frame):
+    code = frame.f_code
+    path = code.co_filename
+    if path.startswith(REPO_DIR):
+        name = os.path.relpath(path, REPO_DIR)
+        # Module-level code of app.py is one long "function"; the line tells views apart
+        if code.co_name == "<module>":
+            return f"{name}:{frame.f_lineno}"
+        return f"{name}:{code.co_name}"
+    parts = path.replace("\\", "/").split("/site-packages/")
+    module = parts[-1] if len(parts) > 1 else os.path.basename(path)
+    return f"{module}:{code.co_name}"
+
+
+def _category(path):
+    path = path.replace("\\", "/")
+    if path.startswith(REPO_DIR):
+        return "app"
+    for category, markers in CATEGORIES:
+        if any(marker in path for marker in markers):
+            return category
+    return "other"
+
+
+class RerunProfile:
+
+    def __init__(self, thread_id=None, interval=INTERVAL, script=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.script = os.path.abspath(script) if script else None  # Run ends when its module frame is gone
+        self._script_frame = None
+        self.saved = None            # Base path of the saved profile
+        self.stacks = Counter()      # Tuple of frame labels (outermost first) -> samples
+        self.attributed = Counter()  # (innermost repo frame, category) -> samples
+        self.paths = Counter()       # Outermost to innermost repo frame, plus what it called -> samples
+        self.samples = 0
+        self.started = None
+        self.seconds = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return False
+        labels = []  # Innermost first
+        repo = []    # Positions of our frames in labels
+        in_script = self.script is None
+        category = _category(frame.f_code.co_filename)
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(REPO_DIR):
+                repo.append(len(labels))
+            if frame is self._script_frame:
+                in_script = True
+            labels.append(_label(frame))
+            frame = frame.f_back
+        if not in_script:
+            return False  # The script run is over
+        self.stacks[tuple(reversed(labels))] += 1
+        if repo:
+            self.paths[tuple(reversed(labels[max(repo[0] - 1, 0):repo[-1] + 1]))] += 1
+        self.attributed[(labels[repo[0]] if repo else "-", category)] += 1
+        self.samples += 1
+        return True
+
+    def _run(self):
+        deadline = time.perf_counter() + MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            if not self._sample():
+                break
+        self._script_frame = None
+        if not self._stop.is_set():
+            # Ended without stop(): the run was cut short, so save it here
+            self.seconds = time.perf_counter() - self.started
+            try:
+                self.save(tag="rerun-ended")
+            except Exception as e:
+                print(f"Error saving rerun profile: {e}")
+
+    def start(self):
+        if self.script is not None:
+            # This run's module frame; the next rerun executes in a new one
+            frame = sys._current_frames().get(self.thread_id)
+            while frame is not None and not (frame.f_code.co_name == "<module>" and frame.f_code.co_filename == self.script):
+                frame = frame.f_back
+            self._script_frame = frame
+            if frame is None:
+                self.script = None  # Not started from the script; only stop() or the cap end it
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="rerun-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    def report(self, top=TOP_N):
+        # Hot functions by self and total samples, time per (our function, category), hottest paths
+        self_samples = Counter()
+        total_samples = Counter()
+        for stack, count in self.stacks.items():
+            if stack:
+                self_samples[stack[-1]] += count
+            for label in set(stack):
+                total_samples[label] += count
+
+        share = lambda count: round(100 * count / self.samples, 1) if self.samples else 0.0
+        functions = sorted(
+            ({"function": label, "self_pct": share(self_samples[label]), "total_pct": share(count)}
+             for label, count in total_samples.items()),
+            key=lambda f: (f["self_pct"], f["total_pct"]),
+            reverse=True,
+        )
+
+        categories = Counter()
+        for (_, category), count in self.attributed.items():
+            categories[category] += count
+
+        return {
+            "seconds": round(self.seconds or 0.0, 3),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "categories": {c: share(n) for c, n in categories.most_common()},
+            "functions": functions[:top],
+            "attribution": [
+                {"function": ours, "category": category, "pct": share(count)}
+                for (ours, category), count in self.attributed.most_common(top)
+            ],
+            "paths": [
+                {"path": " > ".join(path), "pct": share(count)}
+                for path, count in self.paths.most_common(10)
+            ],
+        }
+
+    def save(self, tag="rerun"):
+        # Writes <PROFILE_DIR>/<time>-<tag>.collapsed and .json; returns the base path
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{tag}")
+        with open(base + ".collapsed", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(";".join(label.replace(";", ",") for label in stack) + f" {count}\n")
+        with open(base + ".json", "w") as f:
+            json.dump(self.report(), f, indent=2)
+        self.saved = base
+        return base
@@ -0,0 +1,63 @@
+import threading
+
+# Client side of supabase/migrations/*_app_query_functions.sql. Each helper
+# returns None when the function is not deployed, and callers then use
+# their plain table query instead. Other errors are raised: falling back to a
+# heavier table query would only add load to a backend that is failing.
+
+SIGNAL_COLUMNS = "contract, tradeSignal, timeSignal, snapshot_minute"
+LATEST_SIGNALS_RPC = "latest_signals_for"
+CONTRACTS_RPC = "recent_delivery_contracts"
+MINUTES_RPC = "snapshot_minutes"
+
+# PostgREST/Postgres codes for "no such function/relation": the migration is not applied
+MISSING_CODES = {"PGRST202", "PGRST205", "42P01", "42883"}
+
+_missing = set()
+_lock = threading.Lock()
+
+
+def _call(name, fn):
+    if name in _missing:
+        return None
+    try:
+        return fn()
+    except Exception as e:
+        if getattr(e, "code", None) in MISSING_CODES:
+            # Remember for this process so every rerun does not pay a failed request
+            with _lock:
+                _missing.add(name)
+            print(f"{name} is not deployed, using table queries: {e}")
+            return None
+        print(f"Error calling {name}: {e}")
+        raise
+
+
+def latest_signals(client, contracts):
+    # Latest signal of each contract in one request
+    return _call(LATEST_SIGNALS_RPC, lambda: client.rpc(LATEST_SIGNALS_RPC, {"p_contracts": list(contracts)})
+                 .execute().data or [])
+
+
+def recent_delivery_contracts(client, max_dates=3):
+    # {"YYYY-MM-DD": [contracts]} for the most recent delivery dates
+    rows = _call(CONTRACTS_RPC, lambda: client.rpc(CONTRACTS_RPC, {"max_dates": max_dates}).execute().data or [])
+    if rows is None:
+        return None
+    structure = {}
+    for row in rows:
+        structure.setdefault(row['delivery_date'], []).append(row['contract'])
+    return structure
+
+
+def snapshot_minutes(client, contract):
+    # Snapshot minutes of one contract, newest first
+    rows = _call(MINUTES_RPC, lambda: client.rpc(MINUTES_RPC, {"p_contract": contract}).execute().data or [])
+    if rows is None:
+        return None
+    return [row['snapshot_minute'] for row in rows]
+
+
+def available():
+    # Which server-side paths are in use in this process
+    return {name: name not in _missing for name in (LATEST_SIGNALS_RPC, CONTRACTS_RPC, MINUTES_RPC)}
@@ -0,0 +1,48 @@
+import functools
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# Process-wide clients, built once and shared with every session and rerun
+# (and with api.py, which runs without Streamlit). Failures are not cached,
+# so a later call retries.
+
+
+def _shared(factory):
+    lock = threading.Lock()
+    built = []
+
+    @functools.wraps(factory)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(factory())
+        return built[0]
+    return get
+
+
+@_shared
+def load_env():
+    load_dotenv()
+    return True
+
+
+@_shared
+def get_supabase():
+    load_env()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_API_KEY")
+    if not url or not key:
+        return None
+
+    from supabase import create_client
+    return create_client(url, key)
+
+
+@_shared
+def get_redis():
+    load_env()
+    import functions
+    return functions.connect_to_redis()
@@ -0,0 +1,323 @@
+import copy
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import breaker
+import frames
+
+# Process-wide cache for fetcher results with a memory budget in bytes.
+# Entries are fresh for their function's TTL; when the budget is exceeded the
+# least recently used entries go first, whichever function they belong to.
+# Concurrent misses on the same key share one call (single-flight), so
+# sessions refreshing together do not each run the same query.
+# Replaces st.cache_data for the data.py fetchers, which had no bound besides
+# the TTL and grew one DataFrame per contract ever viewed.
+#
+# Stale-while-revalidate: for max_stale seconds past its TTL an entry is
+# still served, at once, while one background call reloads it. A failed
+# reload leaves the old entry in place. With a circuit breaker, loads are
+# skipped while the backend is considered down, so the stale entry keeps
+# being served without adding load.
+
+DEFAULT_BUDGET_MB = 256
+DEFAULT_MAX_STALE = 3600
+
+
+def estimate_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _private(value):
+    # What a caller gets for a cached value: a copy it may change freely.
+    # DataFrames/Series go through frames.view (no data copy under
+    # copy-on-write); dicts and lists (contract lists, market structure) are
+    # small and are copied whole.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return frames.view(value)
+    if isinstance(value, (dict, list, set)):
+        return copy.deepcopy(value)
+    return value
+
+
+def _freeze(value):
+    # Cache key for arguments; lists (e.g. active contracts) become tuples
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class _Call:
+    # One in-flight load; callers arriving while it runs wait for its result
+
+    def __init__(self, background=False):
+        self.background = background  # A stale-while-revalidate reload; value is not returned
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # (name, key) -> (fresh_until, stale_until, nbytes, value, loaded_at)
+        self._calls = {}  # (name, key) -> _Call being loaded
+        self._stats = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _counters(self, name):
+        return self._stats.setdefault(name, {
+            "hits": 0, "misses": 0, "coalesced": 0, "stale": 0, "revalidations": 0, "failures": 0,
+            "rejected": 0, "evictions": 0, "expired": 0, "too_large": 0, "entries": 0, "bytes": 0,
+        })
+
+    def _drop(self, entry_key, reason):
+        nbytes = self._entries.pop(entry_key)[2]
+        self._bytes -= nbytes
+        counters = self._counters(entry_key[0])
+        counters["entries"] -= 1
+        counters["bytes"] -= nbytes
+        if reason:
+            counters[reason] += 1
+
+    def _live(self, entry_key, now):
+        # Entry that is fresh or still servable as stale, else None (dropping it); caller holds the lock
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._drop(entry_key, "expired")
+            return None
+        self._entries.move_to_end(entry_key)
+        return entry
+
+    def get(self, name, key):
+        # (found, value) for a fresh entry
+        with self._lock:
+            counters = self._counters(name)
+            entry = self._live((name, key), time.monotonic())
+            if entry is not None and entry[0] > time.monotonic():
+                counters["hits"] += 1
+                return True, entry[3]
+            counters["misses"] += 1
+            return False, None
+
+    def put(self, name, key, value, ttl, max_stale=0):
+        nbytes = estimate_bytes(value)
+        entry_key = (name, key)
+        with self._lock:
+            counters = self._counters(name)
+            if nbytes > self.budget_bytes // 4:
+                # One result may not take over the cache
+                counters["too_large"] += 1
+                return
+            if entry_key in self._entries:
+                self._drop(entry_key, None)
+
+            now = time.monotonic()
+            for k in [k for k, e in self._entries.items() if e[1] <= now]:
+                self._drop(k, "expired")
+            while self._entries and self._bytes + nbytes > self.budget_bytes:
+                self._drop(next(iter(self._entries)), "evictions")
+
+            self._entries[entry_key] = (now + ttl, now + ttl + max_stale, nbytes, value, time.time())
+            self._bytes += nbytes
+            counters["entries"] += 1
+            counters["bytes"] += nbytes
+
+    def stale_as_of(self, name, key):
+        # Wall time a stale entry was loaded; None when the entry is fresh or missing
+        with self._lock:
+            entry = self._entries.get((name, key))
+            if entry is None or entry[0] > time.monotonic():
+                return None
+            return entry[4]
+
+    def _load(self, name, key, load, ttl, max_stale, circuit):
+        if circuit is not None and not circuit.allow():
+            with self._lock:
+                self._counters(name)["rejected"] += 1
+            raise breaker.CircuitOpenError(f"{circuit.name} is unavailable, not loading {name}")
+        try:
+            value = load()
+        except BaseException as e:
+            # Interrupted loads count too, so a half-open trial is always reported
+            with self._lock:
+                self._counters(name)["failures"] += 1
+            if circuit is not None:
+                circuit.record_failure(e)
+            raise
+        if circuit is not None:
+            circuit.record_success()
+        self.put(name, key, value, ttl, max_stale)
+        return value
+
+    def _run_call(self, entry_key, call, load):
+        try:
+            call.value = load()
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(entry_key, None)
+            call.done.set()
+
+    def _revalidate(self, name, key, load, ttl, max_stale, circuit):
+        try:
+            self._load(name, key, load, ttl, max_stale, circuit)
+        except breaker.CircuitOpenError:
+            pass
+        except Exception as e:
+            print(f"Error refreshing {name} in the background: {e}")
+
+    def get_or_load(self, name, key, load, ttl, max_stale=0, circuit=None):
+        # (value, stale_as_of), stale_as_of being None for a fresh result and
+        # the wall time a stale one was loaded. A fresh entry is returned as
+        # is. A stale one is returned at once and reloaded by one background
+        # call. Otherwise the first caller loads and the others wait for it;
+        # errors (including CircuitOpenError) are raised to every waiting caller.
+        entry_key = (name, key)
+        with self._lock:
+            counters = self._counters(name)
+            now = time.monotonic()
+            entry = self._live(entry_key, now)
+            if entry is not None and entry[0] > now:
+                counters["hits"] += 1
+                return entry[3], None
+
+            call = self._calls.get(entry_key)
+            leader = call is None
+            if leader:
+                call = self._calls[entry_key] = _Call(background=entry is not None)
+
+            if entry is not None:
+                counters["stale"] += 1
+                if leader:
+                    counters["revalidations"] += 1
+                    threading.Thread(
+                        target=self._run_call,
+                        args=(entry_key, call, lambda: self._revalidate(name, key, load, ttl, max_stale, circuit)),
+                        name=f"revalidate-{name}",
+                        daemon=True,
+                    ).start()
+                return entry[3], entry[4]
+
+            if leader:
+                counters["misses"] += 1
+            else:
+                counters["coalesced"] += 1
+
+        if leader:
+            self._run_call(entry_key, call, lambda: self._load(name, key, load, ttl, max_stale, circuit))
+        else:
+            call.done.wait()
+        if call.background:
+            # Waited on a background reload (the entry was dropped meanwhile); look again
+            return self.get_or_load(name, key, load, ttl, max_stale, circuit)
+        if call.error is not None:
+            raise call.error
+        return call.value, None
+
+    def reload(self, name, key, load, ttl, max_stale=0, circuit=None):
+        # Load and replace the entry now, fresh or not, without a window where
+        # callers miss. Runs as the key's single-flight call: a load already
+        # in flight is joined, and misses arriving meanwhile wait for this one.
+        entry_key = (name, key)
+        with self._lock:
+            call = self._calls.get(entry_key)
+            leader = call is None
+            if leader:
+                call = self._calls[entry_key] = _Call()
+            else:
+                self._counters(name)["coalesced"] += 1
+
+        if leader:
+            self._run_call(entry_key, call, lambda: self._load(name, key, load, ttl, max_stale, circuit))
+        else:
+            call.done.wait()
+        if call.background:
+            return self.get_or_load(name, key, load, ttl, max_stale, circuit)[0]
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def clear(self, name=None):
+        with self._lock:
+            for k in [k for k in self._entries if name is None or k[0] == name]:
+                self._drop(k, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self._bytes,
+                "entries": len(self._entries),
+                "functions": {name: dict(c) for name, c in self._stats.items()},
+            }
+
+
+cache = ResultCache(int(float(os.getenv("RESULT_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024))
+
+
+def cached(ttl, max_stale=0, circuit=None, default=None):
+    # Like st.cache_data(ttl=...), but every caller shares the one cached
+    # result. Each caller gets its own copy (see _private), so changing what
+    # it got, e.g. adding a column, never touches the cached value.
+    # Callers missing together wait for the first one's call instead of
+    # repeating it.
+    # max_stale: seconds past the TTL an entry is served while it reloads in
+    # the background. circuit: breaker.CircuitBreaker of the backend the
+    # function calls. default: factory for what to return when the load fails
+    # (or the circuit is open) and nothing is cached; without it the error is
+    # raised. Load errors are never cached.
+    # .clear() drops the function's entries, .refresh(*args) reloads one,
+    # .stale_as_of(*args) is the load time of a result served stale.
+    # .fetch(*args) is for callers that must tell "empty" from "failed": it
+    # raises instead of using the default and returns (value, stale_as_of).
+    def decorator(fn):
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (_freeze(args), _freeze(kwargs))
+            try:
+                value, _ = cache.get_or_load(name, key, lambda: fn(*args, **kwargs), ttl, max_stale, circuit)
+            except Exception:
+                if default is None:
+                    raise
+                return default()
+            return _private(value)
+
+        def fetch(*args, **kwargs):
+            value, stale_as_of = cache.get_or_load(name, (_freeze(args), _freeze(kwargs)), lambda: fn(*args, **kwargs), ttl, max_stale, circuit)
+            return _private(value), stale_as_of
+
+        def refresh(*args, **kwargs):
+            # Reload and replace the entry, without a window where callers miss
+            return _private(cache.reload(name, (_freeze(args), _freeze(kwargs)), lambda: fn(*args, **kwargs), ttl, max_stale, circuit))
+
+        wrapper.clear = lambda: cache.clear(name)
+        wrapper.fetch = fetch
+        wrapper.refresh = refresh
+        wrapper.stale_as_of = lambda *args, **kwargs: cache.stale_as_of(name, (_freeze(args), _freeze(kwargs)))
+        return wrapper
+    return decorator
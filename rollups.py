@@ -0,0 +1,224 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import contracts
+import frames
+import leases
+import paging
+
+ROLLUP_KEY = "signal_rollups:contracts"   # contract -> JSON of the counters below
+CURSOR_KEY = "signal_rollups:cursor"      # Latest snapshot_minute folded in
+LOCK_KEY = "signal_rollups:lock"
+LOCK_TTL = 300  # Renewed after every page, so only a stalled updater loses it
+HISTORY_START = "2000-01-01T00:00:00+00:00"
+
+# Additive counters, so a rollup can be extended with new rows and summed
+# across contracts. "beyond" counts signal minutes with |timeSignal| > 0.30.
+SUM_FIELDS = ["rows", "open_long", "open_short", "ts_count", "ts_sum", "beyond"]
+MAX_FIELDS = ["ts_max", "last"]
+MIN_FIELDS = ["ts_min"]
+
+
+def _aggregate(df):
+    # New signal rows -> one counter row per contract
+    # (float32 -> float64 widening turns 0.30 into 0.3000000119, hence the rounding)
+    ts = df['timeSignal'].astype('float64').round(6)
+    parts = pd.DataFrame({
+        'contract': df['contract'].astype(object),
+        'rows': 1,
+        'open_long': (df['tradeSignal'] == 'OPEN_LONG').astype(int),
+        'open_short': (df['tradeSignal'] == 'OPEN_SHORT').astype(int),
+        'ts_count': ts.notna().astype(int),
+        'ts_sum': ts.fillna(0),
+        'ts_max': ts,
+        'ts_min': ts,
+        'beyond': (ts.abs() > frames.THRESHOLD).astype(int),
+        'last': df['snapshot_minute'],
+    })
+    grouped = parts.groupby('contract', sort=False)
+    agg = grouped[SUM_FIELDS].sum()
+    agg['ts_max'] = grouped['ts_max'].max()
+    agg['ts_min'] = grouped['ts_min'].min()
+    agg['last'] = grouped['last'].max()
+    return agg
+
+
+def _combine(a, b, fn):
+    if a is None or pd.isna(a):
+        return b
+    if b is None or pd.isna(b):
+        return a
+    return fn(a, b)
+
+
+def _merge(old, new):
+    # Stored rollup (dict) + fresh counters (Series) -> JSON-ready dict
+    if old is None:
+        merged = {k: new[k] for k in SUM_FIELDS + MAX_FIELDS + MIN_FIELDS}
+    else:
+        merged = {k: old[k] + new[k] for k in SUM_FIELDS}
+        merged.update({k: _combine(old[k], new[k], max) for k in MAX_FIELDS})
+        merged.update({k: _combine(old[k], new[k], min) for k in MIN_FIELDS})
+
+    rollup = {k: int(merged[k]) for k in SUM_FIELDS if k != 'ts_sum'}
+    rollup['ts_sum'] = float(merged['ts_sum'])
+    for k in ('ts_max', 'ts_min'):
+        rollup[k] = None if merged[k] is None or pd.isna(merged[k]) else float(merged[k])
+    rollup['last'] = pd.Timestamp(merged['last']).isoformat()
+    return rollup
+
+
+def _load(value):
+    rollup = json.loads(value)
+    rollup['last'] = pd.Timestamp(rollup['last']) if rollup['last'] else None
+    return rollup
+
+
+class SignalRollups:
+    # Signal activity per contract, kept in Redis and extended with new rows
+    # only. A refresh reads from the stored cursor (minus the settle lag) and
+    # folds in rows newer than each contract's last folded minute, so its cost
+    # follows the number of new rows, not the size of the history. The first
+    # refresh ever walks the whole history once; run `python rollups.py` to
+    # do that ahead of time. In the app, refreshes run in a background thread
+    # and sessions read whatever Redis holds meanwhile.
+
+    def __init__(self, r, refresh_interval=60):
+        self.r = r
+        self.refresh_interval = refresh_interval
+        self.instance = uuid.uuid4().hex
+        self.refreshed_at = None
+        self.last_refresh = {}
+        self._frame = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def update(self, client):
+        # Returns the number of rows folded in; 0 if another process is updating
+        if not leases.acquire(self.r, LOCK_KEY, self.instance, LOCK_TTL):
+            return 0
+        try:
+            started = time.perf_counter()
+            cursor = self.r.get(CURSOR_KEY)
+            start = (pd.Timestamp(cursor) - frames.SETTLE_LAG).isoformat() if cursor else HISTORY_START
+            end = (pd.Timestamp.now(tz='UTC') + pd.Timedelta(days=1)).isoformat()
+
+            stored = {c: _load(v) for c, v in self.r.hgetall(ROLLUP_KEY).items()}
+            last = {c: v['last'] for c, v in stored.items()}
+            folded = 0
+            latest = pd.Timestamp(cursor) if cursor else None
+
+            for rows in paging.keyset_pages(client, "signals", frames.SIGNAL_COLUMNS, start, end):
+                if not leases.renew(self.r, LOCK_KEY, self.instance, LOCK_TTL):
+                    # Lost the lock (stalled past LOCK_TTL); whoever holds it now carries on
+                    raise RuntimeError("signal rollups lock lost during update")
+                df = frames.signals_frame(rows)
+                seen = pd.to_datetime(df['contract'].astype(object).map(last), utc=True)
+                fresh = df[seen.isna() | (df['snapshot_minute'] > seen)]
+                if fresh.empty:
+                    continue
+
+                pipe = self.r.pipeline(transaction=True)
+                for contract, counters in _aggregate(fresh).iterrows():
+                    rollup = _merge(stored.get(contract), counters)
+                    pipe.hset(ROLLUP_KEY, contract, json.dumps(rollup))
+                    stored[contract] = dict(rollup, last=pd.Timestamp(rollup['last']))
+                    last[contract] = stored[contract]['last']
+                page_latest = fresh['snapshot_minute'].max()
+                latest = page_latest if latest is None else max(latest, page_latest)
+                pipe.set(CURSOR_KEY, latest.isoformat())
+                pipe.execute()
+                folded += len(fresh)
+
+            self.last_refresh = {"rows": folded, "seconds": round(time.perf_counter() - started, 3)}
+            return folded
+        finally:
+            leases.release(self.r, LOCK_KEY, self.instance)
+
+    def _read(self):
+        records = []
+        for contract, value in self.r.hgetall(ROLLUP_KEY).items():
+            rollup = _load(value)
+            rollup['contract'] = contract
+            records.append(rollup)
+        df = pd.DataFrame(records, columns=['contract'] + SUM_FIELDS + MAX_FIELDS + MIN_FIELDS)
+        df['delivery_date'] = df['contract'].map(lambda c: contracts.date_label(contracts.date_key(c)) if contracts.parse(c) else None)
+        df['delivery_hour'] = df['contract'].map(contracts.delivery_hour)
+        return df.dropna(subset=['delivery_date'])
+
+    def _refresh(self, client):
+        try:
+            self.update(client)
+        except Exception as e:
+            print(f"Error updating signal rollups: {e}")
+        frame = self._read()
+        with self._lock:
+            self._frame = frame
+
+    def seeding(self):
+        # True until the history has been folded in once (by any process)
+        return self.r.get(CURSOR_KEY) is None
+
+    def contract_frame(self, client):
+        # Per-contract rollups as last read from Redis. At most every
+        # refresh_interval seconds a background thread folds in new rows and
+        # re-reads; callers never wait for it.
+        with self._lock:
+            due = self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_interval
+            if due and (self._thread is None or not self._thread.is_alive()):
+                self.refreshed_at = time.monotonic()
+                self._thread = threading.Thread(target=self._refresh, args=(client,), name="signal-rollups", daemon=True)
+                self._thread.start()
+            frame = self._frame
+        if frame is None:
+            # First call in this process: what other processes already folded in
+            frame = self._read()
+            with self._lock:
+                self._frame = self._frame if self._frame is not None else frame
+        return frame
+
+    def summary(self, client, by):
+        # by: 'contract', 'delivery_date' or 'delivery_hour'
+        df = self.contract_frame(client).copy()
+        if df.empty:
+            return pd.DataFrame()
+        if by != 'contract':
+            grouped = df.groupby(by)
+            df = grouped[SUM_FIELDS].sum()
+            df['ts_max'] = grouped['ts_max'].max()
+            df['ts_min'] = grouped['ts_min'].min()
+            df['contracts'] = grouped.size()
+            df = df.reset_index()
+
+        df['ts_mean'] = df['ts_sum'] / df['ts_count'].replace(0, np.nan)
+        df['beyond_share'] = df['beyond'] / df['rows'].replace(0, np.nan)
+        df = df.rename(columns={'beyond': 'minutes_beyond'}).drop(columns=['ts_sum', 'ts_count'])
+        # Newest delivery days first; hours and contracts in delivery order
+        return df.sort_values(by, ascending=by != 'delivery_date', ignore_index=True)
+
+
+def main():
+    # Folds the whole signal history into Redis once, so the app's first
+    # refresh only has to read new rows
+    parser = argparse.ArgumentParser(description="Build or extend the signal activity rollups in Redis.")
+    parser.parse_args()
+
+    import backfill
+    import functions
+    rollups = SignalRollups(functions.connect_to_redis())
+    started = time.perf_counter()
+    folded = rollups.update(backfill.get_client())
+    if folded == 0 and rollups.r.get(LOCK_KEY):
+        print("Another process is updating the rollups; try again when it is done.")
+    else:
+        print(f"Folded {folded} signal rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
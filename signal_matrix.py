@@ -0,0 +1,275 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import frames
+import paging
+
+# tradeSignal codes stored in the int8 matrix
+SIGNAL_CODES = {"OPEN_LONG": 1, "OPEN_SHORT": -1}
+
+
+def fetch_signal_rows(client, date_key, since=None):
+    # One logical query for every contract of a delivery date, keyset-paged;
+    # since: only rows at or after this minute
+    def where(query):
+        return query.like("contract", f"PH{date_key}%")
+
+    rows = []
+    for page in paging.keyset_pages(client, "signals", frames.SIGNAL_COLUMNS, start=since, where=where):
+        rows.extend(page)
+    return rows
+
+
+class DateBlock:
+    # Contracts x snapshot minutes for a single delivery date.
+    # Column capacity doubles as minutes arrive, so incremental appends stay cheap.
+    # A block handed out by the store is never changed again: new rows go into
+    # a copy that replaces it, so sessions can read it without a lock.
+
+    def __init__(self, date_key):
+        self.date_key = date_key
+        self.contracts = []
+        self.contract_pos = {}
+        self.minutes = np.empty(0, dtype="datetime64[ns]")
+        self.values = np.full((0, 0), np.nan, dtype=np.float32)
+        self.signals = np.zeros((0, 0), dtype=np.int8)
+        self.n_minutes = 0
+        self.last_minute = None  # Raw Supabase string, used as the incremental cursor
+        self.refreshed_at = 0.0
+        self._frame = None  # Built on demand, shared until new rows arrive
+
+    def copy(self):
+        clone = DateBlock(self.date_key)
+        clone.contracts = list(self.contracts)
+        clone.contract_pos = dict(self.contract_pos)
+        clone.minutes = self.minutes.copy()
+        clone.values = self.values.copy()
+        clone.signals = self.signals.copy()
+        clone.n_minutes = self.n_minutes
+        clone.last_minute = self.last_minute
+        clone.refreshed_at = self.refreshed_at
+        return clone
+
+    def settle_start(self):
+        # Where an incremental read starts: rows for the newest minutes can
+        # still be landing, so the last frames.SETTLE_LAG is read again
+        if self.last_minute is None:
+            return None
+        return (pd.Timestamp(self.last_minute) - frames.SETTLE_LAG).isoformat()
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.signals.nbytes + self.minutes.nbytes
+
+    def _ensure_capacity(self, n_contracts, n_minutes):
+        rows, cols = self.values.shape
+        if n_contracts <= rows and n_minutes <= cols:
+            return
+        new_rows = max(rows, n_contracts)
+        new_cols = cols
+        while new_cols < n_minutes:
+            new_cols = max(16, new_cols * 2)
+
+        values = np.full((new_rows, new_cols), np.nan, dtype=np.float32)
+        values[:rows, :cols] = self.values
+        signals = np.zeros((new_rows, new_cols), dtype=np.int8)
+        signals[:rows, :cols] = self.signals
+        minutes = np.empty(new_cols, dtype="datetime64[ns]")
+        minutes[:cols] = self.minutes
+
+        self.values, self.signals, self.minutes = values, signals, minutes
+
+    def apply_rows(self, rows):
+        if not rows:
+            return 0
+
+        self._frame = None
+        df = pd.DataFrame(rows)
+        df['snapshot_minute_raw'] = df['snapshot_minute']
+        df['snapshot_minute'] = pd.to_datetime(df['snapshot_minute'], utc=True).dt.tz_localize(None)
+        df['timeSignal'] = pd.to_numeric(df['timeSignal'], errors='coerce')
+
+        # New contracts become rows
+        for contract in pd.unique(df['contract']):
+            if contract not in self.contract_pos:
+                self.contract_pos[contract] = len(self.contracts)
+                self.contracts.append(contract)
+
+        # New minutes become columns
+        used = self.minutes[:self.n_minutes]
+        incoming = np.unique(df['snapshot_minute'].to_numpy(dtype="datetime64[ns]"))
+        new_minutes = incoming[~np.isin(incoming, used)]
+
+        self._ensure_capacity(len(self.contracts), self.n_minutes + len(new_minutes))
+
+        if len(new_minutes):
+            if self.n_minutes and new_minutes[0] < self.minutes[self.n_minutes - 1]:
+                # Out-of-order minute: re-sort the columns (rare)
+                merged = np.concatenate([used, new_minutes])
+                order = np.argsort(merged, kind="stable")
+                total = len(merged)
+                self.values[:, :total] = np.concatenate(
+                    [self.values[:, :self.n_minutes],
+                     np.full((self.values.shape[0], len(new_minutes)), np.nan, dtype=np.float32)],
+                    axis=1)[:, order]
+                self.signals[:, :total] = np.concatenate(
+                    [self.signals[:, :self.n_minutes],
+                     np.zeros((self.signals.shape[0], len(new_minutes)), dtype=np.int8)],
+                    axis=1)[:, order]
+                self.minutes[:total] = merged[order]
+            else:
+                self.minutes[self.n_minutes:self.n_minutes + len(new_minutes)] = new_minutes
+            self.n_minutes += len(new_minutes)
+
+        # Scatter values in one vectorized assignment
+        row_idx = df['contract'].map(self.contract_pos).to_numpy()
+        col_idx = np.searchsorted(self.minutes[:self.n_minutes], df['snapshot_minute'].to_numpy(dtype="datetime64[ns]"))
+        self.values[row_idx, col_idx] = df['timeSignal'].to_numpy(dtype=np.float32, na_value=np.nan)
+        self.signals[row_idx, col_idx] = df['tradeSignal'].map(SIGNAL_CODES).fillna(0).to_numpy(dtype=np.int8)
+
+        latest_raw = df['snapshot_minute_raw'].iloc[df['snapshot_minute'].to_numpy().argmax()]
+        if self.last_minute is None or pd.to_datetime(latest_raw, utc=True) > pd.to_datetime(self.last_minute, utc=True):
+            self.last_minute = latest_raw
+
+        return len(df)
+
+    def frame(self):
+        # Contracts (sorted rows) x minutes (Istanbul time columns); one copy per
+        # block version, handed to every session through frames.view
+        if self._frame is None:
+            order = np.argsort(self.contracts)
+            columns = pd.DatetimeIndex(self.minutes[:self.n_minutes]).tz_localize('UTC').tz_convert('Europe/Istanbul')
+            self._frame = pd.DataFrame(
+                self.values[:len(self.contracts), :self.n_minutes][order],
+                index=pd.Index([self.contracts[i] for i in order], name='contract'),
+                columns=columns,
+            )
+        return frames.view(self._frame)
+
+    def column_at(self, minute, asof=True):
+        # All contracts at a given minute
+        if not self.n_minutes:
+            return None
+        target = pd.Timestamp(minute)
+        target = (target.tz_localize('Europe/Istanbul') if target.tzinfo is None else target).tz_convert('UTC').tz_localize(None)
+        minutes = self.minutes[:self.n_minutes]
+        pos = np.searchsorted(minutes, np.datetime64(target, 'ns'), side='right') - 1
+        if pos < 0 or (not asof and minutes[pos] != np.datetime64(target, 'ns')):
+            return None
+
+        n = len(self.contracts)
+        values = self.values[:n, :pos + 1]
+        if asof:
+            # Last valid value per contract up to the target minute
+            valid = ~np.isnan(values)
+            last_idx = np.where(valid.any(axis=1), valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1), -1)
+            col = np.where(last_idx >= 0, values[np.arange(n), np.maximum(last_idx, 0)], np.nan)
+        else:
+            col = values[:, pos]
+        return pd.Series(col, index=pd.Index(self.contracts, name='contract'), name='timeSignal').sort_index()
+
+
+class _Call:
+    # One in-flight fetch per date; sessions missing the same date wait for it
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class SignalMatrixStore:
+    # Aligned signal matrices keyed by delivery date.
+    # Memory is bounded by max_dates; the least recently used date is dropped.
+    # Supabase is read outside the store lock, one fetch per date at a time: a
+    # date not held yet is waited for, a due refresh runs while the others
+    # keep reading the block they have.
+
+    def __init__(self, max_dates=3, refresh_interval=30):
+        self.max_dates = max_dates
+        self.refresh_interval = refresh_interval
+        self._blocks = {}
+        self._used = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, client, date_key, block, call):
+        fresh = None
+        try:
+            if block is None:
+                fresh = DateBlock(date_key)
+                fresh.apply_rows(fetch_signal_rows(client, date_key))
+            else:
+                # Incremental update: rows from the settle window on, applied to
+                # a copy so readers of the current block never see it change
+                rows = fetch_signal_rows(client, date_key, since=block.settle_start())
+                fresh = block.copy()
+                fresh.apply_rows(rows)
+        except Exception as e:
+            call.error = e
+            fresh = None
+            if block is not None:
+                print(f"Error refreshing signal matrix for {date_key}: {e}")
+        finally:
+            with self._lock:
+                try:
+                    if fresh is not None:
+                        fresh.refreshed_at = time.monotonic()
+                        self._blocks[date_key] = fresh
+                    elif block is not None:
+                        block.refreshed_at = time.monotonic()
+                finally:
+                    self._calls.pop(date_key, None)
+                    call.done.set()
+
+    def get(self, client, date_key):
+        with self._lock:
+            block = self._blocks.get(date_key)
+            due = block is None or time.monotonic() - block.refreshed_at >= self.refresh_interval
+            call = self._calls.get(date_key)
+            leader = due and call is None
+            if leader:
+                call = self._calls[date_key] = _Call()
+
+        if leader:
+            self._fetch(client, date_key, block, call)
+        if block is None:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+        with self._lock:
+            block = self._blocks.get(date_key, block)
+            self._used[date_key] = time.monotonic()
+            while len(self._blocks) > self.max_dates:
+                oldest = min(self._used, key=self._used.get)
+                self._blocks.pop(oldest, None)
+                self._used.pop(oldest, None)
+            return block
+
+    def frame(self, client, date_key):
+        return self.get(client, date_key).frame()
+
+    def at(self, client, date_keys, minute, asof=True):
+        # Cross-contract slices, e.g. all contracts at 14:22
+        parts = []
+        for date_key in date_keys:
+            col = self.get(client, date_key).column_at(minute, asof=asof)
+            if col is not None:
+                parts.append(col)
+        if not parts:
+            return pd.Series(dtype=np.float32, name='timeSignal')
+        return pd.concat(parts).sort_index()
+
+    def stats(self):
+        with self._lock:
+            return {
+                date_key: {
+                    'contracts': len(block.contracts),
+                    'minutes': block.n_minutes,
+                    'bytes': block.nbytes,
+                }
+                for date_key, block in self._blocks.items()
+            }
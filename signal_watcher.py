@@ -0,0 +1,227 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+
+import pandas as pd
+
+import frames
+import leases
+import paging
+
+CHANNEL = "signal_alerts"
+RECENT_KEY = "signal_alerts:recent"      # Last alerts, for subscribers that start late
+LEADER_KEY = "signal_watcher:leader"
+CURSOR_KEY = "signal_watcher:cursor"      # Last snapshot_minute processed
+STATE_KEY = "signal_watcher:last_signal"  # contract -> {"s": last tradeSignal, "m": its snapshot_minute}
+
+OPEN_SIGNALS = ("OPEN_LONG", "OPEN_SHORT")
+RECENT_LIMIT = 200
+POLL_INTERVAL = 20
+LEADER_TTL = 60
+
+
+def alert_id(row):
+    return f"{row['contract']}:{row['snapshot_minute']}:{row['tradeSignal']}"
+
+
+class SignalWatcher:
+    # Detects new OPEN_LONG/OPEN_SHORT transitions once per signal and publishes
+    # them on Redis pub/sub. Every app process may start one; a Redis lease makes
+    # sure only one of them polls Supabase at a time. Cursor and per-contract
+    # state live in Redis, so a restarted (or newly elected) watcher neither
+    # re-sends old alerts nor misses ones that arrived while it was down.
+
+    def __init__(self, client, r, poll_interval=POLL_INTERVAL):
+        self.client = client
+        self.r = r
+        self.poll_interval = poll_interval
+        self.instance = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._thread = None
+        self.is_leader = False
+        self.published = 0
+        self.errors = 0
+        self.last_poll_at = None
+
+    def _acquire_lease(self):
+        return leases.acquire_or_renew(self.r, LEADER_KEY, self.instance, LEADER_TTL)
+
+    def _fetch_since(self, since):
+        # Rows from `since` on, ordered by (snapshot_minute, contract); keyset
+        # pages, so rows inserted during the walk cannot shift it
+        rows = []
+        for page in paging.keyset_pages(self.client, "signals", frames.SIGNAL_COLUMNS, start=since):
+            rows.extend(page)
+        return rows
+
+    def _initialize(self):
+        # First run ever: take the current state as the baseline without alerting
+        since = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(hours=1)).isoformat()
+        rows = self._fetch_since(since)
+        if rows:
+            last = {}
+            for row in rows:
+                last[row['contract']] = json.dumps({"s": row['tradeSignal'] or "", "m": row['snapshot_minute']})
+            self.r.hset(STATE_KEY, mapping=last)
+        self.r.set(CURSOR_KEY, rows[-1]['snapshot_minute'] if rows else since)
+
+    def poll_once(self):
+        cursor = self.r.get(CURSOR_KEY)
+        if cursor is None:
+            self._initialize()
+            return []
+
+        # Signals of one minute may be inserted a little apart, so each poll
+        # re-reads the settle window before the cursor and skips rows already
+        # processed per contract
+        rows = self._fetch_since((pd.Timestamp(cursor) - frames.SETTLE_LAG).isoformat())
+        if not rows:
+            return []
+
+        last = {c: json.loads(v) for c, v in self.r.hgetall(STATE_KEY).items()}
+        alerts = []
+        changed = {}
+        for row in rows:
+            previous = last.get(row['contract'])
+            minute = pd.Timestamp(row['snapshot_minute'])
+            if previous and minute <= pd.Timestamp(previous["m"]):
+                continue  # Already processed
+
+            signal = row['tradeSignal'] or ""
+            # Edge-triggered: only a change into an OPEN_* state is an alert
+            if signal in OPEN_SIGNALS and (previous or {}).get("s") != signal:
+                alerts.append({
+                    "id": alert_id(row),
+                    "contract": row['contract'],
+                    "tradeSignal": signal,
+                    "timeSignal": row['timeSignal'],
+                    "snapshot_minute": row['snapshot_minute'],
+                })
+            last[row['contract']] = changed[row['contract']] = {"s": signal, "m": row['snapshot_minute']}
+
+        if not changed:
+            return []
+
+        pipe = self.r.pipeline(transaction=True)
+        for alert in alerts:
+            payload = json.dumps(alert)
+            pipe.publish(CHANNEL, payload)
+            pipe.lpush(RECENT_KEY, payload)
+        if alerts:
+            pipe.ltrim(RECENT_KEY, 0, RECENT_LIMIT - 1)
+        pipe.hset(STATE_KEY, mapping={c: json.dumps(v) for c, v in changed.items()})
+        pipe.set(CURSOR_KEY, max((v["m"] for v in changed.values()), key=pd.Timestamp))
+        pipe.execute()
+
+        self.published += len(alerts)
+        return alerts
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.is_leader = self._acquire_lease()
+                if self.is_leader:
+                    self.poll_once()
+                    self.last_poll_at = time.time()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in signal watcher: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="signal-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            leases.release(self.r, LEADER_KEY, self.instance)
+
+
+class AlertFeed:
+    # Per-process subscriber: keeps the recent alerts in memory so sessions can
+    # pick out the ones they have not shown yet without touching Redis.
+
+    def __init__(self, r, maxlen=RECENT_LIMIT):
+        self.r = r
+        self._alerts = deque(maxlen=maxlen)
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _add(self, alert):
+        with self._lock:
+            if alert["id"] in self._ids:
+                return
+            if len(self._alerts) == self._alerts.maxlen:
+                self._ids.discard(self._alerts[0]["id"])
+            self._alerts.append(alert)
+            self._ids.add(alert["id"])
+
+    def _run(self):
+        while not self._stop.is_set():
+            pubsub = self.r.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CHANNEL)
+                # Catch up on anything published before we subscribed (oldest first)
+                for payload in reversed(self.r.lrange(RECENT_KEY, 0, RECENT_LIMIT - 1)):
+                    self._add(json.loads(payload))
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._add(json.loads(message["data"]))
+            except Exception as e:
+                print(f"Error in alert feed: {e}")
+                self._stop.wait(5)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="alert-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def alerts(self):
+        with self._lock:
+            return list(self._alerts)
+
+
+if __name__ == "__main__":
+    # Standalone watcher process: python signal_watcher.py
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    import functions
+
+    load_dotenv()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_API_KEY")
+    if not url or not key:
+        print("Supabase URL and API Key must be set in the .env file.")
+        exit()
+
+    watcher = SignalWatcher(create_client(url, key), functions.connect_to_redis())
+    print(f"Signal watcher {watcher.instance} started (poll every {watcher.poll_interval}s)")
+    watcher.start()
+    try:
+        while True:
+            time.sleep(60)
+            print(f"leader={watcher.is_leader} published={watcher.published} errors={watcher.errors}")
+    except KeyboardInterrupt:
+        watcher.stop()
@@ -0,0 +1,141 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+SNAPSHOT_COLUMNS = "snapshot_minute, board, depth, remaining_time_sec"
+TRADES_TTL = 30  # The latest-trades lookup follows new snapshots, so it expires
+
+
+def minute_key(minute):
+    # Same instant, whatever string format it came in
+    ts = pd.Timestamp(minute)
+    return (ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')).isoformat()
+
+
+class SnapshotPrefetcher:
+    # Bounded LRU of board/depth snapshots per (contract, minute). Viewing a
+    # minute queues its neighbours and the contract's trade-active minutes on a
+    # small thread pool, one Supabase request per batch, so stepping or
+    # clicking to them is served from memory. Shared across sessions, so
+    # get() and latest_trades() hand out copies, never the cached rows.
+
+    def __init__(self, max_entries=512, workers=2):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._trades = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot-prefetch")
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def _store(self, contract, rows):
+        with self._lock:
+            for row in rows:
+                key = (contract, minute_key(row['snapshot_minute']))
+                self._entries[key] = row
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fetch(self, client, contract, minutes):
+        response = client.table("snapshots") \
+            .select(SNAPSHOT_COLUMNS) \
+            .eq("contract", contract) \
+            .in_("snapshot_minute", list(minutes)) \
+            .execute()
+        rows = response.data or []
+        self._store(contract, rows)
+        return rows
+
+    def _fetch_batch(self, client, contract, minutes, keys):
+        try:
+            self._fetch(client, contract, minutes)
+            self.prefetched += len(minutes)
+        except Exception as e:
+            print(f"Error prefetching snapshots for {contract}: {e}")
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._pending.pop(key, None)
+
+    def prefetch(self, client, contract, minutes):
+        # Queue the minutes that are neither cached nor already on their way
+        todo = []
+        keys = []
+        with self._lock:
+            for minute in minutes:
+                key = (contract, minute_key(minute))
+                if key in self._entries or key in self._pending:
+                    continue
+                todo.append(minute)
+                keys.append(key)
+            if not todo:
+                return
+            future = self._pool.submit(self._fetch_batch, client, contract, todo, keys)
+            for key in keys:
+                self._pending[key] = future
+
+    def get(self, client, contract, minute):
+        # Snapshot dict (board, depth, remaining_time_sec), or None if it does not exist
+        key = (contract, minute_key(minute))
+        with self._lock:
+            row = self._entries.get(key)
+            if row is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(row)
+            pending = self._pending.get(key)
+
+        if pending is not None:
+            # Already being prefetched: wait for it instead of asking twice
+            pending.result()
+            with self._lock:
+                row = self._entries.get(key)
+            if row is not None:
+                self.hits += 1
+                return copy.deepcopy(row)
+
+        self.misses += 1
+        rows = self._fetch(client, contract, [minute])
+        return copy.deepcopy(rows[0]) if rows else None
+
+    def latest_trades(self, client, contract):
+        # Trades of the newest snapshot (out of the last 10) that has any
+        with self._lock:
+            cached = self._trades.get(contract)
+            if cached is not None:
+                self._trades.move_to_end(contract)
+        if cached and time.monotonic() - cached[0] < TRADES_TTL:
+            return copy.deepcopy(cached[1])
+
+        response = client.table("snapshots").select("trades").eq("contract", contract) \
+            .order("snapshot_minute", desc=True).limit(10).execute()
+        trades = []
+        for snapshot in response.data or []:
+            trades_data = snapshot.get('trades')
+            if isinstance(trades_data, list) and trades_data:
+                trades = trades_data
+                break
+        with self._lock:
+            self._trades[contract] = (time.monotonic(), trades)
+            self._trades.move_to_end(contract)
+            while len(self._trades) > self.max_entries:
+                self._trades.popitem(last=False)
+        return copy.deepcopy(trades)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "trade_tapes": len(self._trades),
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+                "prefetched": self.prefetched,
+            }
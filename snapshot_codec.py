@@ -0,0 +1,381 @@
+import io
+import json
+import zlib
+
+import numpy as np
+import pandas as pd
+
+KEYFRAME_INTERVAL = 30  # Full depth ladder every N snapshots, deltas in between
+FORMAT_VERSION = 2
+MAX_EXACT_INT = 2 ** 53  # Larger ints do not survive float64 and are kept as JSON
+
+
+def _epoch_seconds(values):
+    return (pd.to_datetime(pd.Series(values), utc=True).astype('int64') // 10**9).to_numpy(dtype=np.int64)
+
+
+def _minute_text(seconds):
+    return pd.Timestamp(int(seconds), unit='s', tz='UTC').isoformat()
+
+
+def _json(value):
+    # Exact comparison key: tells 1 from 1.0 and [1, 1] from [1], ignores dict order
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _is_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return isinstance(value, float) or abs(value) <= MAX_EXACT_INT
+
+
+def _ladder(levels):
+    # {price: rest of the level} for one depth side
+    ladder = {}
+    for level in levels or []:
+        if isinstance(level, (list, tuple)) and level:
+            ladder[level[0]] = list(level[1:])
+        elif isinstance(level, dict) and 'price' in level:
+            ladder[level['price']] = {k: v for k, v in level.items() if k != 'price'}
+    return ladder
+
+
+def _ladder_levels(ladder, descending):
+    levels = []
+    for price in sorted(ladder, reverse=descending):
+        rest = ladder[price]
+        levels.append(dict(rest, price=price) if isinstance(rest, dict) else [price] + rest)
+    return levels
+
+
+def _ladder_delta(prev, curr):
+    changed = [[p, v] for p, v in curr.items() if p not in prev or _json(prev[p]) != _json(v)]
+    removed = [p for p in prev if p not in curr]
+    return {"c": changed, "r": removed}
+
+
+def _apply_delta(ladder, delta):
+    for price in delta["r"]:
+        ladder.pop(price, None)
+    for price, value in delta["c"]:
+        ladder[price] = value
+    return ladder
+
+
+def _runs(indices):
+    # [3, 4, 5, 9] -> [[3, 3], [9, 1]] (start, length)
+    runs = []
+    for i in indices:
+        if runs and runs[-1][0] + runs[-1][1] == i:
+            runs[-1][1] += 1
+        else:
+            runs.append([i, 1])
+    return runs
+
+
+class _Encoder:
+    # Row-by-row encoding state, shared by encode() and append()
+
+    def __init__(self, keyframe_interval, start=0, last_other=None, prev=None, tape=None):
+        self.keyframe_interval = keyframe_interval
+        self.i = start
+        self.last_other = last_other or {}  # field -> JSON of its current non-numeric value, present fields only
+        self.prev = prev                    # Price-keyed ladders of the previous row
+        self.tape = tape if tape is not None else []
+        self.tape_index = {_json(trade): j for j, trade in enumerate(self.tape)}
+
+    def row(self, row):
+        i = self.i
+        self.i += 1
+        board = row.get('board')
+
+        # Board: numbers go to columns (with their int/float type), anything else
+        # is kept as change records; [i] marks a field that is gone at row i
+        numbers = {}
+        others = {}
+        for field, value in (board or {}).items():
+            if _is_number(value):
+                numbers[f"board.{field}"] = value
+            else:
+                others[field] = value
+        if _is_number(row.get('remaining_time_sec')):
+            numbers["remaining_time_sec"] = row['remaining_time_sec']
+        changes = []
+        for field, value in others.items():
+            text = _json(value)
+            if self.last_other.get(field) != text:
+                changes.append((field, [i, value]))
+                self.last_other[field] = text
+        for field in [f for f in self.last_other if f not in others]:
+            changes.append((field, [i]))
+            del self.last_other[field]
+
+        # Depth: keyframe or delta against the previous row's ladders. A side (or
+        # the whole depth) that the ladders do not reproduce exactly, e.g. with
+        # repeated price levels or in another order, is also stored as it is
+        depth = row.get('depth')
+        sides = depth if isinstance(depth, dict) else {}
+        curr = {"bid": _ladder(sides.get('bid')), "ask": _ladder(sides.get('ask'))}
+        if self.prev is None or i % self.keyframe_interval == 0:
+            frame = {"k": {side: [[p, v] for p, v in ladder.items()] for side, ladder in curr.items()}}
+            self.prev = curr
+        else:
+            frame = {"d": {side: _ladder_delta(self.prev[side], curr[side]) for side in curr}}
+            # What decoding will hold: the previous ladders with the delta applied
+            self.prev = {side: _apply_delta(dict(self.prev[side]), frame["d"][side]) for side in curr}
+        rebuilt = {"bid": _ladder_levels(self.prev["bid"], True), "ask": _ladder_levels(self.prev["ask"], False)}
+        if _json(depth) != _json(rebuilt):
+            if isinstance(depth, dict) and set(depth) == {"bid", "ask"}:
+                frame["v"] = {side: depth[side] for side in rebuilt if _json(depth[side]) != _json(rebuilt[side])}
+            else:
+                frame["x"] = depth
+
+        # Trades: append-only tape of distinct trades, the row keeps index runs into it
+        trades = row.get('trades')
+        indices = []
+        for trade in trades or []:
+            key = _json(trade)
+            if key not in self.tape_index:
+                self.tape_index[key] = len(self.tape)
+                self.tape.append(trade)
+            indices.append(self.tape_index[key])
+
+        nulls = [name for name, value in (("board", board), ("trades", trades)) if value is None]
+        return numbers, changes, frame, _runs(indices), nulls
+
+
+class SnapshotSeries:
+    # Compact history of one contract's snapshots:
+    #   - numeric board fields and remaining_time_sec as float64 columns, with
+    #     a mask of the rows where the value was an int
+    #   - other board fields as change records
+    #   - depth ladders as keyframes every KEYFRAME_INTERVAL rows plus per-row deltas
+    #   - trades as one de-duplicated append-only tape; rows keep index runs into it
+    # Any minute decodes from its nearest keyframe, so access cost is bounded.
+    # Decoding gives back exactly the rows that were encoded (see bench_snapshot_codec.py).
+
+    def __init__(self, contract, minutes, numeric, int_rows, board_other, depth_frames, trade_tape, trade_runs,
+                 keyframe_interval=KEYFRAME_INTERVAL, null_rows=None, minute_text=None):
+        self.contract = contract
+        self.minutes = minutes
+        self.numeric = numeric
+        self.int_rows = int_rows          # name -> bool array, True where the value was an int
+        self.board_other = board_other
+        self.depth_frames = depth_frames
+        self.trade_tape = trade_tape
+        self.trade_runs = trade_runs
+        self.keyframe_interval = keyframe_interval
+        self.null_rows = null_rows or {}  # "board"/"trades" -> rows where it was null
+        self.minute_text = minute_text or {}  # str(row) -> snapshot_minute as given, when not in canonical form
+        self._encoder = None
+
+    def __len__(self):
+        return len(self.minutes)
+
+    # --- encode ---
+
+    @classmethod
+    def encode(cls, contract, rows, keyframe_interval=KEYFRAME_INTERVAL):
+        rows = sorted(rows, key=lambda r: pd.Timestamp(r['snapshot_minute']))
+        n = len(rows)
+        minutes = _epoch_seconds([r['snapshot_minute'] for r in rows]) if n else np.empty(0, dtype=np.int64)
+
+        encoder = _Encoder(keyframe_interval)
+        numeric, int_rows, board_other, depth_frames, trade_runs, null_rows, minute_text = {}, {}, {}, [], [], {}, {}
+        for i, row in enumerate(rows):
+            numbers, changes, frame, runs, nulls = encoder.row(row)
+            for name, value in numbers.items():
+                if name not in numeric:
+                    numeric[name] = np.full(n, np.nan)
+                    int_rows[name] = np.zeros(n, dtype=bool)
+                numeric[name][i] = value
+                int_rows[name][i] = isinstance(value, int)
+            for field, record in changes:
+                board_other.setdefault(field, []).append(record)
+            depth_frames.append(frame)
+            trade_runs.append(runs)
+            for name in nulls:
+                null_rows.setdefault(name, []).append(i)
+            if row['snapshot_minute'] != _minute_text(minutes[i]):
+                minute_text[str(i)] = row['snapshot_minute']
+        numeric.setdefault("remaining_time_sec", np.full(n, np.nan))
+        int_rows.setdefault("remaining_time_sec", np.zeros(n, dtype=bool))
+
+        series = cls(contract, minutes, numeric, int_rows, board_other, depth_frames, encoder.tape, trade_runs,
+                     keyframe_interval, null_rows, minute_text)
+        series._encoder = encoder
+        return series
+
+    def _resume(self):
+        # Encoder state after the last row, for a series loaded from bytes
+        n = len(self)
+        last_other = {}
+        for field, records in self.board_other.items():
+            if records and len(records[-1]) == 2:
+                last_other[field] = _json(records[-1][1])
+        prev = self.depth_at(n - 1, raw=True) if n else None
+        return _Encoder(self.keyframe_interval, n, last_other, prev, self.trade_tape)
+
+    def append(self, row):
+        # Incremental append of the next minute, keeping the same layout
+        if self._encoder is None:
+            self._encoder = self._resume()
+        i = len(self)
+        numbers, changes, frame, runs, nulls = self._encoder.row(row)
+        minute = _epoch_seconds([row['snapshot_minute']])
+        self.minutes = np.append(self.minutes, minute)
+        for name in set(self.numeric) | set(numbers):
+            value = numbers.get(name)
+            self.numeric[name] = np.append(self.numeric.get(name, np.full(i, np.nan)), np.nan if value is None else value)
+            self.int_rows[name] = np.append(self.int_rows.get(name, np.zeros(i, dtype=bool)), isinstance(value, int))
+        for field, record in changes:
+            self.board_other.setdefault(field, []).append(record)
+        self.depth_frames.append(frame)
+        self.trade_runs.append(runs)
+        for name in nulls:
+            self.null_rows.setdefault(name, []).append(i)
+        if row['snapshot_minute'] != _minute_text(minute[0]):
+            self.minute_text[str(i)] = row['snapshot_minute']
+
+    # --- decode ---
+
+    def index_of(self, minute):
+        ts = pd.Timestamp(minute)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize('UTC')
+        target = int(ts.timestamp())
+        i = int(np.searchsorted(self.minutes, target))
+        if i >= len(self.minutes) or self.minutes[i] != target:
+            raise KeyError(minute)
+        return i
+
+    def _board_other_at(self, field, i):
+        # (present, value) of a non-numeric board field at row i
+        record = None
+        for r in self.board_other.get(field, []):
+            if r[0] > i:
+                break
+            record = r
+        return (True, record[1]) if record is not None and len(record) == 2 else (False, None)
+
+    def _number(self, name, i):
+        value = self.numeric[name][i]
+        if np.isnan(value):
+            return None
+        return int(value) if self.int_rows[name][i] else float(value)
+
+    def _depth(self, i, ladders):
+        frame = self.depth_frames[i]
+        if "x" in frame:
+            return frame["x"]
+        verbatim = frame.get("v", {})
+        return {
+            "bid": verbatim["bid"] if "bid" in verbatim else _ladder_levels(ladders["bid"], True),
+            "ask": verbatim["ask"] if "ask" in verbatim else _ladder_levels(ladders["ask"], False),
+        }
+
+    def depth_at(self, i, raw=False):
+        start = i - i % self.keyframe_interval
+        while "k" not in self.depth_frames[start]:
+            start -= 1
+        ladders = {side: {p: v for p, v in levels} for side, levels in self.depth_frames[start]["k"].items()}
+        for j in range(start + 1, i + 1):
+            for side, delta in self.depth_frames[j]["d"].items():
+                _apply_delta(ladders[side], delta)
+        if raw:
+            return ladders
+        return self._depth(i, ladders)
+
+    def trades_at(self, i):
+        if i in self.null_rows.get("trades", ()):
+            return None
+        return [self.trade_tape[start + k] for start, length in self.trade_runs[i] for k in range(length)]
+
+    def decode(self, i):
+        row = self.decode_board(i)
+        row["depth"] = self.depth_at(i)
+        row["trades"] = self.trades_at(i)
+        return row
+
+    def decode_board(self, i):
+        board = {}
+        for name in self.numeric:
+            if name.startswith("board."):
+                value = self._number(name, i)
+                if value is not None:
+                    board[name[6:]] = value
+        for field in self.board_other:
+            present, value = self._board_other_at(field, i)
+            if present:
+                board[field] = value
+
+        return {
+            "contract": self.contract,
+            "snapshot_minute": self.minute_text.get(str(i)) or _minute_text(self.minutes[i]),
+            "board": None if i in self.null_rows.get("board", ()) else board,
+            "remaining_time_sec": self._number("remaining_time_sec", i),
+        }
+
+    def decode_minute(self, minute):
+        return self.decode(self.index_of(minute))
+
+    def iter_decode(self):
+        # Sequential scan: applies each delta once instead of replaying from a keyframe per row
+        ladders = None
+        for i in range(len(self)):
+            frame = self.depth_frames[i]
+            if "k" in frame:
+                ladders = {side: {p: v for p, v in levels} for side, levels in frame["k"].items()}
+            else:
+                for side, delta in frame["d"].items():
+                    _apply_delta(ladders[side], delta)
+            row = self.decode_board(i)
+            row["depth"] = self._depth(i, ladders)
+            row["trades"] = self.trades_at(i)
+            yield row
+
+    def board_frame(self):
+        # Numeric board columns for the whole series, no per-row decoding
+        df = pd.DataFrame({name: column for name, column in self.numeric.items()})
+        df.index = pd.to_datetime(self.minutes, unit='s', utc=True).tz_convert('Europe/Istanbul')
+        df.index.name = 'snapshot_minute'
+        return df
+
+    # --- bytes ---
+
+    def to_bytes(self):
+        meta = {
+            "version": FORMAT_VERSION,
+            "contract": self.contract,
+            "keyframe_interval": self.keyframe_interval,
+            "board_other": self.board_other,
+            "depth_frames": self.depth_frames,
+            "trade_tape": self.trade_tape,
+            "trade_runs": self.trade_runs,
+            "null_rows": self.null_rows,
+            "minute_text": self.minute_text,
+        }
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            minutes=self.minutes,
+            meta=np.frombuffer(zlib.compress(json.dumps(meta, separators=(",", ":")).encode(), 9), dtype=np.uint8),
+            **{f"num:{name}": column for name, column in self.numeric.items()},
+            **{f"int:{name}": rows for name, rows in self.int_rows.items()},
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob):
+        with np.load(io.BytesIO(blob)) as data:
+            meta = json.loads(zlib.decompress(data["meta"].tobytes()))
+            if meta["version"] != FORMAT_VERSION:
+                raise ValueError(f"Unsupported snapshot format version {meta['version']}")
+            numeric = {name[4:]: data[name] for name in data.files if name.startswith("num:")}
+            int_rows = {name[4:]: data[name] for name in data.files if name.startswith("int:")}
+            minutes = data["minutes"]
+
+        return cls(
+            meta["contract"], minutes, numeric, int_rows, meta["board_other"], meta["depth_frames"],
+            meta["trade_tape"], meta["trade_runs"], meta["keyframe_interval"], meta["null_rows"], meta["minute_text"],
+        )
@@ -0,0 +1,85 @@
+import importlib
+import threading
+import time
+from collections import deque
+
+# Imported first by app.py, so this is as close to process start as we get
+PROCESS_START = time.perf_counter()
+
+# Modules only needed by some render branches; imported off the main thread
+WARMUP_MODULES = [
+    "plotly.express",
+    "plotly.graph_objects",
+    "plotly.subplots",
+    "streamlit_plotly_events",
+]
+
+_lock = threading.Lock()
+_cold_run = None
+_recent_runs = deque(maxlen=50)
+_warmup = {"started": False, "done": False, "seconds": None, "errors": {}}
+
+
+class RunTimer:
+    # Phase marks for a single script run, in seconds since the run started
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, phase):
+        self.marks[phase] = time.perf_counter() - self.started
+        return self.marks[phase]
+
+
+def record(run_timer):
+    global _cold_run
+    with _lock:
+        if _cold_run is None:
+            _cold_run = dict(run_timer.marks)
+            _cold_run["since_process_start"] = run_timer.started - PROCESS_START
+            print("Cold start timings: " + ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in _cold_run.items()))
+        else:
+            _recent_runs.append(dict(run_timer.marks))
+
+
+def _warm(modules):
+    started = time.perf_counter()
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            _warmup["errors"][name] = str(e)
+    _warmup["seconds"] = time.perf_counter() - started
+    _warmup["done"] = True
+
+
+def warmup_in_background(modules=None):
+    # Runs once per process; later reruns return immediately
+    with _lock:
+        if _warmup["started"]:
+            return
+        _warmup["started"] = True
+    threading.Thread(target=_warm, args=(modules or WARMUP_MODULES,), name="startup-warmup", daemon=True).start()
+
+
+def report():
+    with _lock:
+        cold = dict(_cold_run) if _cold_run else {}
+        recent = list(_recent_runs)
+
+    rerun = {}
+    if recent:
+        for phase in recent[-1]:
+            values = sorted(run[phase] for run in recent if phase in run)
+            rerun[phase] = {
+                "p50": values[len(values) // 2],
+                "max": values[-1],
+            }
+
+    return {
+        "cold": cold,
+        "rerun": rerun,
+        "reruns_recorded": len(recent),
+        "warmup": dict(_warmup, errors=dict(_warmup["errors"])),
+    }
@@ -0,0 +1,56 @@
+-- Synthetic data for benchmarking the app's queries on a local database
+-- (supabase start, then: psql "$DB_URL" -v days=30 -f supabase/bench/seed.sql).
+-- Creates the two tables if they are missing, with the columns the app reads.
+-- Run bench_queries.py once before and once after applying the migrations.
+
+\if :{?days}
+\else
+\set days 30
+\endif
+
+create table if not exists public.signals (
+    contract text not null,
+    "tradeSignal" text,
+    "timeSignal" double precision,
+    snapshot_minute timestamptz not null
+);
+
+create table if not exists public.snapshots (
+    contract text not null,
+    snapshot_minute timestamptz not null,
+    board jsonb,
+    depth jsonb,
+    trades jsonb,
+    remaining_time_sec double precision
+);
+
+-- 24 hourly contracts per delivery date, each traded for the 24 hours before delivery
+with contracts as (
+    select 'PH' || to_char(d, 'YYMMDD') || lpad(h::text, 2, '0') as contract,
+           d + make_interval(hours => h) as delivery
+    from generate_series(current_date - (:days - 1), current_date, interval '1 day') d,
+         generate_series(0, 23) h
+),
+minutes as (
+    select c.contract, m as snapshot_minute
+    from contracts c,
+         generate_series(c.delivery - interval '24 hours', c.delivery - interval '1 minute', interval '1 minute') m
+)
+insert into public.signals (contract, "tradeSignal", "timeSignal", snapshot_minute)
+select contract,
+       (array['NONE', 'NONE', 'NONE', 'NONE', 'OPEN_LONG', 'OPEN_SHORT', 'CLOSE'])[1 + floor(random() * 7)::int],
+       round((random() * 2 - 1)::numeric, 3),
+       snapshot_minute
+from minutes;
+
+insert into public.snapshots (contract, snapshot_minute, board, depth, trades, remaining_time_sec)
+select contract,
+       snapshot_minute,
+       jsonb_build_object('mcp', round((2000 + random() * 500)::numeric, 2)),
+       jsonb_build_object('bid', '[]'::jsonb, 'ask', '[]'::jsonb),
+       '[]'::jsonb,
+       extract(epoch from (to_timestamp(substr(contract, 3, 8), 'YYMMDDHH24') - snapshot_minute))
+from public.signals;
+
+analyze public.signals;
+analyze public.snapshots;
@@ -0,0 +1,66 @@
+-- Plans of the app's queries, for comparing before and after the migrations
+-- in supabase/migrations. Run in the SQL editor (or psql) once on a database
+-- without them and once with them applied; bench_queries.py times the same
+-- queries end to end through PostgREST.
+--
+-- Each query picks its contract from the data, so the script runs as is.
+
+-- Latest signal of one contract (the table query the app runs per contract)
+explain (analyze, buffers)
+select contract, "tradeSignal", "timeSignal", snapshot_minute
+from public.signals
+where contract = (select max(contract) from public.signals)
+order by snapshot_minute desc
+limit 1;
+
+-- Latest signal per contract through the function (after the migrations).
+-- The plan of a SQL function body is not shown; run its LATERAL query directly
+explain (analyze, buffers)
+select latest.*
+from unnest(array(
+    select distinct contract from public.signals
+    where contract like (select left(max(contract), 8) || '%' from public.signals)
+)) as requested(code)
+cross join lateral (
+    select s.contract, s."tradeSignal", s."timeSignal", s.snapshot_minute
+    from public.signals s
+    where s.contract = requested.code
+    order by s.snapshot_minute desc
+    limit 1
+) as latest;
+
+-- Contracts of recent dates, table query: newest signals first, 1000 per page
+explain (analyze, buffers)
+select contract, snapshot_minute
+from public.signals
+order by snapshot_minute desc
+limit 1000;
+
+-- Contracts of recent dates through the function (after the migrations)
+explain (analyze, buffers)
+select * from public.recent_delivery_contracts(3);
+
+-- Snapshot minutes of one contract
+explain (analyze, buffers)
+select snapshot_minute
+from public.snapshots
+where contract = (select max(contract) from public.snapshots)
+order by snapshot_minute desc;
+
+-- OPEN_* signals of the last 6 hours (timeline)
+explain (analyze, buffers)
+select contract, "tradeSignal", "timeSignal", snapshot_minute
+from public.signals
+where "tradeSignal" in ('OPEN_LONG', 'OPEN_SHORT')
+  and snapshot_minute >= now() - interval '6 hours'
+  and snapshot_minute < now()
+order by snapshot_minute, contract
+limit 1000;
+
+-- One delivery date's contracts (signal matrix, backtest)
+explain (analyze, buffers)
+select contract, "timeSignal", snapshot_minute
+from public.signals
+where contract like (select left(max(contract), 8) || '%' from public.signals)
+order by snapshot_minute, contract
+limit 1000;
@@ -0,0 +1,27 @@
+-- Indexes for the app's query patterns.
+--
+-- (contract, snapshot_minute): latest signal per contract, contract history,
+--   snapshot minute lists and single-snapshot lookups are all "one contract,
+--   ordered by time".
+-- ("tradeSignal", snapshot_minute): OPEN_* signals in a time window (timeline).
+-- contract text_pattern_ops: like 'PH<yymmdd>%' delivery-date filters
+--   (signal matrix, backtest); the plain index cannot serve LIKE prefixes
+--   unless the database collation is C.
+
+create index if not exists signals_contract_minute_idx
+    on public.signals (contract, snapshot_minute desc);
+
+create index if not exists signals_trade_signal_minute_idx
+    on public.signals ("tradeSignal", snapshot_minute);
+
+create index if not exists signals_contract_pattern_idx
+    on public.signals (contract text_pattern_ops);
+
+create index if not exists snapshots_contract_minute_idx
+    on public.snapshots (contract, snapshot_minute desc);
+
+create index if not exists snapshots_contract_pattern_idx
+    on public.snapshots (contract text_pattern_ops);
+
+analyze public.signals;
+analyze public.snapshots;
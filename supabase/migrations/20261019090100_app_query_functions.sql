@@ -0,0 +1,67 @@
+-- Server-side versions of the app's client-side scans. The app calls these
+-- through PostgREST (queries.py) and falls back to plain table queries when
+-- they are missing.
+
+-- Latest signal per contract. Filtering the view on contract is pushed into
+-- the DISTINCT ON, so each contract is one index probe on
+-- signals_contract_minute_idx.
+create or replace view public.latest_signals
+with (security_invoker = true) as
+select distinct on (contract)
+    contract, "tradeSignal", "timeSignal", snapshot_minute
+from public.signals
+order by contract, snapshot_minute desc;
+
+-- Distinct contracts of the most recent delivery dates. Walks the contract
+-- index one distinct value at a time (loose index scan) instead of reading
+-- every signal row.
+create or replace function public.recent_delivery_contracts(max_dates integer default 3)
+returns table (delivery_date date, contract text)
+language sql
+stable
+as $$
+    with recursive distinct_contracts as (
+        (select s.contract::text as contract
+         from public.signals s
+         order by s.contract desc
+         limit 1)
+        union all
+        select (select s.contract::text
+                from public.signals s
+                where s.contract < d.contract
+                order by s.contract desc
+                limit 1)
+        from distinct_contracts d
+        where d.contract is not null
+    ),
+    dated as (
+        select to_date(substr(contract, 3, 6), 'YYMMDD') as delivery_date, contract
+        from distinct_contracts
+        where contract ~ '^PH[0-9]{6}'
+    )
+    select delivery_date, contract
+    from dated
+    where delivery_date in (
+        select distinct delivery_date from dated order by delivery_date desc limit max_dates
+    )
+    order by delivery_date desc, contract;
+$$;
+
+-- Snapshot minutes of one contract, newest first, straight from
+-- snapshots_contract_minute_idx.
+create or replace function public.snapshot_minutes(p_contract text)
+returns table (snapshot_minute timestamptz)
+language sql
+stable
+as $$
+    select s.snapshot_minute::timestamptz
+    from public.snapshots s
+    where s.contract = p_contract
+    order by s.snapshot_minute desc;
+$$;
+
+grant select on public.latest_signals to anon, authenticated;
+grant execute on function public.recent_delivery_contracts(integer) to anon, authenticated;
+grant execute on function public.snapshot_minutes(text) to anon, authenticated;
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,39 @@
+-- recent_delivery_contracts: only hourly PH codes (PH + YYMMDD + HH, hour
+-- 00-23) count as delivery contracts, the same rule as contracts.parse. The
+-- first version matched '^PH[0-9]{6}', so daily codes were listed under a
+-- delivery date here while the app's table-query fallback files them under
+-- `others`.
+
+create or replace function public.recent_delivery_contracts(max_dates integer default 3)
+returns table (delivery_date date, contract text)
+language sql
+stable
+as $$
+    with recursive distinct_contracts as (
+        (select s.contract::text as contract
+         from public.signals s
+         order by s.contract desc
+         limit 1)
+        union all
+        select (select s.contract::text
+                from public.signals s
+                where s.contract < d.contract
+                order by s.contract desc
+                limit 1)
+        from distinct_contracts d
+        where d.contract is not null
+    ),
+    dated as (
+        select to_date(substr(contract, 3, 6), 'YYMMDD') as delivery_date, contract
+        from distinct_contracts
+        where contract ~ '^PH[0-9]{6}([01][0-9]|2[0-3])'
+    )
+    select delivery_date, contract
+    from dated
+    where delivery_date in (
+        select distinct delivery_date from dated order by delivery_date desc limit max_dates
+    )
+    order by delivery_date desc, contract;
+$$;
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,52 @@
+-- Replaces the latest_signals view. Its DISTINCT ON has to read every signal
+-- row of the filtered contracts before it can keep the newest one, so a
+-- contract with a day of signals cost a day of rows, not one index probe.
+-- The function below does one backward probe of signals_contract_minute_idx
+-- per requested contract (LATERAL ... ORDER BY snapshot_minute DESC LIMIT 1).
+-- A view cannot take the contract list, so this one is a function.
+-- Output columns keep the table's own types, so PostgREST renders them
+-- exactly as it does for the plain table query the app falls back to.
+create or replace function public.latest_signals_for(p_contracts text[])
+returns table (
+    contract public.signals.contract%type,
+    "tradeSignal" public.signals."tradeSignal"%type,
+    "timeSignal" public.signals."timeSignal"%type,
+    snapshot_minute public.signals.snapshot_minute%type
+)
+language sql
+stable
+as $$
+    select latest.contract, latest."tradeSignal", latest."timeSignal", latest.snapshot_minute
+    from unnest(p_contracts) as requested(code)
+    cross join lateral (
+        select s.contract, s."tradeSignal", s."timeSignal", s.snapshot_minute
+        from public.signals s
+        where s.contract = requested.code
+        order by s.snapshot_minute desc
+        limit 1
+    ) as latest;
+$$;
+
+drop view if exists public.latest_signals;
+
+-- snapshot_minutes cast the column to timestamptz. On a timestamp (without
+-- time zone) column that changes the text PostgREST returns ("+00:00" is
+-- appended), so minutes from the function and from the table fallback would
+-- not compare equal. Return the column with its own type instead.
+drop function if exists public.snapshot_minutes(text);
+
+create function public.snapshot_minutes(p_contract text)
+returns table (snapshot_minute public.snapshots.snapshot_minute%type)
+language sql
+stable
+as $$
+    select s.snapshot_minute
+    from public.snapshots s
+    where s.contract = p_contract
+    order by s.snapshot_minute desc;
+$$;
+
+grant execute on function public.latest_signals_for(text[]) to anon, authenticated;
+grant execute on function public.snapshot_minutes(text) to anon, authenticated;
+
+notify pgrst, 'reload schema';
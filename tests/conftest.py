@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The app is a set of flat modules at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loadtest  # noqa: E402
+
+
+@pytest.fixture
+def supabase():
+    # In-memory Supabase (loadtest's stub) over row lists the test can append
+    # to; .stats.requests counts round trips per table
+    def build(signals=(), snapshots=()):
+        return loadtest.StubSupabase(list(signals), list(snapshots), loadtest.BackendStats(), 0)
+    return build
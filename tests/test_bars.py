@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bars
+import frames
+
+T0 = int(pd.Timestamp("2026-10-19T08:00:00+00:00").timestamp())
+CONTRACT = "PH26101912"
+
+
+def _trades(*trades):
+    # (seconds after T0, price, volume) -> raw tape entries
+    return [{"t": T0 + s, "p": p, "q": q} for s, p, q in trades]
+
+
+def test_aggregate_ohlcv_and_vwap():
+    df = bars.aggregate(frames.trades_frame(_trades((5, 100, 1), (20, 104, 3), (50, 98, 2), (70, 101, 4))))
+    assert len(df) == 2
+    first = df.iloc[0]
+    assert (first["open"], first["high"], first["low"], first["close"]) == (100, 104, 98, 98)
+    assert first["volume"] == 6 and first["trades"] == 3
+    assert first["vwap"] == pytest.approx((100 + 104 * 3 + 98 * 2) / 6)
+    assert df.iloc[1]["open"] == 101
+    assert df["start"].iloc[0] == pd.Timestamp(T0, unit="s", tz="UTC")
+
+
+def test_a_newest_first_tape_gives_the_same_bars():
+    tape = _trades((5, 100, 1), (5, 102, 1), (30, 99, 2), (65, 101, 1))
+    oldest_first = bars.aggregate(frames.trades_frame(tape))
+    newest_first = bars.aggregate(frames.trades_frame(tape[::-1]))
+    pd.testing.assert_frame_equal(oldest_first, newest_first)
+    assert oldest_first.iloc[0]["open"] == 100 and oldest_first.iloc[0]["close"] == 99
+
+
+def test_rollup_matches_aggregating_at_the_coarser_interval():
+    rng = np.random.default_rng(7)
+    seconds = np.sort(rng.integers(0, 3 * 3600, 400))
+    tape = _trades(*[(int(s), round(float(p), 1), int(q)) for s, p, q in
+                     zip(seconds, 2500 + rng.normal(0, 5, 400).cumsum(), rng.integers(1, 20, 400))])
+    base = bars.aggregate(frames.trades_frame(tape))
+    for interval in ("5m", "15m", "1h"):
+        pd.testing.assert_frame_equal(bars.rollup(base, interval), bars.aggregate(frames.trades_frame(tape), interval))
+
+
+def test_tape_cursor_returns_each_trade_once():
+    cursor = bars.TapeCursor()
+    first = cursor.new_trades(_trades((10, 100, 1), (20, 101, 2), (20, 102, 1))[::-1])
+    assert len(first) == 3
+
+    # Overlapping tape: one more trade in the same second as the last one seen, one later
+    second = cursor.new_trades(_trades((20, 101, 2), (20, 102, 1), (20, 102, 1), (30, 103, 1))[::-1])
+    assert list(second["price"]) == [102, 103]
+    assert cursor.new_trades(_trades((20, 102, 1), (30, 103, 1))[::-1]) is None
+
+
+def _snapshots(minutes, tape_length=5):
+    # One snapshot per minute, each carrying the latest tape_length trades, newest first
+    history = _trades(*[(60 * m + 7, 100 + m % 9, 1 + m % 3) for m in range(max(minutes) + 1)])
+    return [{
+        "contract": CONTRACT,
+        "snapshot_minute": pd.Timestamp(T0 + 60 * m, unit="s", tz="UTC").isoformat(),
+        "trades": history[max(0, m - tape_length + 1):m + 1][::-1],
+    } for m in minutes]
+
+
+def test_store_builds_the_whole_history_in_increments(supabase):
+    client = supabase(snapshots=_snapshots(range(0, 90)))
+    store = bars.BarStore()
+    assert store.update(client, CONTRACT) == 90
+    assert store.update(client, CONTRACT) == 0  # Read less than REFRESH_INTERVAL ago
+
+    client.tables["snapshots"].extend(_snapshots(range(90, 150)))
+    store._series[CONTRACT].feed.refresh_interval = 0
+    assert store.update(client, CONTRACT) == 60
+
+    expected = bars.aggregate(frames.trades_frame(frames.snapshot_trades(_snapshots(range(150)))))
+    pd.testing.assert_frame_equal(store.bars(CONTRACT), expected)
+    pd.testing.assert_frame_equal(store.bars(CONTRACT, "15m"), bars.rollup(expected, "15m"))
@@ -0,0 +1,47 @@
+import time
+
+import breaker
+
+
+def _opened(reset_seconds=0.05):
+    circuit = breaker.CircuitBreaker("supabase", failure_threshold=3, reset_seconds=reset_seconds)
+    for _ in range(3):
+        assert circuit.allow()
+        circuit.record_failure(RuntimeError("timeout"))
+    return circuit
+
+
+def test_opens_after_threshold_failures_in_a_row():
+    circuit = breaker.CircuitBreaker("supabase", failure_threshold=3)
+    circuit.record_failure()
+    circuit.record_failure()
+    circuit.record_success()
+    circuit.record_failure()
+    assert not circuit.is_open()
+
+    circuit = _opened(reset_seconds=60)
+    assert circuit.is_open()
+    assert not circuit.allow()
+    stats = circuit.stats()
+    assert stats["state"] == "open" and stats["rejected"] == 1 and stats["last_error"] == "timeout"
+
+
+def test_half_open_lets_one_trial_through():
+    circuit = _opened()
+    time.sleep(0.06)
+    assert circuit.allow()
+    assert not circuit.allow()  # The trial is still running
+    circuit.record_success()
+    assert circuit.stats()["state"] == "closed"
+    assert circuit.allow()
+
+
+def test_failed_trial_reopens_and_keeps_the_incident_start():
+    circuit = _opened()
+    opened_at = circuit.opened_at
+    time.sleep(0.06)
+    assert circuit.allow()
+    circuit.record_failure(RuntimeError("still down"))
+    assert circuit.stats()["state"] == "open"
+    assert circuit.opened_at == opened_at
+    assert not circuit.allow()
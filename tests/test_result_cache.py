@@ -0,0 +1,211 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import breaker
+import result_cache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fresh = result_cache.ResultCache(1024 * 1024)
+    monkeypatch.setattr(result_cache, "cache", fresh)
+    return fresh
+
+
+def test_concurrent_misses_share_one_load(cache):
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("f", "k", load, ttl=60)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [(42, None)] * 8
+    counters = cache.stats()["functions"]["f"]
+    assert counters["misses"] == 1 and counters["coalesced"] == 7
+
+
+def test_errors_reach_every_waiter_and_are_not_cached(cache):
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("down")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_load("f", "k", failing, ttl=60)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert cache.get_or_load("f", "k", lambda: "up", ttl=60) == ("up", None)
+
+
+def test_least_recently_used_entries_leave_first():
+    cache = result_cache.ResultCache(4000)
+    for key in "abcd":
+        cache.put("f", key, "x" * 900, ttl=60)
+    cache.get("f", "a")
+    cache.put("f", "e", "x" * 900, ttl=60)
+
+    assert cache.get("f", "b") == (False, None)
+    assert all(cache.get("f", key)[0] for key in "acde")
+    assert cache.stats()["resident_bytes"] <= 4000
+
+
+def test_a_result_larger_than_a_quarter_of_the_budget_is_not_kept():
+    cache = result_cache.ResultCache(4000)
+    cache.put("f", "big", "x" * 2000, ttl=60)
+    assert cache.get("f", "big") == (False, None)
+    assert cache.stats()["functions"]["f"]["too_large"] == 1
+
+
+def test_reload_replaces_a_fresh_entry(cache):
+    cache.put("f", "k", 1, ttl=60)
+    assert cache.reload("f", "k", lambda: 2, ttl=60) == 2
+    assert cache.get("f", "k") == (True, 2)
+
+
+def test_callers_get_private_copies(cache):
+    @result_cache.cached(ttl=60)
+    def structure():
+        return {"2026-10-19": ["PH26101910"]}
+
+    @result_cache.cached(ttl=60)
+    def frame():
+        return pd.DataFrame({"contract": ["PH26101910"], "timeSignal": [0.4]})
+
+    structure()["2026-10-19"].append("changed")
+    assert structure() == {"2026-10-19": ["PH26101910"]}
+
+    df = frame()
+    df.loc[0, "timeSignal"] = -1.0
+    df["extra"] = 1
+    assert frame().equals(pd.DataFrame({"contract": ["PH26101910"], "timeSignal": [0.4]}))
+
+
+def test_arguments_are_part_of_the_key(cache):
+    calls = []
+
+    @result_cache.cached(ttl=60)
+    def latest(contracts):
+        calls.append(list(contracts))
+        return len(contracts)
+
+    assert latest(["a", "b"]) == 2
+    assert latest(("a", "b")) == 2
+    assert latest(["a"]) == 1
+    assert calls == [["a", "b"], ["a"]]
+
+    latest.clear()
+    latest(["a"])
+    assert len(calls) == 3
+
+
+def test_default_is_returned_when_the_load_fails(cache):
+    @result_cache.cached(ttl=60, default=list)
+    def flaky():
+        raise RuntimeError("down")
+
+    assert flaky() == []
+    with pytest.raises(RuntimeError):
+        flaky.fetch()
+
+
+def _wait_fresh(cache, name, key, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cache.get(name, key)[0]:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_stale_entry_is_served_while_one_background_load_refreshes_it(cache):
+    cache.get_or_load("f", "k", lambda: "old", ttl=0.05, max_stale=60)
+    loaded_at = time.time()
+    time.sleep(0.06)
+
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "new"
+
+    first = cache.get_or_load("f", "k", load, ttl=60, max_stale=60)
+    second = cache.get_or_load("f", "k", load, ttl=60, max_stale=60)
+    assert first[0] == second[0] == "old"
+    assert first[1] == second[1] == cache.stale_as_of("f", "k") == pytest.approx(loaded_at, abs=1)
+    release.set()
+
+    assert _wait_fresh(cache, "f", "k")
+    assert cache.get_or_load("f", "k", load, ttl=60) == ("new", None)
+    assert calls == [1]
+
+
+def test_failed_refresh_keeps_the_stale_entry(cache):
+    cache.get_or_load("f", "k", lambda: "old", ttl=0.05, max_stale=60)
+    time.sleep(0.06)
+
+    def failing():
+        raise RuntimeError("down")
+
+    assert cache.get_or_load("f", "k", failing, ttl=60, max_stale=60)[0] == "old"
+    deadline = time.monotonic() + 2
+    while cache.stats()["functions"]["f"]["failures"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get_or_load("f", "k", failing, ttl=60, max_stale=60)[0] == "old"
+
+
+def test_entry_past_max_stale_is_loaded_again(cache):
+    cache.get_or_load("f", "k", lambda: "old", ttl=0.02, max_stale=0.02)
+    time.sleep(0.05)
+    assert cache.get_or_load("f", "k", lambda: "new", ttl=60) == ("new", None)
+
+
+def test_open_circuit_serves_stale_without_loading(cache):
+    circuit = breaker.CircuitBreaker("supabase", failure_threshold=1, reset_seconds=60)
+
+    @result_cache.cached(ttl=0.05, max_stale=60, circuit=circuit, default=list)
+    def contracts(fail):
+        if fail:
+            raise RuntimeError("down")
+        return ["PH26101910"]
+
+    assert contracts(False) == ["PH26101910"]
+    circuit.record_failure()
+    time.sleep(0.06)
+
+    value, stale_as_of = contracts.fetch(False)
+    assert value == ["PH26101910"] and stale_as_of is not None
+    time.sleep(0.05)
+    assert cache.stats()["functions"][contracts.__qualname__]["rejected"] >= 1
+    assert contracts(True) == []  # Nothing cached for these arguments, circuit open
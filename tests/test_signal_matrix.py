@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+import signal_matrix
+
+DATE_KEY = "261019"
+CONTRACTS = [f"PH{DATE_KEY}{h:02d}" for h in (10, 11, 12)]
+
+
+def _row(contract, minute, value):
+    signal = "OPEN_LONG" if value > 0.3 else "OPEN_SHORT" if value < -0.3 else "HOLD"
+    stamp = (pd.Timestamp("2026-10-19T08:00:00+00:00") + pd.Timedelta(minutes=minute)).isoformat()
+    return {"contract": contract, "snapshot_minute": stamp, "timeSignal": value, "tradeSignal": signal}
+
+
+def _rows(minutes, offset=0.0):
+    return [_row(c, m, round((i - 1) * 0.2 + m / 100 + offset, 3)) for m in minutes for i, c in enumerate(CONTRACTS)]
+
+
+def _full(rows):
+    block = signal_matrix.DateBlock(DATE_KEY)
+    block.apply_rows(rows)
+    return block
+
+
+def test_incremental_refresh_matches_a_full_reload(supabase):
+    client = supabase(_rows(range(0, 40, 4)))
+    store = signal_matrix.SignalMatrixStore(refresh_interval=0)
+    store.get(client, DATE_KEY)
+
+    # New minutes, a late row and a corrected value, both inside the settle window
+    rows = client.tables["signals"]
+    rows.extend(_rows(range(40, 60, 4)))
+    rows.append(_row("PH26101913", 34, 0.5))
+    corrected = next(r for r in rows if r["contract"] == CONTRACTS[0] and r == _row(CONTRACTS[0], 32, r["timeSignal"]))
+    corrected["timeSignal"] = -0.9
+    block = store.get(client, DATE_KEY)
+
+    pd.testing.assert_frame_equal(block.frame(), _full(client.tables["signals"]).frame())
+    assert block.frame().loc["PH26101913"].notna().sum() == 1
+    assert block.frame().loc[CONTRACTS[0]].iloc[8] == np.float32(-0.9)
+
+
+def test_refresh_reads_only_the_settle_window(supabase):
+    client = supabase(_rows(range(0, 120, 4)))
+    store = signal_matrix.SignalMatrixStore(refresh_interval=0)
+    store.get(client, DATE_KEY)
+    read = client.stats.requests["supabase:signals"]
+
+    since = store.get(client, DATE_KEY).settle_start()
+    assert pd.Timestamp(since) == pd.Timestamp(_row(CONTRACTS[0], 116, 0)["snapshot_minute"]) - pd.Timedelta(minutes=10)
+    assert client.stats.requests["supabase:signals"] == read + 1
+
+
+def test_handed_out_blocks_do_not_change(supabase):
+    client = supabase(_rows(range(0, 20, 4)))
+    store = signal_matrix.SignalMatrixStore(refresh_interval=0)
+    first = store.get(client, DATE_KEY)
+    before = first.frame()
+
+    client.tables["signals"].extend(_rows(range(20, 40, 4)))
+    second = store.get(client, DATE_KEY)
+
+    assert second is not first
+    pd.testing.assert_frame_equal(first.frame(), before)
+    assert second.n_minutes == first.n_minutes + 5
+
+
+def test_out_of_order_minutes_are_sorted():
+    block = _full(_rows([8, 12]))
+    block.apply_rows(_rows([4]))
+    minutes = block.minutes[:block.n_minutes]
+    assert (np.diff(minutes) > np.timedelta64(0)).all()
+    pd.testing.assert_frame_equal(block.frame(), _full(_rows([4, 8, 12])).frame())
+
+
+def test_column_at_carries_the_last_value_forward():
+    block = _full(_rows([0, 4]) + [_row("PH26101913", 0, 0.7)])
+    at = pd.Timestamp(_row(CONTRACTS[0], 4, 0)["snapshot_minute"])
+    asof = block.column_at(at)
+    assert asof["PH26101913"] == np.float32(0.7)
+    assert np.isnan(block.column_at(at, asof=False)["PH26101913"])
@@ -0,0 +1,90 @@
+import json
+import random
+
+import pandas as pd
+import pytest
+
+import snapshot_codec
+
+CONTRACT = "PH26101912"
+
+
+def _rows(n, seed=3):
+    rng = random.Random(seed)
+    start = pd.Timestamp("2026-10-19T06:00:00+00:00")
+    price = 2500.0
+    tape = []
+    rows = []
+    for i in range(n):
+        price += rng.uniform(-4, 4)
+        if rng.random() < 0.5:
+            tape.insert(0, {"p": round(price, 2), "q": rng.randint(1, 20), "t": int(start.timestamp()) + 60 * i})
+            del tape[20:]
+        rows.append({
+            "contract": CONTRACT,
+            "snapshot_minute": (start + pd.Timedelta(minutes=i)).isoformat(),
+            "board": {"mcp": round(price, 2), "lastPrice": rng.randint(2400, 2600), "status": "open" if i % 7 else "halt"},
+            "depth": {
+                "bid": [[round(price - 2 * k, 1), rng.randint(1, 50)] for k in range(1, rng.randint(3, 8))],
+                "ask": [[round(price + 2 * k, 1), rng.randint(1, 50)] for k in range(1, rng.randint(3, 8))],
+            },
+            "trades": list(tape),
+            "remaining_time_sec": 3600 - 60 * i if i % 5 else float(3600 - 60 * i),
+        })
+    return rows
+
+
+def _same(a, b):
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def _assert_round_trip(series, rows):
+    assert len(series) == len(rows)
+    for i, (decoded, row) in enumerate(zip(series.iter_decode(), rows)):
+        assert _same(decoded, row), f"row {i} does not round-trip"
+        assert _same(series.decode(i), row), f"row {i} does not round-trip with random access"
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 4, snapshot_codec.KEYFRAME_INTERVAL])
+def test_encode_decode_round_trip(keyframe_interval):
+    rows = _rows(70)
+    _assert_round_trip(snapshot_codec.SnapshotSeries.encode(CONTRACT, rows, keyframe_interval), rows)
+
+
+def test_bytes_round_trip():
+    rows = _rows(45)
+    blob = snapshot_codec.SnapshotSeries.encode(CONTRACT, rows, 8).to_bytes()
+    _assert_round_trip(snapshot_codec.SnapshotSeries.from_bytes(blob), rows)
+
+
+def test_append_matches_encode_and_survives_bytes():
+    rows = _rows(50)
+    series = snapshot_codec.SnapshotSeries.from_bytes(snapshot_codec.SnapshotSeries.encode(CONTRACT, rows[:30], 8).to_bytes())
+    for row in rows[30:]:
+        series.append(row)
+    _assert_round_trip(series, rows)
+    _assert_round_trip(snapshot_codec.SnapshotSeries.from_bytes(series.to_bytes()), rows)
+
+
+def test_nulls_odd_values_and_minute_text_are_kept():
+    rows = _rows(6)
+    rows[1]["board"] = None
+    rows[2]["trades"] = None
+    rows[3]["depth"]["bid"] = rows[3]["depth"]["bid"] + [rows[3]["depth"]["bid"][-1]]  # Repeated level
+    rows[4]["board"]["big"] = 2 ** 60
+    rows[4]["remaining_time_sec"] = None
+    rows[5]["snapshot_minute"] = "2026-10-19T09:05:00+03:00"  # Same instant as 06:05 UTC, other text
+    series = snapshot_codec.SnapshotSeries.encode(CONTRACT, rows, 2)
+    _assert_round_trip(series, rows)
+    assert _same(series.decode_minute("2026-10-19T06:05:00Z"), rows[5])
+
+
+def test_unknown_minute_and_version_are_rejected(monkeypatch):
+    series = snapshot_codec.SnapshotSeries.encode(CONTRACT, _rows(3))
+    with pytest.raises(KeyError):
+        series.index_of("2026-10-19T05:00:00Z")
+
+    blob = series.to_bytes()
+    monkeypatch.setattr(snapshot_codec, "FORMAT_VERSION", snapshot_codec.FORMAT_VERSION + 1)
+    with pytest.raises(ValueError):
+        snapshot_codec.SnapshotSeries.from_bytes(blob)
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import timeline
+
+T0 = pd.Timestamp("2026-10-19T08:00:00", tz="UTC")
+
+
+def _t(minutes):
+    return T0 + pd.Timedelta(minutes=minutes)
+
+
+@pytest.mark.parametrize("covered, expected", [
+    ([], [(0, 60)]),
+    ([(0, 60)], []),
+    ([(-10, 70)], []),
+    ([(10, 20)], [(0, 10), (20, 60)]),
+    ([(10, 20), (30, 40)], [(0, 10), (20, 30), (40, 60)]),
+    ([(-10, 5), (50, 90)], [(5, 50)]),
+    ([(70, 80)], [(0, 60)]),
+])
+def test_subtract(covered, expected):
+    missing = timeline._subtract(_t(0), _t(60), [(_t(a), _t(b)) for a, b in covered])
+    assert missing == [(_t(a), _t(b)) for a, b in expected]
+
+
+def test_merge_joins_touching_and_overlapping_ranges():
+    covered = [(_t(0), _t(10)), (_t(30), _t(40))]
+    assert timeline._merge(covered, _t(10), _t(20)) == [(_t(0), _t(20)), (_t(30), _t(40))]
+    assert timeline._merge(covered, _t(5), _t(35)) == [(_t(0), _t(40))]
+    assert timeline._merge([], _t(0), _t(5)) == [(_t(0), _t(5))]
+
+
+def test_trim_drops_rows_and_ranges_before_the_cutoff():
+    piece = timeline._Slice()
+    piece.df = timeline._to_frame([
+        {"contract": "PH26101910", "snapshot_minute": _t(m).isoformat(), "tradeSignal": "OPEN_LONG", "timeSignal": 0.5}
+        for m in (0, 20, 40)
+    ])
+    piece.covered = [(_t(0), _t(10)), (_t(15), _t(50))]
+    piece.trim(_t(20))
+    assert list(piece.df['snapshot_minute']) == [_t(20), _t(40)]
+    assert piece.covered == [(_t(20), _t(50))]
+
+
+def _signals(now, contracts, hours=2):
+    rows = []
+    for contract in contracts:
+        for m in range(0, hours * 60, 4):
+            value = 0.5 if m % 8 else -0.5
+            rows.append({
+                "contract": contract,
+                "snapshot_minute": (now - pd.Timedelta(minutes=m)).isoformat(),
+                "tradeSignal": "OPEN_LONG" if value > 0 else "OPEN_SHORT",
+                "timeSignal": value,
+            })
+    return rows
+
+
+def test_store_reads_each_range_once_and_serves_narrower_filters(supabase):
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    contracts = [f"PH261019{h:02d}" for h in range(10, 14)]
+    client = supabase(_signals(now, contracts))
+    store = timeline.TimelineStore()
+    start, end = now - pd.Timedelta(hours=1), now + pd.Timedelta(minutes=1)
+    reads = lambda: client.stats.requests.get("supabase:signals", 0)
+
+    broad = store.get(client, start, end, date_key="261019")
+    assert reads() == 1
+    store.get(client, start, end, date_key="261019")
+    assert reads() == 1
+
+    # Settled ranges plus the fresh tail of the date's slice cover the window
+    narrow = store.get(client, start, end, date_key="261019", contracts=contracts[:2])
+    assert reads() == 1
+    assert set(narrow['contract']) == set(contracts[:2])
+    assert len(narrow) == (broad['contract'].isin(contracts[:2])).sum()
+
+    # A wider window only reads the part not seen yet; the tail is re-read on request
+    store.get(client, start - pd.Timedelta(minutes=30), end, date_key="261019")
+    assert reads() == 2
+    store.get(client, start, end, date_key="261019", refresh_tail=True)
+    assert reads() == 3
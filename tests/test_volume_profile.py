@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import frames
+import volume_profile
+
+T0 = int(pd.Timestamp("2026-10-19T08:00:00+00:00").timestamp())
+CONTRACT = "PH26101912"
+
+
+def _trades(*trades):
+    # (price, volume) -> raw tape entries, one second apart
+    return [{"t": T0 + i, "p": p, "q": q} for i, (p, q) in enumerate(trades)]
+
+
+def test_histogram_bins_by_price_level():
+    start, volume, trades = volume_profile.histogram(frames.trades_frame(_trades((100.0, 2), (100.9, 3), (102.0, 1), (0.3 * 1000, 1))), step=1.0)
+    assert start == 100
+    assert volume[:3].tolist() == [5, 0, 1]
+    assert trades[:3].tolist() == [2, 0, 1]
+    # 300.0 sits on a level boundary and must not fall into level 299
+    assert volume[200] == 1
+
+
+def test_histogram_of_no_trades_is_none():
+    assert volume_profile.histogram(frames.trades_frame([])) is None
+
+
+@pytest.mark.parametrize("volume, expected", [
+    ([1, 3, 10, 2, 1], (2, 1, 2)),
+    ([10, 0, 0, 0], (0, 0, 0)),
+    ([1, 1, 1, 5, 1, 1, 1], (3, 3, 6)),  # Ties grow upwards
+    ([0, 4, 3, 6, 0], (3, 1, 3)),
+])
+def test_value_area_grows_towards_the_heavier_side(volume, expected):
+    poc, low, high = volume_profile.value_area(np.array(volume, dtype=float))
+    assert (poc, low, high) == expected
+    volume = np.array(volume, dtype=float)
+    assert volume[low:high + 1].sum() >= volume.sum() * volume_profile.VALUE_AREA
+
+
+def _snapshots(minutes, tape_length=4):
+    history = [{"t": T0 + 60 * m + 5, "p": 100 + (m * 7) % 11 + 0.5, "q": 1 + m % 4} for m in range(max(minutes) + 1)]
+    return [{
+        "contract": CONTRACT,
+        "snapshot_minute": pd.Timestamp(T0 + 60 * m, unit="s", tz="UTC").isoformat(),
+        "trades": history[max(0, m - tape_length + 1):m + 1][::-1],
+    } for m in minutes]
+
+
+def test_store_profile_matches_the_whole_history(supabase):
+    client = supabase(snapshots=_snapshots(range(60)))
+    store = volume_profile.VolumeProfileStore()
+    assert store.update(client, CONTRACT) == 60
+
+    client.tables["snapshots"].extend(_snapshots(range(60, 100)))
+    store._profiles[CONTRACT].feed.refresh_interval = 0
+    assert store.update(client, CONTRACT) == 40
+
+    df, levels = store.profile(CONTRACT)
+    history = frames.trades_frame(frames.snapshot_trades(_snapshots(range(100))))
+    start, volume, trades = volume_profile.histogram(history)
+    traded = np.flatnonzero(volume > 0)
+    assert df["price"].tolist() == ((start + traded) * volume_profile.PRICE_STEP).tolist()
+    assert df["volume"].tolist() == volume[traded].tolist()
+    assert levels["volume"] == history["volume"].sum()
+    assert levels["trades"] == len(history) == 100
+
+    poc, low, high = volume_profile.value_area(volume)
+    assert (levels["poc"], levels["val"], levels["vah"]) == (start + poc, start + low, start + high)
+    assert df.loc[df["in_value_area"], "volume"].sum() >= levels["volume"] * volume_profile.VALUE_AREA
+
+
+def test_unknown_contract_has_no_profile():
+    assert volume_profile.VolumeProfileStore().profile(CONTRACT) is None
@@ -0,0 +1,214 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import frames
+import paging
+
+OPEN_SIGNALS = ["OPEN_LONG", "OPEN_SHORT"]
+
+# The newest frames.SETTLE_LAG of a window is never marked as covered. It is
+# re-read once it is older than TAIL_TTL seconds (as the cached query did),
+# not on every call.
+TAIL_TTL = 60
+# Rows and covered ranges older than this are dropped from every slice, so a
+# long-running process does not keep each filter's history forever. Older
+# windows can still be viewed; they are fetched again on the next call.
+HORIZON = pd.Timedelta(days=7)
+
+
+def excess_strength(time_signal):
+    # Distance past the +/-0.30 threshold, signed like the signal (0 for missing values)
+    ts = pd.to_numeric(time_signal, errors='coerce')
+    return (ts - np.sign(ts) * frames.THRESHOLD).fillna(0)
+
+
+def _to_frame(rows):
+    # Typed rows plus the derived column, computed once when rows are stored
+    df = frames.signals_frame(rows)
+    df['excess_strength'] = excess_strength(df['timeSignal'])
+    return df
+
+
+def fetch_trade_signal_rows(client, start, end, date_key=None, contracts=None):
+    # OPEN_* signals in [start, end), filtered server-side by contract or delivery date
+    def where(query):
+        query = query.in_("tradeSignal", OPEN_SIGNALS)
+        if contracts:
+            return query.in_("contract", list(contracts))
+        if date_key:
+            return query.like("contract", f"PH{date_key}%")
+        return query
+
+    rows = []
+    for page in paging.keyset_pages(client, "signals", frames.SIGNAL_COLUMNS,
+                                    start.tz_convert('UTC').isoformat(), end.tz_convert('UTC').isoformat(), where=where):
+        rows.extend(page)
+    return rows
+
+
+def _subtract(start, end, covered):
+    # Parts of [start, end) not already covered
+    missing = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            missing.append((cursor, min(c_start, end)))
+        cursor = max(cursor, c_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+def _merge(covered, start, end):
+    intervals = sorted(covered + [(start, end)])
+    merged = [intervals[0]]
+    for c_start, c_end in intervals[1:]:
+        if c_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], c_end))
+        else:
+            merged.append((c_start, c_end))
+    return merged
+
+
+class _Slice:
+    # Rows already downloaded for one filter, plus the time ranges they cover
+
+    def __init__(self):
+        self.df = _to_frame([])
+        self.covered = []
+        self.tail = []          # (start, end, fetched_at) of unsettled ranges, good for TAIL_TTL
+        self.used = time.monotonic()
+
+    def trim(self, cutoff):
+        # Forget rows and ranges before cutoff
+        if len(self.df) and self.df['snapshot_minute'].iloc[0] < cutoff:
+            self.df = self.df[self.df['snapshot_minute'] >= cutoff].reset_index(drop=True)
+        self.covered = [(max(c_start, cutoff), c_end) for c_start, c_end in self.covered if c_end > cutoff]
+        self.tail = [(max(t_start, cutoff), t_end, at) for t_start, t_end, at in self.tail if t_end > cutoff]
+
+    def missing(self, start, end, refresh_tail=False):
+        # Parts of [start, end) neither settled nor fetched within TAIL_TTL
+        now = time.monotonic()
+        self.tail = [t for t in self.tail if now - t[2] < TAIL_TTL]
+        known = self.covered
+        if not refresh_tail:
+            for t_start, t_end, _ in self.tail:
+                known = _merge(known, t_start, t_end)
+        return _subtract(start, end, known)
+
+
+class _Call:
+    # One in-flight download per filter; other sessions wait for it
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class TimelineStore:
+    # Keeps downloaded OPEN_* signals per filter and only asks Supabase for
+    # ranges it has not seen yet. Shared across sessions via st.cache_resource.
+    # Downloads run outside the store lock, one per filter at a time.
+
+    def __init__(self, max_slices=8):
+        self.max_slices = max_slices
+        self._slices = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _candidates(self, key):
+        # A broader filter that already covers the window can answer a narrower one
+        date_key, contracts = key
+        yield key
+        if contracts:
+            yield (date_key, ())
+        if date_key or contracts:
+            yield (None, ())
+
+    def get(self, client, start, end, date_key=None, contracts=None, refresh_tail=False):
+        # refresh_tail: re-read the unsettled tail even if it is younger than TAIL_TTL
+        key = (date_key, tuple(sorted(contracts or ())))
+        cutoff = pd.Timestamp.now(tz='UTC') - HORIZON
+        with self._lock:
+            for cached in self._slices.values():
+                cached.trim(cutoff)
+        while True:
+            with self._lock:
+                for candidate in self._candidates(key):
+                    cached = self._slices.get(candidate)
+                    # The broader slice's fresh tail counts too, so a narrower
+                    # filter does not re-read the last minutes on its own
+                    if candidate != key and cached is not None and not cached.missing(start, end, refresh_tail):
+                        cached.used = time.monotonic()
+                        return self._filter(cached.df, start, end, date_key, key[1])
+
+                current = self._slices.get(key)
+                if current is None:
+                    current = self._slices[key] = _Slice()
+                current.used = time.monotonic()
+                missing = current.missing(start, end, refresh_tail)
+                if not missing:
+                    while len(self._slices) > self.max_slices:
+                        oldest = min(self._slices, key=lambda k: self._slices[k].used)
+                        self._slices.pop(oldest)
+                    return self._filter(current.df, start, end, date_key, key[1])
+
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if not leader:
+                call.done.wait()
+                if call.error is not None:
+                    raise call.error
+                continue  # Look again; the download may not have covered our window
+
+            try:
+                self._download(client, current, missing, date_key, key[1])
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+            refresh_tail = False
+
+    def _download(self, client, current, missing, date_key, contracts):
+        fetched = [(m_start, m_end, fetch_trade_signal_rows(client, m_start, m_end, date_key=date_key, contracts=contracts))
+                   for m_start, m_end in missing]
+        frame = _to_frame([row for _, _, rows in fetched for row in rows])
+        settled_until = pd.Timestamp.now(tz='UTC') - frames.SETTLE_LAG
+        with self._lock:
+            if len(frame):
+                current.df = frames.concat([current.df, frame]) \
+                    .drop_duplicates(subset=['contract', 'snapshot_minute'], keep='last') \
+                    .sort_values('snapshot_minute', ignore_index=True)
+            for m_start, m_end, _ in fetched:
+                covered_end = min(m_end, settled_until)
+                if covered_end > m_start:
+                    current.covered = _merge(current.covered, m_start, covered_end)
+                if m_end > covered_end:
+                    current.tail.append((max(m_start, covered_end), m_end, time.monotonic()))
+
+    @staticmethod
+    def _filter(df, start, end, date_key, contracts):
+        mask = (df['snapshot_minute'] >= start) & (df['snapshot_minute'] < end)
+        if contracts:
+            mask &= df['contract'].isin(contracts)
+        elif date_key:
+            mask &= df['contract'].str.startswith(f"PH{date_key}")
+        result = df[mask].sort_values('snapshot_minute', ascending=False, ignore_index=True)
+        for name in ('contract', 'tradeSignal'):
+            result[name] = result[name].cat.remove_unused_categories()
+        return result
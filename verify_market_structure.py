@@ -1,7 +1,8 @@
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
-import pandas as pd
+
+import contracts
 
 load_dotenv()
 
@@ -35,36 +36,16 @@ def verify_market_structure():
             if not response.data:
                 break
             
-            df = pd.DataFrame(response.data)
-            unique_in_batch = df['contract'].unique()
-            all_contracts.update(unique_in_batch)
-            
-            temp_dates = set()
-            for c in all_contracts:
-                if c.startswith("PH") and len(c) >= 8:
-                    temp_dates.add(c[2:8])
+            all_contracts.update(row['contract'] for row in response.data)
             
-            if len(temp_dates) >= 4:
+            if len({contracts.date_key(c) for c in all_contracts} - {None}) >= 4:
                 print("Found 4+ dates, stopping fetch.")
                 break
         
         print(f"Total unique contracts found: {len(all_contracts)}")
         
-        contract_dates = {}
-        for contract in all_contracts:
-            try:
-                if contract.startswith("PH") and len(contract) >= 8:
-                    date_part = contract[2:8]
-                    full_date_str = f"20{date_part[:2]}-{date_part[2:4]}-{date_part[4:]}"
-                    
-                    if full_date_str not in contract_dates:
-                        contract_dates[full_date_str] = []
-                    contract_dates[full_date_str].append(contract)
-            except:
-                continue
-        
-        sorted_dates = sorted(contract_dates.keys(), reverse=True)
-        top_3_dates = sorted_dates[:3]
+        contract_dates = contracts.ContractIndex(all_contracts).by_date(max_dates=3)
+        top_3_dates = list(contract_dates)
         
         print(f"Top 3 Dates: {top_3_dates}")
         for d in top_3_dates:
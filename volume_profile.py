@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import bars
+
+# Volume-at-price per contract: traded volume summed into price levels of
+# PRICE_STEP, kept as a dense array over the traded price range. New trades
+# are binned with numpy and added in; the point of control (POC) and the
+# value area (levels around the POC holding VALUE_AREA of the volume) are
+# recomputed once per update, not per view.
+
+PRICE_STEP = 1.0
+VALUE_AREA = 0.70
+
+
+def histogram(trades_df, step=PRICE_STEP):
+    # Trades frame -> (first level index, volume per level, trades per level)
+    df = trades_df.dropna(subset=['price'])
+    if df.empty:
+        return None
+    # The epsilon keeps prices that sit on a level boundary from falling a level short
+    levels = np.floor(df['price'].to_numpy(dtype="float64") / step + 1e-9).astype("int64")
+    start = levels.min()
+    offsets = levels - start
+    volume = np.bincount(offsets, weights=df['volume'].fillna(0).to_numpy(dtype="float64"))
+    trades = np.bincount(offsets)
+    return start, volume, trades
+
+
+def value_area(volume, share=VALUE_AREA):
+    # Dense volume per level -> (poc, low, high) positions. Grows from the POC
+    # towards whichever neighbouring level traded more, until `share` is covered
+    poc = int(np.argmax(volume))
+    target = volume.sum() * share
+    low = high = poc
+    covered = volume[poc]
+    while covered < target and (low > 0 or high < len(volume) - 1):
+        below = volume[low - 1] if low > 0 else -1.0
+        above = volume[high + 1] if high < len(volume) - 1 else -1.0
+        if above >= below:
+            high += 1
+            covered += above
+        else:
+            low -= 1
+            covered += below
+    return poc, low, high
+
+
+class _Profile:
+    def __init__(self, contract):
+        self.feed = bars.TradeFeed(contract)
+        self.start = None
+        self.volume = np.zeros(0)
+        self.trades = np.zeros(0, dtype="int64")
+        self.levels = None
+
+    def add(self, start, volume, trades):
+        if self.start is None:
+            self.start, self.volume, self.trades = start, volume, trades
+            return
+        # Widen the dense range to cover both, then add
+        new_start = min(self.start, start)
+        new_end = max(self.start + len(self.volume), start + len(volume))
+        merged_volume = np.zeros(new_end - new_start)
+        merged_trades = np.zeros(new_end - new_start, dtype="int64")
+        for s, v, t in ((self.start, self.volume, self.trades), (start, volume, trades)):
+            merged_volume[s - new_start:s - new_start + len(v)] += v
+            merged_trades[s - new_start:s - new_start + len(t)] += t
+        self.start, self.volume, self.trades = new_start, merged_volume, merged_trades
+
+
+class VolumeProfileStore:
+    # Volume profile per contract over its whole snapshot trade history, read
+    # the same way as the bars (bars.TradeFeed) and extended with new trades
+    # only. Shared across sessions, bounded to max_contracts.
+
+    def __init__(self, max_contracts=32, step=PRICE_STEP):
+        self.max_contracts = max_contracts
+        self.step = step
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, client, contract):
+        # Returns the number of new trades added; 0 at once while another
+        # session is updating the contract or it was read recently
+        with self._lock:
+            profile = self._profiles.get(contract)
+            if profile is None:
+                profile = self._profiles[contract] = _Profile(contract)
+            self._profiles.move_to_end(contract)
+            while len(self._profiles) > self.max_contracts:
+                self._profiles.popitem(last=False)
+            if not profile.feed.claim():
+                return 0
+
+        added = 0
+        try:
+            for df in profile.feed.pages(client):
+                binned = histogram(df, self.step)
+                if binned is None:
+                    continue
+                with self._lock:
+                    profile.add(*binned)
+                added += len(df)
+            if added:
+                with self._lock:
+                    self._levels(profile)
+        finally:
+            with self._lock:
+                profile.feed.done()
+        return added
+
+    def _levels(self, profile):
+        poc, low, high = value_area(profile.volume)
+        price = lambda pos: float((profile.start + pos) * self.step)
+        profile.levels = {
+            "poc": price(poc),
+            "val": price(low),
+            "vah": price(high),
+            "volume": float(profile.volume.sum()),
+            "trades": int(profile.trades.sum()),
+        }
+
+    def profile(self, contract):
+        # (frame of price/volume/trades/in_value_area for traded levels, levels dict), or None
+        with self._lock:
+            profile = self._profiles.get(contract)
+            if profile is None or profile.levels is None:
+                return None
+            traded = np.flatnonzero(profile.volume > 0)
+            price = (profile.start + traded) * self.step
+            df = pd.DataFrame({
+                "price": price,
+                "volume": profile.volume[traded],
+                "trades": profile.trades[traded],
+                "in_value_area": (price >= profile.levels["val"]) & (price <= profile.levels["vah"]),
+            })
+            return df, dict(profile.levels)
+
+    def stats(self):
+        with self._lock:
+            return {contract: len(p.volume) for contract, p in self._profiles.items()}